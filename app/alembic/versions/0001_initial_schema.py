@@ -0,0 +1,67 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+Databases created before migrations were introduced already have these
+tables (from Base.metadata.create_all), so each table is only created when
+it is missing. Such databases are adopted by this revision as-is.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.String(36), primary_key=True),
+            sa.Column("email", sa.String(255), unique=True),
+            sa.Column("username", sa.String(50), unique=True),
+            sa.Column("hashed_password", sa.String(255)),
+        )
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if not inspector.has_table("diagnoses"):
+        op.create_table(
+            "diagnoses",
+            sa.Column("id", sa.String(36), primary_key=True),
+            sa.Column("user_id", sa.String(36), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("total_score", sa.Integer, nullable=False),
+            sa.Column("original_image_url", sa.String(512), nullable=False),
+            sa.Column("wrinkle_score", sa.Integer),
+            sa.Column("wrinkle_image_url", sa.String(512)),
+            sa.Column("wrinkle_description", sa.Text),
+            sa.Column("acne_score", sa.Integer),
+            sa.Column("acne_image_url", sa.String(512)),
+            sa.Column("acne_description", sa.Text),
+            sa.Column("atopy_score", sa.Integer),
+            sa.Column("atopy_image_url", sa.String(512)),
+            sa.Column("atopy_description", sa.Text),
+        )
+
+    if not inspector.has_table("reviews"):
+        op.create_table(
+            "reviews",
+            sa.Column("id", sa.String(36), primary_key=True),
+            sa.Column("user_id", sa.String(36), sa.ForeignKey("users.id"), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("rating", sa.Integer, nullable=False),
+            sa.Column("comment", sa.Text, nullable=True),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("reviews")
+    op.drop_table("diagnoses")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_table("users")
@@ -0,0 +1,28 @@
+"""composite (user_id, created_at) index on diagnoses
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+Every history query filters on user_id and orders by created_at.
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_diagnoses_user_id_created_at",
+        "diagnoses",
+        ["user_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    # MySQL uses this index for the user_id foreign key, so keep a plain one
+    op.create_index("ix_diagnoses_user_id", "diagnoses", ["user_id"])
+    op.drop_index("ix_diagnoses_user_id_created_at", table_name="diagnoses")
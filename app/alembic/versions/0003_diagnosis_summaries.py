@@ -0,0 +1,36 @@
+"""per-user diagnosis summary table
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+Rows are created lazily: the first dashboard read or new diagnosis of a
+user builds the summary from the diagnoses table.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "diagnosis_summaries",
+        sa.Column("user_id", sa.String(36), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("latest_diagnosis_id", sa.String(36)),
+        sa.Column("latest_created_at", sa.DateTime(timezone=True)),
+        sa.Column("latest_total_score", sa.Integer),
+        sa.Column("previous_diagnosis_id", sa.String(36)),
+        sa.Column("previous_total_score", sa.Integer),
+        sa.Column("recent_total_scores", sa.JSON, nullable=False),
+        sa.Column("recent_wrinkle_scores", sa.JSON, nullable=False),
+        sa.Column("recent_acne_scores", sa.JSON, nullable=False),
+        sa.Column("recent_atopy_scores", sa.JSON, nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("diagnosis_summaries")
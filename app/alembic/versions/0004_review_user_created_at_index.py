@@ -0,0 +1,28 @@
+"""composite (user_id, created_at) index on reviews
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+Review lists are paged with a (created_at, id) keyset per user.
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_reviews_user_id_created_at",
+        "reviews",
+        ["user_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    # MySQL uses this index for the user_id foreign key, so keep a plain one
+    op.create_index("ix_reviews_user_id", "reviews", ["user_id"])
+    op.drop_index("ix_reviews_user_id_created_at", table_name="reviews")
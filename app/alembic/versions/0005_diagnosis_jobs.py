@@ -0,0 +1,38 @@
+"""diagnosis job queue table
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+
+Used when DIAGNOSIS_EXECUTION=queue: the API enqueues uploads and
+app.worker processes them.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "diagnosis_jobs",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("user_id", sa.String(36), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("status", sa.String(16), nullable=False),
+        sa.Column("upload_path", sa.String(512), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("started_at", sa.DateTime(timezone=True)),
+        sa.Column("finished_at", sa.DateTime(timezone=True)),
+        sa.Column("worker_id", sa.String(255)),
+        sa.Column("diagnosis_id", sa.String(36)),
+        sa.Column("error_status", sa.Integer),
+        sa.Column("error_detail", sa.Text),
+    )
+    op.create_index("ix_diagnosis_jobs_status_created_at", "diagnosis_jobs", ["status", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("diagnosis_jobs")
@@ -0,0 +1,23 @@
+"""model version on diagnoses
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+
+Existing diagnoses keep a NULL version.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("diagnoses", sa.Column("model_version", sa.String(255)))
+
+
+def downgrade() -> None:
+    op.drop_column("diagnoses", "model_version")
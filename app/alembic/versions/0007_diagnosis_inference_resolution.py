@@ -0,0 +1,23 @@
+"""inference resolution on diagnoses
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+
+Existing diagnoses were all inferred at IMG_SIZE and keep a NULL value.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("diagnoses", sa.Column("inference_resolution", sa.String(64)))
+
+
+def downgrade() -> None:
+    op.drop_column("diagnoses", "inference_resolution")
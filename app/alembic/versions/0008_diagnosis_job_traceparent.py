@@ -0,0 +1,23 @@
+"""trace context on diagnosis jobs
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+
+The worker continues the API request's trace from the stored traceparent header.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("diagnosis_jobs", sa.Column("traceparent", sa.String(55)))
+
+
+def downgrade() -> None:
+    op.drop_column("diagnosis_jobs", "traceparent")
@@ -0,0 +1,27 @@
+"""lease and attempt count on diagnosis jobs
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+
+Workers renew heartbeat_at while they process a job. A running job whose
+heartbeat is older than JOB_LEASE_SECONDS belongs to a dead worker and is
+claimed again, up to JOB_MAX_ATTEMPTS times.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("diagnosis_jobs", sa.Column("heartbeat_at", sa.DateTime(timezone=True)))
+    op.add_column("diagnosis_jobs", sa.Column("attempts", sa.Integer, nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column("diagnosis_jobs", "attempts")
+    op.drop_column("diagnosis_jobs", "heartbeat_at")
@@ -0,0 +1,79 @@
+import os
+import tracemalloc
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.core.memory import current_rss, memory_governor, tracemalloc_snapshots
+from app.schemas.admin import MemoryStatus, TracemallocDiff, TracemallocSnapshot
+from app.services import auth_service
+
+# Every endpoint acts on the worker process that serves the request; the responses include its pid
+router = APIRouter(dependencies=[Depends(auth_service.require_admin)])
+
+
+@router.get("/memory", response_model=MemoryStatus, summary="Memory usage of this worker")
+def get_memory_status():
+    """
+    Current RSS, tracemalloc state and the memory governor's limits for the worker serving this request.
+    """
+    traced_current, traced_peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (None, None)
+    return MemoryStatus(
+        pid=os.getpid(),
+        rss=current_rss(),
+        tracemalloc_running=tracemalloc.is_tracing(),
+        traced_current=traced_current,
+        traced_peak=traced_peak,
+        snapshot_ids=tracemalloc_snapshots.ids(),
+        requests_served=memory_governor.requests,
+        max_rss=memory_governor.max_rss,
+        max_requests=memory_governor.max_requests
+    )
+
+
+@router.post("/memory/tracemalloc/start", status_code=status.HTTP_204_NO_CONTENT, summary="Start tracemalloc")
+def start_tracemalloc(
+    frames: int = Query(25, ge=1, le=100, description="stack frames stored per allocation")
+):
+    """
+    Starts tracing allocations in this worker. Every allocation gets slower until it is stopped.
+    """
+    tracemalloc_snapshots.start(frames)
+
+
+@router.post("/memory/tracemalloc/stop", status_code=status.HTTP_204_NO_CONTENT, summary="Stop tracemalloc")
+def stop_tracemalloc():
+    """
+    Stops tracing allocations and discards this worker's snapshots.
+    """
+    tracemalloc_snapshots.stop()
+
+
+@router.post("/memory/snapshots", response_model=TracemallocSnapshot, status_code=status.HTTP_201_CREATED, summary="Take a tracemalloc snapshot")
+def take_snapshot():
+    """
+    Takes a snapshot of the allocations traced since tracemalloc was started.
+    """
+    try:
+        snapshot = tracemalloc_snapshots.take()
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return TracemallocSnapshot(pid=os.getpid(), **snapshot)
+
+
+@router.get("/memory/snapshots/{old_id}/diff/{new_id}", response_model=TracemallocDiff, summary="Compare two snapshots")
+def diff_snapshots(
+    old_id: int,
+    new_id: int,
+    group_by: Literal["lineno", "filename", "traceback"] = Query("lineno", description="how allocations are grouped"),
+    limit: int = Query(20, ge=1, le=200, description="number of allocation sites")
+):
+    """
+    The allocation sites whose size changed most from snapshot old_id to new_id.
+    Both snapshots must have been taken by the worker serving this request.
+    """
+    try:
+        stats = tracemalloc_snapshots.diff(old_id, new_id, key_type=group_by, limit=limit)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Snapshot not found in this worker")
+    return TracemallocDiff(pid=os.getpid(), old_id=old_id, new_id=new_id, stats=stats)
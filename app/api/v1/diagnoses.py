@@ -1,28 +1,34 @@
+import asyncio
 import datetime
 from datetime import date, timedelta
-from typing import Optional
+from typing import Literal, Optional
 
 from fastapi import (
-    APIRouter, Depends, Query, UploadFile, 
+    APIRouter, Depends, Query, Request, UploadFile, 
     File, Response, status, HTTPException
 )
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from app.core.responses import cached_json_response, json_bytes_response, store_json_response
 from app.db.session import get_db
 from app.models.user import User
-from app.services import auth_service, diagnosis_service
+from app.services import auth_service, job_queue
 from app.crud.crud_diagonsis import (
-    get_diagnoses_by_user, get_recent_diagnoses_by_user, get_recent_diagnoses_from_id_by_user, get_recent_diagnosis_by_user, 
-    get_diagnosis_by_id
+    count_diagnoses_by_user, get_diagnoses_by_user, get_diagnosis_scores_by_user, get_diagnosis_summary,
+    get_diagnosis_trend_by_user, get_diagnosis_with_recent_scores, recent_scores_from_rows
 )
 from app.schemas.diagnosis import (
-    DiagnosisDetail, DiagnosisHistory, DiagnosisList, RecentDiagnosis
+    DiagnosisDetail, DiagnosisHistory, DiagnosisList, DiagnosisTrend, RecentDiagnosis,
+    dump_diagnosis_detail, dump_diagnosis_list
 )
 
 router = APIRouter()
 
 @router.get("/results", response_model=DiagnosisList)
 def get_diagnoses(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user), 
     start_date: Optional[date] = Query(
@@ -34,66 +40,103 @@ def get_diagnoses(
         None, 
         description="end date (YYYY-MM-DD)",
         example="2024-01-01"
+    ),
+    limit: int = Query(
+        DEFAULT_PAGE_SIZE,
+        ge=1,
+        le=MAX_PAGE_SIZE,
+        description="maximum number of items per page"
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="nextCursor of the previous page"
+    ),
+    include_total: bool = Query(
+        False,
+        description="include the total number of items in the date range"
     )
 ):
     """
-    Get a list of diagnosis records for the logged-in user within the specified date range.
+    Get a page of diagnosis records for the logged-in user within the specified date range, newest first.
     If no dates are provided, defaults to the past year.
+    Pass the returned nextCursor to get the next page; it is null on the last page.
+    totalCount is only counted with include_total=true, as for /reviews.
     """
+    cache_key, cached = cached_json_response(request, current_user.id)
+    if cached is not None:
+        return cached
+
     if end_date is None:
         end_date = date.today()
 
     if start_date is None:
         start_date = end_date - timedelta(days=365) # One year ago
 
+    # One extra row tells whether there is a next page
     diagnoses_list = get_diagnoses_by_user(
         db=db, 
         user_id=current_user.id,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        limit=limit + 1,
+        after=decode_cursor(cursor) if cursor else None
     )
+
+    next_cursor = None
+    if len(diagnoses_list) > limit:
+        diagnoses_list = diagnoses_list[:limit]
+        last = diagnoses_list[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    total_count = None
+    if include_total:
+        total_count = count_diagnoses_by_user(
+            db=db,
+            user_id=current_user.id,
+            start_date=start_date,
+            end_date=end_date
+        )
     
-    return {"items": diagnoses_list}
+    # Serialized straight from the rows; large pages are compressed
+    return store_json_response(request, cache_key, dump_diagnosis_list(diagnoses_list, next_cursor, total_count))
 
 
 @router.get("/recent")
 def get_recent_diagnosis(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user)
 ):
     """
     Get the most recent diagnosis record for the logged-in user.
+    Served from the per-user summary row with a single primary-key lookup.
     """
-    recent_diagnosis = get_recent_diagnosis_by_user(
-        db=db, 
-        user_id=current_user.id,
-        kth=1
-    )
+    cache_key, cached = cached_json_response(request, current_user.id)
+    if cached is not None:
+        return cached
+
+    summary = get_diagnosis_summary(db=db, user_id=current_user.id)
     
-    if not recent_diagnosis:
+    if summary.latest_diagnosis_id is None:
         return Response(status_code=status.HTTP_204_NO_CONTENT)
-    
-    second_recent_diagnosis = get_recent_diagnosis_by_user(
-        db=db,
-        user_id=current_user.id,
-        kth=2
-    )
 
     compared_to_previous = 0
-    if second_recent_diagnosis:
-        compared_to_previous = recent_diagnosis.total_score - second_recent_diagnosis.total_score
+    if summary.previous_total_score is not None:
+        compared_to_previous = summary.latest_total_score - summary.previous_total_score
 
-    created_date = recent_diagnosis.created_at.strftime("%Y-%m-%d")
+    created_date = summary.latest_created_at.strftime("%Y-%m-%d")
 
-    return RecentDiagnosis(
-        id=recent_diagnosis.id,
+    result = RecentDiagnosis(
+        id=summary.latest_diagnosis_id,
         created_at=created_date,
-        total_score=recent_diagnosis.total_score,
+        total_score=summary.latest_total_score,
         compared_to_previous=compared_to_previous
     )
+    return store_json_response(request, cache_key, result.model_dump_json(by_alias=True).encode())
 
 @router.get("/recent/week", response_model=DiagnosisHistory)
 def get_weekly_diagnoses(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user), 
     endDate: Optional[date] = Query(
@@ -105,12 +148,16 @@ def get_weekly_diagnoses(
     """
     Get diagnosis records for the logged-in user from the past 7 days.
     """
+    cache_key, cached = cached_json_response(request, current_user.id)
+    if cached is not None:
+        return cached
+
     if endDate is None:
         endDate = date.today()
 
     start_date = endDate - timedelta(days=7)
 
-    diagnoses_list = get_diagnoses_by_user(
+    diagnoses_list = get_diagnosis_scores_by_user(
         db=db, 
         user_id=current_user.id,
         start_date=start_date,
@@ -126,11 +173,12 @@ def get_weekly_diagnoses(
         acne_scores=[diag.acne_score for diag in diagnoses_list if diag.acne_score is not None],
         atopy_scores=[diag.atopy_score for diag in diagnoses_list if diag.atopy_score is not None],
     )
-    return result
+    return store_json_response(request, cache_key, result.model_dump_json(by_alias=True).encode())
 
 
 @router.get("/recent/month", response_model=DiagnosisHistory)
 def get_monthly_diagnoses(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user), 
     endDate: Optional[date] = Query(
@@ -142,11 +190,15 @@ def get_monthly_diagnoses(
     """
     Get diagnosis records for the logged-in user from the past 30 days.
     """
+    cache_key, cached = cached_json_response(request, current_user.id)
+    if cached is not None:
+        return cached
+
     if endDate is None:
         endDate = date.today()
     start_date = endDate - timedelta(days=30)
 
-    diagnoses_list = get_diagnoses_by_user(
+    diagnoses_list = get_diagnosis_scores_by_user(
         db=db, 
         user_id=current_user.id,
         start_date=start_date,
@@ -162,22 +214,96 @@ def get_monthly_diagnoses(
         acne_scores=[diag.acne_score for diag in diagnoses_list if diag.acne_score is not None],
         atopy_scores=[diag.atopy_score for diag in diagnoses_list if diag.atopy_score is not None],
     )
-    return result
+    return store_json_response(request, cache_key, result.model_dump_json(by_alias=True).encode())
+
+
+@router.get("/trend", response_model=DiagnosisTrend)
+def get_diagnosis_trend(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user),
+    start_date: Optional[date] = Query(
+        None,
+        description="start date (YYYY-MM-DD)",
+        example="2023-01-01"
+    ),
+    end_date: Optional[date] = Query(
+        None,
+        description="end date (YYYY-MM-DD)",
+        example="2024-01-01"
+    ),
+    granularity: Literal["day", "week", "month"] = Query(
+        "day",
+        description="bucket size"
+    )
+):
+    """
+    Get min/avg/max scores of the logged-in user's diagnoses, aggregated per day, week or month.
+    If no dates are provided, defaults to the past 30 days.
+    Only buckets that contain diagnoses are returned.
+    """
+    if end_date is None:
+        end_date = date.today()
+
+    if start_date is None:
+        start_date = end_date - timedelta(days=30)
+
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"type": "invalid_date_range", "msg": "start_date must not be after end_date"}
+        )
+
+    rows = get_diagnosis_trend_by_user(
+        db=db,
+        user_id=current_user.id,
+        start_date=start_date,
+        end_date=end_date,
+        granularity=granularity
+    )
+
+    buckets = []
+    for row in rows:
+        bucket = {"start_date": str(row.bucket), "count": row.count}
+        for name in ("total", "wrinkle", "acne", "atopy"):
+            avg = getattr(row, f"{name}_avg")
+            bucket[name] = {
+                "min": getattr(row, f"{name}_min"),
+                "avg": round(float(avg), 1) if avg is not None else None,
+                "max": getattr(row, f"{name}_max"),
+            }
+        buckets.append(bucket)
+
+    return DiagnosisTrend(
+        granularity=granularity,
+        start_date=start_date,
+        end_date=end_date,
+        buckets=buckets
+    )
 
 
 @router.get("/{diagnosis_id}", response_model=DiagnosisDetail)
 def get_diagnosis_result(
     diagnosis_id: str,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user)
 ):
     """
     Get detailed diagnosis result by ID for the logged-in user.
     """
-    diagnosis = get_diagnosis_by_id(
+    cache_key, cached = cached_json_response(request, current_user.id)
+    if cached is not None:
+        return cached
+
+    # The diagnosis and its recent scores come from a single windowed query
+    diagnosis, recent_diagnoses = get_diagnosis_with_recent_scores(
         db=db,
-        diagnosis_id=diagnosis_id
+        diagnosis_id=diagnosis_id,
+        limit=3
     )
+
+    if not diagnosis:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
     
     if diagnosis.user_id != current_user.id:
         raise HTTPException(
@@ -185,39 +311,14 @@ def get_diagnosis_result(
             detail="Diagnosis does not belong to the current user"
         )
 
-    if not diagnosis:
-        return Response(status_code=status.HTTP_204_NO_CONTENT)
-    
-    recent_diagnoses = get_recent_diagnoses_from_id_by_user(
-        db=db, 
-        user_id=current_user.id,
-        diagnosis_id=diagnosis_id,
-        limit=3
-    )
-
-    diagnosis_detail = DiagnosisDetail.from_orm(diagnosis)
-    
-    diagnosis_detail.recent_scores = [
-        diagnosis.total_score for diagnosis in recent_diagnoses
-    ]
-    
-    diagnosis_detail.recent_wrinkle_scores = [
-        diagnosis.wrinkle_score for diagnosis in recent_diagnoses if diagnosis.wrinkle_score is not None
-    ]
-    
-    diagnosis_detail.recent_acne_scores = [
-        diagnosis.acne_score for diagnosis in recent_diagnoses if diagnosis.acne_score is not None
-    ]
+    recent_scores = recent_scores_from_rows(recent_diagnoses)
 
-    diagnosis_detail.recent_atopy_scores = [
-        diagnosis.atopy_score for diagnosis in recent_diagnoses if diagnosis.atopy_score is not None
-    ]
-
-    return diagnosis_detail
+    return store_json_response(request, cache_key, dump_diagnosis_detail(diagnosis, recent_scores))
 
 
 @router.post("/", response_model=DiagnosisDetail, status_code=status.HTTP_201_CREATED) # ❗️ 201 Created
 async def create_diagnosis(
+    request: Request,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user)
@@ -226,34 +327,25 @@ async def create_diagnosis(
     Create a new diagnosis record by processing the uploaded image file for the logged-in user.
     """
 
+    if settings.DIAGNOSIS_EXECUTION == "queue":
+        diagnosis_id = await job_queue.run_diagnosis_job(file, current_user.id)
+        diagnosis, recent_diagnoses = await asyncio.to_thread(
+            get_diagnosis_with_recent_scores, db, diagnosis_id, 3
+        )
+        return json_bytes_response(
+            dump_diagnosis_detail(diagnosis, recent_scores_from_rows(recent_diagnoses)),
+            request,
+            status_code=status.HTTP_201_CREATED
+        )
+
+    # Imported here so API processes that hand diagnoses to workers never load the ML stack
+    from app.services import diagnosis_service
+
     diagnosis_result = await diagnosis_service.process_diagnosis(
         db=db,
         file=file,
         user_id=current_user.id
     )
 
-    diagnosis_detail = DiagnosisDetail.from_orm(diagnosis_result)
-
-    recent_diagnoses = get_recent_diagnoses_by_user(
-        db=db,
-        user_id=current_user.id,
-        limit=3
-    )
-
-    diagnosis_detail.recent_scores = [
-        diagnosis.total_score for diagnosis in recent_diagnoses
-    ]
-    
-    diagnosis_detail.recent_wrinkle_scores = [
-        diagnosis.wrinkle_score for diagnosis in recent_diagnoses if diagnosis.wrinkle_score is not None
-    ]
-    
-    diagnosis_detail.recent_acne_scores = [
-        diagnosis.acne_score for diagnosis in recent_diagnoses if diagnosis.acne_score is not None
-    ]
-
-    diagnosis_detail.recent_atopy_scores = [
-        diagnosis.atopy_score for diagnosis in recent_diagnoses if diagnosis.atopy_score is not None
-    ]
-
-    return diagnosis_detail
\ No newline at end of file
+    # create_diagnosis attaches the recent score lists from the updated summary row
+    return json_bytes_response(dump_diagnosis_detail(diagnosis_result), request, status_code=status.HTTP_201_CREATED)
\ No newline at end of file
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.orm import Session
 
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor
 from app.db.session import get_db
 from app.models.user import User
 from app.services import auth_service, review_service
@@ -28,16 +31,48 @@ def create_review(
 
 
 @router.get("", response_model=ReviewList, summary="Get all reviews")
-def get_reviews(db: Session = Depends(get_db), current_user: User = Depends(auth_service.get_current_user)):
+def get_reviews(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user),
+    limit: int = Query(
+        DEFAULT_PAGE_SIZE,
+        ge=1,
+        le=MAX_PAGE_SIZE,
+        description="maximum number of reviews per page"
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="nextCursor of the previous page"
+    ),
+    include_total: bool = Query(
+        False,
+        description="include the total number of reviews"
+    )
+):
     """
-    Get all reviews from the database, ordered by most recent.
+    Get a page of reviews from the database, ordered by most recent.
+    Pass the returned nextCursor to get the next page; it is null on the last page.
+    totalCount is only counted with include_total=true, as for /diagnoses/results.
     """
+    # One extra row tells whether there is a next page
     reviews = review_service.get_reviews_by_user(
         db=db,
-        user_id=current_user.id
+        user_id=current_user.id,
+        limit=limit + 1,
+        after=decode_cursor(cursor) if cursor else None
     )
+
+    next_cursor = None
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        next_cursor = encode_cursor(reviews[-1].created_at, reviews[-1].id)
+
+    total_count = None
+    if include_total:
+        total_count = review_service.count_reviews_by_user(db=db, user_id=current_user.id)
     
     return ReviewList(
         reviews=reviews,
-        total_count=len(reviews)
+        total_count=total_count,
+        next_cursor=next_cursor
     )
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+CRUD function benchmark at production table sizes.
+
+Times every query and write in app.crud.crud_diagonsis, crud_user and
+crud_review against data from app.benchmarks.synthetic_data. Reads run for
+the heavy user (a scan every day of the window) and a typical user. Writes
+go to users the benchmark creates, so the read targets stay the same
+between runs.
+
+    python -m app.benchmarks.crud_benchmark --users 100000 --diagnoses 5000000 --reviews 200000
+    python -m app.benchmarks.crud_benchmark --no-seed --output bench/crud.json
+    python -m app.benchmarks.crud_benchmark --no-seed --baseline bench/crud.json
+
+Cached counts are timed both cold (cache cleared before each call) and warm.
+The pure helpers recent_scores_from_summary/rows are not timed.
+"""
+import argparse
+import itertools
+import sys
+import uuid
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.benchmarks.harness import compare_to_baseline, measure, print_results, write_results
+from app.benchmarks.synthetic_data import NEW_DIAGNOSIS, find_heavy_user, find_or_generate
+from app.core.cache import count_cache
+from app.core.config import settings
+from app.crud import crud_diagonsis, crud_review, crud_user
+from app.db.migrations import upgrade_database
+from app.models.diagnosis import Diagnosis
+from app.models.diagnosis_summary import DiagnosisSummary
+from app.models.review import Review
+from app.models.user import User
+
+
+def _typical_user(db: Session) -> str:
+    # The user at the median diagnosis count
+    counts = select(Diagnosis.user_id, func.count().label("count")).group_by(Diagnosis.user_id).subquery()
+    total = db.execute(select(func.count()).select_from(counts)).scalar()
+    return db.execute(
+        select(counts.c.user_id).order_by(counts.c.count, counts.c.user_id).offset(total // 2).limit(1)
+    ).scalar()
+
+
+def _top_reviewer(db: Session) -> str | None:
+    return db.execute(
+        select(Review.user_id).group_by(Review.user_id).order_by(func.count().desc()).limit(1)
+    ).scalar()
+
+
+def run(db: Session, heavy_user_id: str, repeat: int) -> dict[str, dict]:
+    today = date.today()
+    year_ago = today - timedelta(days=365)
+    week_ago = today - timedelta(days=7)
+    month_ago = today - timedelta(days=30)
+    typical_user_id = _typical_user(db)
+    reviewer_id = _top_reviewer(db) or heavy_user_id
+
+    heavy = db.execute(
+        select(Diagnosis.id, Diagnosis.created_at).where(Diagnosis.user_id == heavy_user_id)
+        .order_by(Diagnosis.created_at).offset(180).limit(1)
+    ).one()
+    heavy_user = db.get(User, heavy_user_id)
+    heavy_email, heavy_username = heavy_user.email, heavy_user.username
+    first_page = crud_diagonsis.get_diagnoses_by_user(db, heavy_user_id, year_ago, today, limit=20)
+    first_reviews = crud_review.get_reviews_by_user(db, reviewer_id, limit=20)
+    db.expunge_all()
+
+    def timed(fn, runs: int = repeat):
+        def call():
+            fn()
+            # Drop loaded objects so every run pays for hydration
+            db.expunge_all()
+        return measure(call, repeat=runs)
+
+    def cold(fn):
+        def call():
+            count_cache.clear()
+            return fn()
+        return call
+
+    results = {}
+    reads = {
+        "diagnoses_results_year_heavy": lambda: crud_diagonsis.get_diagnoses_by_user(db, heavy_user_id, year_ago, today),
+        "diagnoses_results_year_typical": lambda: crud_diagonsis.get_diagnoses_by_user(db, typical_user_id, year_ago, today),
+        "diagnoses_results_page_heavy": lambda: crud_diagonsis.get_diagnoses_by_user(db, heavy_user_id, year_ago, today, limit=20),
+        "diagnoses_results_next_page_heavy": lambda: crud_diagonsis.get_diagnoses_by_user(
+            db, heavy_user_id, year_ago, today, limit=20, after=(first_page[-1].created_at, first_page[-1].id)
+        ),
+        "diagnoses_count_year_cold": cold(lambda: crud_diagonsis.count_diagnoses_by_user(db, heavy_user_id, year_ago, today)),
+        "diagnoses_count_year_cached": lambda: crud_diagonsis.count_diagnoses_by_user(db, heavy_user_id, year_ago, today),
+        "diagnoses_scores_week_heavy": lambda: crud_diagonsis.get_diagnosis_scores_by_user(db, heavy_user_id, week_ago, today),
+        "diagnoses_scores_month_heavy": lambda: crud_diagonsis.get_diagnosis_scores_by_user(db, heavy_user_id, month_ago, today),
+        "diagnoses_trend_year_day": lambda: crud_diagonsis.get_diagnosis_trend_by_user(db, heavy_user_id, year_ago, today, "day"),
+        "diagnoses_trend_year_week": lambda: crud_diagonsis.get_diagnosis_trend_by_user(db, heavy_user_id, year_ago, today, "week"),
+        "diagnoses_trend_year_month": lambda: crud_diagonsis.get_diagnosis_trend_by_user(db, heavy_user_id, year_ago, today, "month"),
+        "diagnoses_recent_kth_1": lambda: crud_diagonsis.get_recent_diagnosis_by_user(db, heavy_user_id, kth=1),
+        "diagnoses_recent_kth_2": lambda: crud_diagonsis.get_recent_diagnosis_by_user(db, heavy_user_id, kth=2),
+        "diagnoses_recent_3_heavy": lambda: crud_diagonsis.get_recent_diagnoses_by_user(db, heavy_user_id),
+        "diagnoses_recent_3_typical": lambda: crud_diagonsis.get_recent_diagnoses_by_user(db, typical_user_id),
+        "diagnoses_recent_3_from_id": lambda: crud_diagonsis.get_recent_diagnoses_from_id_by_user(db, heavy_user_id, heavy.id),
+        "diagnosis_with_recent_scores": lambda: crud_diagonsis.get_diagnosis_with_recent_scores(db, heavy.id),
+        "diagnosis_by_id": lambda: crud_diagonsis.get_diagnosis_by_id(db, heavy.id),
+        "diagnosis_summary": lambda: crud_diagonsis.get_diagnosis_summary(db, heavy_user_id),
+        "user_by_email": lambda: crud_user.get_user_by_email(db, heavy_email),
+        "user_by_username": lambda: crud_user.get_user_by_username(db, heavy_username),
+        "reviews_first_page": lambda: crud_review.get_reviews_by_user(db, reviewer_id, limit=20),
+        "reviews_next_page": lambda: crud_review.get_reviews_by_user(
+            db, reviewer_id, limit=20, after=(first_reviews[-1].created_at, first_reviews[-1].id)
+        ) if first_reviews else None,
+        "reviews_all": lambda: crud_review.get_reviews_by_user(db, reviewer_id),
+        "reviews_count_cold": cold(lambda: crud_review.count_reviews_by_user(db, reviewer_id)),
+        "reviews_count_cached": lambda: crud_review.count_reviews_by_user(db, reviewer_id),
+    }
+    for name, fn in reads.items():
+        results[name] = timed(fn)
+
+    def rebuild_summary():
+        crud_diagonsis.rebuild_diagnosis_summary(db, heavy_user_id, db.get(DiagnosisSummary, heavy_user_id))
+        db.rollback()
+    results["diagnosis_summary_rebuild"] = timed(rebuild_summary)
+
+    # Writes: every run creates rows, so each run gets a fresh user where the function needs one
+    suffix = itertools.count()
+    run_id = uuid.uuid4().hex[:8]
+    created_ids = []
+
+    def create_user():
+        index = next(suffix)
+        user = crud_user.create_user(db, f"bench_crud_{run_id}_{index}", "", f"bench-crud-{run_id}-{index}@example.com")
+        created_ids.append(user.id)
+    # One extra run leaves a user to write to, and the warm-up run one for the warm-up delete
+    results["user_create"] = timed(create_user, runs=repeat + 1)
+    writer_id = created_ids.pop()
+    writer = db.get(User, writer_id)
+
+    results["user_update_username"] = measure(
+        lambda: crud_user.update_username(db, writer, f"bench_crud_{run_id}_renamed_{next(suffix)}"), repeat
+    )
+    results["user_update_password"] = measure(lambda: crud_user.update_password(db, writer, "x" * 64), repeat)
+    results["diagnosis_create"] = timed(lambda: crud_diagonsis.create_diagnosis(db, user_id=writer_id, **NEW_DIAGNOSIS))
+    results["diagnoses_create_batch_10"] = timed(
+        lambda: crud_diagonsis.create_diagnoses(db, [{"user_id": writer_id, **NEW_DIAGNOSIS} for _ in range(10)])
+    )
+    results["review_create"] = timed(lambda: crud_review.create_review(db, user_id=writer_id, rating=5, comment="benchmark"))
+    # Users without diagnoses or reviews, which is what delete_user can remove
+    results["user_delete"] = measure(lambda: crud_user.delete_user(db, db.get(User, created_ids.pop())), repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CRUD functions at production table sizes.")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--diagnoses", type=int, default=1_000_000)
+    parser.add_argument("--reviews", type=int, default=50_000)
+    parser.add_argument("--no-seed", action="store_true", help="reuse data from app.benchmarks.synthetic_data")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown against the baseline, as a fraction")
+    args = parser.parse_args()
+
+    upgrade_database(args.database_url)
+    engine = create_engine(args.database_url)
+    BenchSession = sessionmaker(bind=engine, autoflush=False)
+
+    with BenchSession() as db:
+        if args.no_seed and find_heavy_user(db) is None:
+            parser.error("no synthetic data found, run without --no-seed first")
+        heavy_user_id = find_or_generate(db, args.users, args.diagnoses, args.reviews)
+
+        results = run(db, heavy_user_id, args.repeat)
+
+    print_results("CRUD functions", results)
+    if args.output:
+        write_results(args.output, "crud_benchmark", results, vars(args) | {"database_url": engine.url.render_as_string(hide_password=True)})
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print(f"\nSlower than {args.baseline} by more than {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo function slower than {args.baseline} by more than {args.tolerance:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import json
+import platform
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+
+def measure(fn: Callable[[], Any], repeat: int = 10, warmup: int = 1) -> dict:
+    """
+    Calls fn repeatedly and returns latency statistics in milliseconds.
+    """
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        "runs": repeat,
+        "min_ms": round(timings[0], 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "max_ms": round(timings[-1], 3),
+    }
+
+
+def print_results(title: str, results: dict[str, dict]) -> None:
+    """
+    Prints benchmark results as an aligned table.
+    """
+    print(f"\n{title}")
+    width = max((len(name) for name in results), default=0)
+    for name, stats in results.items():
+        extra = {k: v for k, v in stats.items() if not k.endswith("_ms") and k != "runs"}
+        extra_str = "  ".join(f"{k}={v}" for k, v in extra.items())
+        print(
+            f"  {name:<{width}}  median {stats['median_ms']:>9.3f} ms"
+            f"  p95 {stats['p95_ms']:>9.3f} ms  {extra_str}"
+        )
+
+
+def write_results(path: str | Path, name: str, results: dict[str, dict], params: dict | None = None) -> None:
+    """
+    Writes benchmark results as JSON, together with run metadata.
+    """
+    document = {
+        "benchmark": name,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": params or {},
+        "results": results,
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, indent=2, ensure_ascii=False))
+
+
+def compare_to_baseline(results: dict[str, dict], baseline_path: str | Path, tolerance: float) -> list[str]:
+    """
+    Compares median latencies with a results file written by write_results.
+    Returns a message per case whose median is more than `tolerance` (a fraction) slower than the baseline.
+    Cases missing from either side are ignored.
+    """
+    baseline = json.loads(Path(baseline_path).read_text())["results"]
+
+    regressions = []
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["median_ms"], stats["median_ms"]
+        if after > before * (1 + tolerance):
+            change = (after / before - 1) * 100 if before else float("inf")
+            regressions.append(f"{name}: median {before:.3f} ms -> {after:.3f} ms (+{change:.0f}%)")
+    return regressions
@@ -0,0 +1,197 @@
+"""
+End-to-end load test against a running API server.
+
+Registers --users test users (logging in if they already exist), then sends
+diagnosis uploads and history reads at fixed arrival rates for --duration
+seconds. Arrivals are open loop with Poisson spacing: requests start on
+schedule whether or not earlier ones have finished, so a slow server builds
+a backlog instead of slowing the test down. Arrivals that would exceed
+--max-in-flight are counted as skipped instead of sent. Reports
+throughput, errors (any non-2xx response) and latency percentiles per
+request kind.
+
+    python -m app.benchmarks.load_test --base-url http://localhost:8000 --upload-rate 1 --history-rate 20
+    python -m app.benchmarks.load_test --duration 300 --image samples/face.jpg --output bench/load.json
+
+Uploads default to app/dummy/dummy_original.jpg; any --image must show a
+face, or every upload is rejected with 400.
+
+Run the server with OLLAMA_HOST pointing at app.benchmarks.ollama_stub to
+load test without a GPU machine. Uploads create real diagnoses for the
+test users; use a disposable database.
+"""
+import argparse
+import asyncio
+import random
+import time
+from pathlib import Path
+
+import httpx
+
+from app.benchmarks.harness import print_results, write_results
+from app.core.config import settings
+
+HISTORY_PATHS = ["/results", "/recent", "/recent/week", "/recent/month", "/trend"]
+PASSWORD = "loadtest1234"
+
+
+async def login_users(client: httpx.AsyncClient, count: int) -> list[str]:
+    """
+    Registers loadtest_<n> users as needed and returns an access token per user.
+    """
+    async def login(index: int) -> str:
+        email = f"loadtest_{index}@example.com"
+        await client.post("/api/v1/users/register", json={
+            "email": email, "password": PASSWORD, "username": f"loadtest_{index}"
+        })
+        # Registration fails for users left over from an earlier run; logging in works either way
+        response = await client.post("/api/v1/users/login", json={"email": email, "password": PASSWORD})
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+    return list(await asyncio.gather(*(login(index) for index in range(count))))
+
+
+class LoadRecorder:
+    """
+    Latency and outcome of every request, per kind.
+    """
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, dict[str, int]] = {}
+        self.skipped: dict[str, int] = {}
+        self.in_flight = 0
+
+    def record(self, kind: str, elapsed: float, error: str | None) -> None:
+        self.latencies.setdefault(kind, []).append(elapsed * 1000)
+        if error:
+            errors = self.errors.setdefault(kind, {})
+            errors[error] = errors.get(error, 0) + 1
+
+    def skip(self, kind: str) -> None:
+        self.skipped[kind] = self.skipped.get(kind, 0) + 1
+
+    def summary(self, duration: float) -> dict[str, dict]:
+        results = {}
+        for kind in sorted(self.latencies.keys() | self.skipped.keys()):
+            timings = sorted(self.latencies.get(kind, [])) or [0.0]
+            errors = self.errors.get(kind, {})
+            sent = len(self.latencies.get(kind, []))
+
+            def percentile(fraction: float) -> float:
+                return round(timings[min(len(timings) - 1, int(len(timings) * fraction))], 3)
+
+            results[kind] = {
+                "runs": sent,
+                "min_ms": round(timings[0], 3),
+                "median_ms": percentile(0.5),
+                "p90_ms": percentile(0.9),
+                "p95_ms": percentile(0.95),
+                "p99_ms": percentile(0.99),
+                "max_ms": round(timings[-1], 3),
+                "rps": round((sent - sum(errors.values())) / duration, 2),
+                "errors": sum(errors.values()),
+                "skipped": self.skipped.get(kind, 0),
+                "error_kinds": errors,
+            }
+        return results
+
+
+async def send(recorder: LoadRecorder, kind: str, request) -> None:
+    recorder.in_flight += 1
+    start = time.perf_counter()
+    error = None
+    try:
+        response = await request()
+        # A rejected upload (e.g. 400, no face found) is a failure, not throughput
+        if not response.is_success:
+            error = str(response.status_code)
+    except httpx.HTTPError as exc:
+        error = type(exc).__name__
+    finally:
+        recorder.in_flight -= 1
+    recorder.record(kind, time.perf_counter() - start, error)
+
+
+async def arrivals(rate: float, duration: float, kind: str, recorder: LoadRecorder, max_in_flight: int, make_request) -> None:
+    """
+    Starts make_request() calls at `rate` per second on average until `duration` seconds have passed.
+    """
+    if rate <= 0:
+        return
+    tasks = set()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+    next_arrival = loop.time()
+    while True:
+        next_arrival += random.expovariate(rate)
+        if next_arrival >= deadline:
+            break
+        await asyncio.sleep(max(0.0, next_arrival - loop.time()))
+        if recorder.in_flight >= max_in_flight:
+            recorder.skip(kind)
+            continue
+        task = asyncio.create_task(send(recorder, kind, make_request()))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+
+
+async def run(args, photo: bytes) -> tuple[dict[str, dict], float]:
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        print(f"Logging in {args.users} test users...")
+        tokens = await login_users(client, args.users)
+
+        def headers() -> dict[str, str]:
+            return {"Authorization": f"Bearer {random.choice(tokens)}"}
+
+        def upload():
+            return lambda: client.post(
+                "/api/v1/diagnoses/", headers=headers(), files={"file": ("face.jpg", photo, "image/jpeg")}
+            )
+
+        def history():
+            path = random.choice(HISTORY_PATHS)
+            return lambda: client.get(f"/api/v1/diagnoses{path}", headers=headers())
+
+        recorder = LoadRecorder()
+        print(f"Sending {args.upload_rate}/s uploads and {args.history_rate}/s history reads for {args.duration} s...")
+        start = time.perf_counter()
+        await asyncio.gather(
+            arrivals(args.upload_rate, args.duration, "upload", recorder, args.max_in_flight, upload),
+            arrivals(args.history_rate, args.duration, "history", recorder, args.max_in_flight, history),
+        )
+        # Includes the time to drain requests still running at the end
+        elapsed = time.perf_counter() - start
+    return recorder.summary(elapsed), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the diagnosis API end to end.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--upload-rate", type=float, default=1.0, help="diagnosis uploads per second")
+    parser.add_argument("--history-rate", type=float, default=10.0, help="history reads per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds to send requests for")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="requests in flight before arrivals are skipped")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout in seconds")
+    parser.add_argument(
+        "--image",
+        default=str(settings.DUMMY_DIR / "dummy_original.jpg"),
+        help="face photo to upload"
+    )
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    photo = Path(args.image).read_bytes()
+    results, elapsed = asyncio.run(run(args, photo))
+
+    print_results(f"Load test against {args.base_url} ({elapsed:.0f} s)", results)
+    if args.output:
+        write_results(args.output, "load_test", results, vars(args) | {"elapsed_s": round(elapsed, 1)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Per-worker memory of `uvicorn --workers N` against app.server (preload and fork).
+
+Starts each launch mode, waits until the process tree's memory stops
+growing, then reports RSS, PSS and USS for every process. RSS counts shared
+model pages in every worker. USS is what each worker costs on its own, and
+the PSS sum is the real total.
+
+    python -m app.benchmarks.memory_report --workers 4
+    python -m app.benchmarks.memory_report --modes prefork --output bench/memory.json
+
+PSS/USS need Linux; elsewhere only RSS is reported. The servers are not sent
+any requests, so no database is needed, only a free --port.
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+import psutil
+
+from app.benchmarks.harness import write_results
+
+MB = 1024 * 1024
+
+
+def _commands(mode: str, workers: int, port: int) -> list[str]:
+    if mode == "uvicorn":
+        return [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers)]
+    if mode == "prefork":
+        return [sys.executable, "-m", "app.server", "--port", str(port), "--workers", str(workers)]
+    raise ValueError(f"Unknown mode: {mode}")
+
+
+def _tree(root: psutil.Process) -> list[psutil.Process]:
+    try:
+        return [root] + root.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return []
+
+
+def _tree_rss(root: psutil.Process) -> int:
+    total = 0
+    for process in _tree(root):
+        try:
+            total += process.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return total
+
+
+def _wait_until_settled(root: psutil.Popen, workers: int, settle: float, timeout: float) -> None:
+    """
+    Waits until the expected workers exist and the tree's RSS has not grown for `settle` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    last_rss, stable_since = -1, time.monotonic()
+    while time.monotonic() < deadline:
+        if root.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        rss = _tree_rss(root)
+        if rss > last_rss * 1.01:
+            last_rss, stable_since = rss, time.monotonic()
+        elif len(_tree(root)) > workers and time.monotonic() - stable_since >= settle:
+            return
+        time.sleep(0.5)
+    raise TimeoutError("server memory did not settle in time")
+
+
+def measure_mode(mode: str, workers: int, port: int, settle: float, timeout: float) -> dict:
+    server = psutil.Popen(_commands(mode, workers, port), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_until_settled(server, workers, settle, timeout)
+
+        processes = []
+        for process in _tree(server):
+            try:
+                info = process.memory_full_info()
+            except (psutil.AccessDenied, psutil.NoSuchProcess):
+                continue
+            processes.append({
+                "pid": process.pid,
+                "role": "master" if process.pid == server.pid else "worker",
+                "rss_mb": round(info.rss / MB, 1),
+                "pss_mb": round(getattr(info, "pss", 0) / MB, 1),
+                "uss_mb": round(getattr(info, "uss", 0) / MB, 1),
+            })
+    finally:
+        server.terminate()
+        try:
+            server.wait(30)
+        except psutil.TimeoutExpired:
+            server.kill()
+
+    # uvicorn's multiprocess supervisor also spawns a resource tracker; only count real workers
+    worker_rows = sorted((p for p in processes if p["role"] == "worker"), key=lambda p: p["rss_mb"], reverse=True)[:workers]
+    return {
+        "processes": processes,
+        "worker_rss_mb_avg": round(sum(p["rss_mb"] for p in worker_rows) / max(1, len(worker_rows)), 1),
+        "worker_uss_mb_avg": round(sum(p["uss_mb"] for p in worker_rows) / max(1, len(worker_rows)), 1),
+        "total_pss_mb": round(sum(p["pss_mb"] for p in processes), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare worker memory across launch modes.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", default=["uvicorn", "prefork"], choices=["uvicorn", "prefork"])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--settle", type=float, default=5.0, help="seconds without memory growth before measuring")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        print(f"Starting {mode} with {args.workers} workers...")
+        results[mode] = measure_mode(mode, args.workers, args.port, args.settle, args.timeout)
+
+    for mode, result in results.items():
+        print(f"\n{mode}")
+        for process in result["processes"]:
+            print(
+                f"  {process['role']:<6} {process['pid']:>7}  rss {process['rss_mb']:>8.1f} MB"
+                f"  pss {process['pss_mb']:>8.1f} MB  uss {process['uss_mb']:>8.1f} MB"
+            )
+        print(
+            f"  worker avg rss {result['worker_rss_mb_avg']:.1f} MB, uss {result['worker_uss_mb_avg']:.1f} MB,"
+            f" total pss {result['total_pss_mb']:.1f} MB"
+        )
+
+    if args.output:
+        write_results(args.output, "memory_report", results, vars(args))
+
+
+if __name__ == "__main__":
+    main()
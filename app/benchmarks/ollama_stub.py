@@ -0,0 +1,203 @@
+"""
+Ollama stand-in for load tests without a GPU machine.
+
+Serves POST /api/chat like an Ollama server and replies with canned advice after a
+simulated generation time. It streams NDJSON chunks unless the request sets
+"stream": false. Per-model latency, its distribution, the error rate and the
+number of concurrent generations can all be configured. Requests beyond
+--concurrency wait in a queue. Once --max-queue requests are waiting, further
+ones get 503, like a busy Ollama server.
+
+    python -m app.benchmarks.ollama_stub
+    python -m app.benchmarks.ollama_stub --latency-ms 3000 --distribution lognormal --error-rate 0.01 \\
+        --model-latency llava=4000 --model-latency gemma2:9b=1200 --concurrency 2
+
+Point the app at it with OLLAMA_HOST=http://localhost:11434. GET /stub/stats
+returns request, error and rejection counts.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+ADVICE = (
+    "Your skin shows some fine lines and mild redness around the cheeks. "
+    "Use a gentle cleanser and a fragrance-free moisturizer twice a day, "
+    "and apply sunscreen every morning to keep it from getting worse."
+)
+TRANSLATED_ADVICE = (
+    "볼 주변에 잔주름과 약간의 붉은기가 보입니다. "
+    "순한 클렌저와 무향 보습제를 하루 두 번 사용하시고, "
+    "악화되지 않도록 매일 아침 자외선 차단제를 발라 주세요."
+)
+
+# Models the app uses for translation; they answer in Korean
+TRANSLATION_MODELS = {"gemma2:9b"}
+
+DISTRIBUTIONS = ("fixed", "normal", "lognormal", "exponential")
+
+
+class Latency:
+    """
+    Simulated generation time: `mean_ms` (or the model's entry in `per_model_ms`) drawn from `distribution`.
+    """
+
+    def __init__(self, mean_ms: float, distribution: str, per_model_ms: dict[str, float]):
+        self.mean_ms = mean_ms
+        self.distribution = distribution
+        self.per_model_ms = per_model_ms
+
+    def sample(self, model: str) -> float:
+        mean = self.per_model_ms.get(model, self.mean_ms) / 1000
+        if mean <= 0:
+            return 0.0
+        if self.distribution == "fixed":
+            return mean
+        if self.distribution == "normal":
+            return max(0.0, random.gauss(mean, mean / 4))
+        if self.distribution == "exponential":
+            return random.expovariate(1 / mean)
+        # Lognormal with the same mean: a long right tail, like real generation times
+        sigma = 0.5
+        return random.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+
+
+def create_app(latency: Latency, error_rate: float, concurrency: int, max_queue: int) -> FastAPI:
+    app = FastAPI(title="Ollama stub")
+    slots = asyncio.Semaphore(concurrency)
+    stats = {"requests": 0, "errors": 0, "rejected": 0, "waiting": 0, "generating": 0}
+
+    @asynccontextmanager
+    async def generation_slot() -> AsyncIterator[None]:
+        if stats["waiting"] >= max_queue:
+            stats["rejected"] += 1
+            raise HTTPException(503, "server busy, please try again. maximum pending requests exceeded")
+        stats["waiting"] += 1
+        try:
+            await slots.acquire()
+        finally:
+            stats["waiting"] -= 1
+
+        stats["generating"] += 1
+        try:
+            yield
+        finally:
+            stats["generating"] -= 1
+            slots.release()
+
+    @app.exception_handler(HTTPException)
+    async def ollama_error(request: Request, exc: HTTPException):
+        # Ollama reports errors as {"error": "..."}
+        return JSONResponse({"error": exc.detail}, status_code=exc.status_code)
+
+    @app.get("/")
+    def root():
+        return "Ollama is running"
+
+    @app.get("/stub/stats")
+    def get_stats():
+        return stats
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        payload = await request.json()
+        model = payload.get("model", "")
+        stats["requests"] += 1
+
+        content = TRANSLATED_ADVICE if model in TRANSLATION_MODELS else ADVICE
+        fails = random.random() < error_rate
+
+        if not payload.get("stream", True):
+            async with generation_slot():
+                start = time.perf_counter()
+                if fails:
+                    await asyncio.sleep(latency.sample(model) * random.random())
+                    stats["errors"] += 1
+                    raise HTTPException(500, "simulated failure")
+                await asyncio.sleep(latency.sample(model))
+                return _final_chunk(model, content, time.perf_counter() - start)
+
+        # Streaming: the slot is taken before the response starts so a full queue still answers 503
+        slot = generation_slot()
+        await slot.__aenter__()
+
+        async def chunks() -> AsyncIterator[str]:
+            try:
+                start = time.perf_counter()
+                words = content.split(" ")
+                generation_time = latency.sample(model)
+                for index, word in enumerate(words):
+                    await asyncio.sleep(generation_time / len(words))
+                    if fails and index >= len(words) // 2:
+                        # Ollama reports errors after the stream started as an error line
+                        stats["errors"] += 1
+                        yield json.dumps({"error": "simulated failure"}) + "\n"
+                        return
+                    yield json.dumps({
+                        "model": model,
+                        "created_at": _now(),
+                        "message": {"role": "assistant", "content": word if index == 0 else " " + word},
+                        "done": False,
+                    }, ensure_ascii=False) + "\n"
+                yield json.dumps(_final_chunk(model, "", time.perf_counter() - start), ensure_ascii=False) + "\n"
+            finally:
+                await slot.__aexit__(None, None, None)
+
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    return app
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _final_chunk(model: str, content: str, elapsed: float) -> dict:
+    return {
+        "model": model,
+        "created_at": _now(),
+        "message": {"role": "assistant", "content": content},
+        "done": True,
+        "done_reason": "stop",
+        "total_duration": int(elapsed * 1e9),
+        "eval_count": len(content.split()) or 1,
+        "eval_duration": int(elapsed * 1e9),
+    }
+
+
+def _model_latency(value: str) -> tuple[str, float]:
+    model, _, ms = value.rpartition("=")
+    if not model:
+        raise argparse.ArgumentTypeError(f"expected MODEL=MS, got {value!r}")
+    return model, float(ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a stand-in for the Ollama chat API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency-ms", type=float, default=2000, help="mean generation time")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--model-latency", type=_model_latency, action="append", default=[],
+                        metavar="MODEL=MS", help="mean generation time of one model (repeatable)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--concurrency", type=int, default=1, help="generations running at once, like OLLAMA_NUM_PARALLEL")
+    parser.add_argument("--max-queue", type=int, default=512, help="waiting requests before answering 503, like OLLAMA_MAX_QUEUE")
+    args = parser.parse_args()
+
+    latency = Latency(args.latency_ms, args.distribution, dict(args.model_latency))
+    app = create_app(latency, args.error_rate, args.concurrency, args.max_queue)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
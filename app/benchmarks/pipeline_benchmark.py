@@ -0,0 +1,217 @@
+"""
+Diagnosis pipeline stage benchmark.
+
+Times each stage of the diagnosis pipeline in isolation: decode, face
+detection, face crop, JPEG encode, segmentation per model, scoring,
+overlay rendering and encoding, and DiagnosisDetail serialization
+(dump_diagnosis_detail, as the diagnosis endpoints serialize it).
+
+    python -m app.benchmarks.pipeline_benchmark
+    python -m app.benchmarks.pipeline_benchmark --image samples/face.jpg --output bench/pipeline.json
+    python -m app.benchmarks.pipeline_benchmark --baseline bench/pipeline.json --tolerance 0.15
+
+Without --weights, tiny randomly initialized YOLOv8n models are built
+from the ultralytics model configs, so it runs offline on CPU without
+the real weight files. Their outputs are meaningless, but the shapes and
+work per call match the real models of the same size. With --baseline,
+exits with status 1 if any stage's median is slower than the baseline
+by more than --tolerance. Needs no database or Ollama server.
+
+Timings only compare on the same hardware, so no baseline is committed.
+CI keeps one per runner type: the main branch job runs with
+--output bench/pipeline.json and caches that file, keyed by the runner
+type; pull request jobs restore the cache and run with --baseline
+bench/pipeline.json. A --baseline file that does not exist yet (first
+run, expired cache) is written with the results instead of compared.
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+from PIL import Image
+
+from app.benchmarks.harness import compare_to_baseline, measure, print_results, write_results
+
+# Model config per weight file for the random stub models; the face model is a detector
+STUB_CONFIGS = {
+    "face": "yolov8n.yaml",
+    "wrinkle": "yolov8n-seg.yaml",
+    "acne": "yolov8n-seg.yaml",
+    "atopy": "yolov8n-seg.yaml",
+}
+
+
+def write_stub_weights(weights_dir: Path) -> None:
+    """
+    Saves randomly initialized YOLOv8n models under the file names the model registry loads.
+    """
+    from ultralytics import YOLO
+
+    from app.services.model_registry import WEIGHT_FILES
+
+    weights_dir.mkdir(parents=True, exist_ok=True)
+    for name, filename in WEIGHT_FILES.items():
+        YOLO(STUB_CONFIGS[name]).save(weights_dir / filename)
+    (weights_dir / "VERSION").write_text("random-stub")
+
+
+def synthetic_photo(width: int, height: int) -> bytes:
+    """
+    A phone-sized JPEG with smooth gradients and mild noise, so it compresses and decodes like a photo.
+    """
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([
+        128 + 60 * np.sin(x / 180),
+        128 + 60 * np.cos(y / 240),
+        128 + 40 * np.sin((x + y) / 300),
+    ], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 6, base.shape), 0, 255).astype(np.uint8)
+
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def synthetic_masks(size: int, count: int = 8) -> np.ndarray:
+    """
+    YOLO-style float masks with a few elliptical blobs each.
+    """
+    rng = np.random.default_rng(1)
+    y, x = np.mgrid[0:size, 0:size]
+    masks = np.zeros((count, size, size), dtype=np.float32)
+    for index in range(count):
+        cx, cy = rng.integers(0, size, 2)
+        rx, ry = rng.integers(size // 40, size // 10, 2)
+        masks[index][((x - cx) / rx) ** 2 + ((y - cy) / ry) ** 2 <= 1] = 1.0
+    return masks
+
+
+def _detail_source(recent: int) -> SimpleNamespace:
+    scores = list(range(60, 60 + recent))
+    return SimpleNamespace(
+        id="00000000-0000-0000-0000-000000000000",
+        total_score=80,
+        original_image_url="/static/bench/original.jpg",
+        created_at=datetime(2026, 1, 1) + timedelta(hours=1),
+        wrinkle_score=80,
+        wrinkle_image_url="/static/bench/wrinkle.jpg",
+        wrinkle_description="피부에 주름의 흔적이 보입니다. 충분히 보습해 주세요." * 3,
+        acne_score=75,
+        acne_image_url="/static/bench/acne.jpg",
+        acne_description="피부에 주름의 흔적이 보입니다. 충분히 보습해 주세요." * 3,
+        atopy_score=90,
+        atopy_image_url="/static/bench/atopy.jpg",
+        atopy_description="피부에 주름의 흔적이 보입니다. 충분히 보습해 주세요." * 3,
+        recent_scores=scores,
+        recent_wrinkle_scores=scores,
+        recent_acne_scores=scores,
+        recent_atopy_scores=scores,
+    )
+
+
+def run(photo: bytes, output_dir: Path, repeat: int) -> dict[str, dict]:
+    import cv2
+
+    from app.core.config import settings
+    from app.schemas.diagnosis import dump_diagnosis_detail
+    from app.services import diagnosis_service
+
+    models = diagnosis_service.model_registry.current
+    results = {}
+
+    results["decode_full"] = measure(lambda: diagnosis_service._decode_image(io.BytesIO(photo)), repeat)
+    results["decode_reduced"] = measure(
+        lambda: diagnosis_service._decode_image(io.BytesIO(photo), min_short_side=settings.IMG_SIZE), repeat
+    )
+
+    image, _ = diagnosis_service._decode_image(io.BytesIO(photo))
+    results["face_detection"] = measure(lambda: diagnosis_service._detect_face(models, image), repeat)
+
+    # Random stub models rarely find a face; fall back to a centered box
+    face_box = diagnosis_service._detect_face(models, image)
+    if face_box is None:
+        side = min(image.size) // 3
+        left, top = (image.width - side) // 2, (image.height - side) // 2
+        face_box = (left, top, left + side, top + side)
+
+    results["crop_fixed"] = measure(lambda: diagnosis_service._crop_face_fixed(image, face_box), repeat)
+    results["crop_roi"] = measure(lambda: diagnosis_service._crop_face_roi(image, face_box), repeat)
+
+    crop = diagnosis_service._crop_face_fixed(image, face_box)
+    results["crop_jpeg_encode"] = measure(lambda: crop.save(io.BytesIO(), format="JPEG", quality=95), repeat)
+
+    crop_path = output_dir / "crop.jpg"
+    crop.save(crop_path, format="JPEG", quality=95)
+    for name in models.segmentation:
+        results[f"segmentation_{name}"] = measure(
+            lambda: diagnosis_service._run_yolo_segmentation(str(crop_path), str(output_dir), models, name),
+            repeat
+        )
+
+    crop_bgr = np.ascontiguousarray(np.asarray(crop)[:, :, ::-1])
+    masks = synthetic_masks(settings.IMG_SIZE)
+    results["calculate_score"] = measure(lambda: diagnosis_service.calculate_score(masks), repeat)
+    results["overlay_render"] = measure(lambda: diagnosis_service.render_overlay(crop_bgr, masks), repeat)
+
+    overlay = diagnosis_service.render_overlay(crop_bgr, masks)
+    results["overlay_jpeg_encode"] = measure(lambda: cv2.imencode(".jpg", overlay), repeat)
+
+    source = _detail_source(recent=20)
+    results["detail_serialization"] = measure(lambda: dump_diagnosis_detail(source), repeat * 100)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the diagnosis pipeline.")
+    parser.add_argument("--weights", help="directory with the real weight files (default: random stub models)")
+    parser.add_argument("--image", help="sample photo (default: a synthetic photo of --width x --height)")
+    parser.add_argument("--width", type=int, default=3024)
+    parser.add_argument("--height", type=int, default=4032)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown against the baseline, as a fraction")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="pipeline-benchmark-") as work_dir:
+        work_dir = Path(work_dir)
+        weights_dir = Path(args.weights) if args.weights else work_dir / "weights"
+
+        # Settings are read when app modules are first imported
+        os.environ["MODEL_WEIGHTS_DIR"] = str(weights_dir)
+        os.environ["MODEL_RELOAD_POLL_SECONDS"] = "0"
+        os.environ["TRACE_EXPORTER"] = "none"
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        if not args.weights:
+            print("Building random stub models...")
+            write_stub_weights(weights_dir)
+
+        photo = Path(args.image).read_bytes() if args.image else synthetic_photo(args.width, args.height)
+        results = run(photo, work_dir, args.repeat)
+
+    print_results("Diagnosis pipeline stages", results)
+    if args.output:
+        write_results(args.output, "pipeline_benchmark", results, vars(args) | {"stub_models": not args.weights})
+
+    if args.baseline and not Path(args.baseline).exists():
+        write_results(args.baseline, "pipeline_benchmark", results, vars(args) | {"stub_models": not args.weights})
+        print(f"\nNo baseline at {args.baseline}; wrote this run there.")
+    elif args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print(f"\nSlower than {args.baseline} by more than {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo stage slower than {args.baseline} by more than {args.tolerance:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Diagnosis history query benchmark.
+
+Compares the full-entity queries the history endpoints used to run
+against the projected queries in app.crud.crud_diagonsis, for the heavy
+user of app.benchmarks.synthetic_data.
+
+    python -m app.benchmarks.query_benchmark --diagnoses 1000000
+    python -m app.benchmarks.query_benchmark --no-seed --output bench/queries.json
+
+The target database must be disposable: the synthetic data set is
+generated into it on the first run and reused afterwards.
+"""
+import argparse
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.benchmarks.harness import measure, print_results, write_results
+from app.benchmarks.synthetic_data import find_heavy_user, find_or_generate
+from app.core.config import settings
+from app.crud import crud_diagonsis
+from app.db.migrations import upgrade_database
+from app.models.diagnosis import Diagnosis
+
+def _legacy_range(db: Session, user_id: str, start_date: date, end_date: date) -> list[Diagnosis]:
+    # Full-entity query the history endpoints used before column projection
+    return db.query(Diagnosis).filter(
+        Diagnosis.user_id == user_id,
+        Diagnosis.created_at >= datetime.combine(start_date, datetime.min.time()),
+        Diagnosis.created_at <= datetime.combine(end_date, datetime.max.time())
+    ).order_by(Diagnosis.created_at.desc()).all()
+
+
+def _legacy_recent(db: Session, user_id: str, limit: int = 3) -> list[Diagnosis]:
+    return db.query(Diagnosis).filter(
+        Diagnosis.user_id == user_id
+    ).order_by(Diagnosis.created_at.desc()).limit(limit).all()
+
+
+def run(db: Session, user_id: str, repeat: int) -> dict[str, dict]:
+    today = date.today()
+    year_ago = today - timedelta(days=365)
+    week_ago = today - timedelta(days=7)
+    month_ago = today - timedelta(days=30)
+    history = db.execute(select(func.count()).where(Diagnosis.user_id == user_id)).scalar()
+    middle_id = db.execute(
+        select(Diagnosis.id).where(Diagnosis.user_id == user_id).order_by(Diagnosis.created_at).offset(history // 2).limit(1)
+    ).scalar()
+
+    def timed(fn):
+        def call():
+            fn()
+            # Drop loaded objects so every run pays for hydration
+            db.expunge_all()
+        return measure(call, repeat=repeat)
+
+    cases = {
+        "results_year_full_entities": lambda: _legacy_range(db, user_id, year_ago, today),
+        "results_year_projected": lambda: crud_diagonsis.get_diagnoses_by_user(db, user_id, year_ago, today),
+        "week_full_entities": lambda: _legacy_range(db, user_id, week_ago, today),
+        "week_scores_only": lambda: crud_diagonsis.get_diagnosis_scores_by_user(db, user_id, week_ago, today),
+        "month_full_entities": lambda: _legacy_range(db, user_id, month_ago, today),
+        "month_scores_only": lambda: crud_diagonsis.get_diagnosis_scores_by_user(db, user_id, month_ago, today),
+        "recent_3_full_entities": lambda: _legacy_recent(db, user_id),
+        "recent_3_scores_only": lambda: crud_diagonsis.get_recent_diagnoses_by_user(db, user_id),
+        "recent_3_from_id_scores_only": lambda: crud_diagonsis.get_recent_diagnoses_from_id_by_user(db, user_id, middle_id),
+        "trend_year_daily_buckets": lambda: crud_diagonsis.get_diagnosis_trend_by_user(db, user_id, year_ago, today, "day"),
+        "trend_year_weekly_buckets": lambda: crud_diagonsis.get_diagnosis_trend_by_user(db, user_id, year_ago, today, "week"),
+        "dashboard_two_offset_queries": lambda: (
+            crud_diagonsis.get_recent_diagnosis_by_user(db, user_id, kth=1),
+            crud_diagonsis.get_recent_diagnosis_by_user(db, user_id, kth=2),
+        ),
+        "dashboard_summary_lookup": lambda: crud_diagonsis.get_diagnosis_summary(db, user_id),
+    }
+    return {name: timed(fn) for name, fn in cases.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark diagnosis history queries.")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--diagnoses", type=int, default=1_000_000)
+    parser.add_argument("--no-seed", action="store_true", help="reuse data from app.benchmarks.synthetic_data")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    upgrade_database(args.database_url)
+    engine = create_engine(args.database_url)
+    BenchSession = sessionmaker(bind=engine, autoflush=False)
+
+    with BenchSession() as db:
+        if args.no_seed and find_heavy_user(db) is None:
+            parser.error("no synthetic data found, run without --no-seed first")
+        user_id = find_or_generate(db, args.users, args.diagnoses, reviews=0)
+
+        results = run(db, user_id, args.repeat)
+
+    print_results("Diagnosis history queries (heavy user)", results)
+    if args.output:
+        write_results(args.output, "query_benchmark", results, vars(args) | {"database_url": engine.url.render_as_string(hide_password=True)})
+
+
+if __name__ == "__main__":
+    main()
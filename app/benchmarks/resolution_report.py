@@ -0,0 +1,109 @@
+"""
+Offline accuracy report for the inference resolution tiers.
+
+Runs every segmentation model at each tier in INFERENCE_RESOLUTION_TIERS
+on a folder of sample face photos, and compares scores and masks against
+the model's highest tier. Use it to check that a lower tier is acceptable
+before the controller is allowed to step down to it.
+
+    python -m app.benchmarks.resolution_report --images samples/
+    python -m app.benchmarks.resolution_report --images samples/ --output bench/resolution.json
+
+Loads the AI models from MODEL_WEIGHTS_DIR; no database is needed.
+"""
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.benchmarks.harness import print_results, write_results
+from app.core.config import settings
+from app.services import diagnosis_service
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def _segment(model, image: np.ndarray, size: int) -> tuple[np.ndarray, int, float]:
+    # Masks at image size, so tiers can be compared pixel by pixel
+    start = time.perf_counter()
+    result = model.predict(
+        source=image, conf=0.25, imgsz=size, device=settings.AI_DEVICE, retina_masks=True, verbose=False
+    )[0]
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if result.masks is None:
+        return np.zeros(image.shape[:2], dtype=bool), 100, elapsed_ms
+    masks = result.masks.data.cpu().numpy()
+    return np.any(masks, axis=0), diagnosis_service.calculate_score(masks), elapsed_ms
+
+
+def _iou(a: np.ndarray, b: np.ndarray) -> float:
+    union = np.logical_or(a, b).sum()
+    if union == 0:
+        return 1.0
+    return float(np.logical_and(a, b).sum() / union)
+
+
+def run(image_paths: list[Path]) -> dict[str, dict]:
+    models = diagnosis_service.model_registry.current
+    samples: dict[str, dict[str, list]] = {}
+
+    for path in image_paths:
+        with open(path, "rb") as source:
+            image, _ = diagnosis_service._decode_image(source)
+        face_box = diagnosis_service._detect_face(models, image)
+        if face_box is None:
+            print(f"  skipped {path.name}: no face found")
+            continue
+
+        # Same crop the pipeline uses at full resolution; ultralytics expects BGR arrays
+        crop = diagnosis_service._crop_face_fixed(image, face_box)
+        array = np.ascontiguousarray(np.asarray(crop)[:, :, ::-1])
+
+        for name, model in models.segmentation.items():
+            tiers = settings.INFERENCE_RESOLUTION_TIERS.get(name) or [settings.IMG_SIZE]
+            reference_mask, reference_score = None, None
+            for size in tiers:
+                mask, score, elapsed_ms = _segment(model, array, size)
+                if reference_mask is None:
+                    reference_mask, reference_score = mask, score
+
+                sample = samples.setdefault(f"{name}@{size}", {"ms": [], "score_diff": [], "iou": []})
+                sample["ms"].append(elapsed_ms)
+                sample["score_diff"].append(abs(score - reference_score))
+                sample["iou"].append(_iou(mask, reference_mask))
+
+    results = {}
+    for key, sample in samples.items():
+        timings = sorted(sample["ms"])
+        results[key] = {
+            "runs": len(timings),
+            "median_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+            "score_mae": round(statistics.mean(sample["score_diff"]), 2),
+            "score_max_diff": max(sample["score_diff"]),
+            "mask_iou": round(statistics.mean(sample["iou"]), 3),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare segmentation resolution tiers on sample images.")
+    parser.add_argument("--images", required=True, help="directory of sample face photos")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    image_paths = sorted(p for p in Path(args.images).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not image_paths:
+        parser.error(f"no images found in {args.images}")
+
+    results = run(image_paths)
+    print_results(f"Resolution tiers vs highest tier ({len(image_paths)} images)", results)
+    if args.output:
+        write_results(args.output, "resolution_report", results, vars(args) | {"tiers": settings.INFERENCE_RESOLUTION_TIERS})
+
+
+if __name__ == "__main__":
+    main()
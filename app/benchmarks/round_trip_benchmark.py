@@ -0,0 +1,117 @@
+"""
+Database round trips per diagnosis endpoint, before and after the
+single-statement rewrite.
+
+Counts the statements and commits each endpoint's data access sends to
+the database and measures its latency. --rtt-ms adds a fixed delay to
+every round trip to model a remote MySQL server.
+
+    python -m app.benchmarks.round_trip_benchmark
+    python -m app.benchmarks.round_trip_benchmark --rtt-ms 2 --output bench/round_trips.json
+
+Uses the heavy user of app.benchmarks.synthetic_data and generates a
+small data set if there is none. POST cases insert rows.
+"""
+import argparse
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.benchmarks.harness import measure, print_results, write_results
+from app.benchmarks.synthetic_data import NEW_DIAGNOSIS, find_or_generate
+from app.core.config import settings
+from app.crud import crud_diagonsis
+from app.db.migrations import upgrade_database
+from app.models.diagnosis import Diagnosis
+
+
+class RoundTripCounter:
+    """
+    Counts statements and commits sent through an engine, optionally adding latency to each.
+    """
+
+    def __init__(self, engine, rtt_ms: float = 0.0):
+        self.count = 0
+        self.rtt = rtt_ms / 1000
+        event.listen(engine, "before_cursor_execute", self._round_trip)
+        event.listen(engine, "commit", self._round_trip)
+
+    def _round_trip(self, *args, **kwargs):
+        self.count += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+
+
+def _legacy_create(db: Session, user_id: str) -> list:
+    # add/commit/refresh, then the ordered query for the recent scores
+    db_obj = Diagnosis(user_id=user_id, created_at=datetime.now(), **NEW_DIAGNOSIS)
+    db.add(db_obj)
+    db.commit()
+    db.refresh(db_obj)
+    return crud_diagonsis.get_recent_diagnoses_by_user(db, user_id)
+
+
+def run(db: Session, counter: RoundTripCounter, user_id: str, repeat: int) -> dict[str, dict]:
+    diagnosis_id = db.execute(
+        select(Diagnosis.id).where(Diagnosis.user_id == user_id).order_by(Diagnosis.created_at.desc()).offset(10).limit(1)
+    ).scalar()
+    # Make sure the summary row exists so /recent is measured in steady state
+    crud_diagonsis.get_diagnosis_summary(db, user_id)
+
+    cases = {
+        "detail_before": lambda: (
+            crud_diagonsis.get_diagnosis_by_id(db, diagnosis_id),
+            crud_diagonsis.get_recent_diagnoses_from_id_by_user(db, user_id, diagnosis_id),
+        ),
+        "detail_after": lambda: crud_diagonsis.get_diagnosis_with_recent_scores(db, diagnosis_id),
+        "recent_before": lambda: (
+            crud_diagonsis.get_recent_diagnosis_by_user(db, user_id, kth=1),
+            crud_diagonsis.get_recent_diagnosis_by_user(db, user_id, kth=2),
+        ),
+        "recent_after": lambda: crud_diagonsis.get_diagnosis_summary(db, user_id),
+        "create_before": lambda: _legacy_create(db, user_id),
+        "create_after": lambda: crud_diagonsis.create_diagnosis(db, user_id=user_id, created_at=datetime.now(), **NEW_DIAGNOSIS),
+    }
+
+    results = {}
+    for name, fn in cases.items():
+        def call():
+            fn()
+            # Keep every run cold with respect to the identity map
+            db.expunge_all()
+
+        start_count = counter.count
+        call()
+        round_trips = counter.count - start_count
+
+        results[name] = measure(call, repeat=repeat) | {"round_trips": round_trips}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count database round trips per diagnosis endpoint.")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="simulated network round-trip time")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    upgrade_database(args.database_url)
+    engine = create_engine(args.database_url)
+    BenchSession = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+    with BenchSession() as db:
+        user_id = find_or_generate(db, users=100, diagnoses=10_000, reviews=0)
+
+        counter = RoundTripCounter(engine, args.rtt_ms)
+        results = run(db, counter, user_id, args.repeat)
+
+    print_results(f"Diagnosis endpoints (simulated RTT {args.rtt_ms} ms)", results)
+    if args.output:
+        write_results(args.output, "round_trip_benchmark", results, vars(args) | {"database_url": engine.url.render_as_string(hide_password=True)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Diagnosis response serialization benchmark.
+
+Compares FastAPI's default response path (validate the returned value
+against the response_model, dump it to Python, then json.dumps) with the
+TypeAdapter fast path in app.schemas.diagnosis, on a 365-item /results page
+and a DiagnosisDetail. Also times gzip and brotli on the list body and
+reports the compressed sizes.
+
+    python -m app.benchmarks.serialization_benchmark
+    python -m app.benchmarks.serialization_benchmark --items 365 --output bench/serialization.json
+
+Brotli cases run only when the brotli package is installed. Needs no database.
+"""
+import argparse
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.benchmarks.harness import measure, print_results, write_results
+from app.core import responses
+from app.schemas.diagnosis import DiagnosisDetail, DiagnosisList, dump_diagnosis_detail, dump_diagnosis_list
+
+# Same fields as the rows of crud_diagonsis.get_diagnoses_by_user (LIST_COLUMNS)
+ListRow = namedtuple("ListRow", [
+    "id", "created_at", "total_score", "wrinkle_score", "acne_score", "atopy_score",
+    "original_image_url", "wrinkle_image_url", "acne_image_url", "atopy_image_url",
+])
+DESCRIPTION = "피부에 주름의 흔적이 보입니다. 사전에 피부를 충분히 보습해 주고, 관리하는 것이 좋습니다. " * 3
+
+
+def list_rows(count: int) -> list[ListRow]:
+    newest = datetime(2026, 1, 1, 21, 30)
+    rows = []
+    for index in range(count):
+        image_dir = f"https://storage.example.com/static/3f2b6c1e-0000-4000-8000-000000000000/{index:032x}"
+        rows.append(ListRow(
+            id=f"{index:08x}-0000-4000-8000-000000000000",
+            created_at=newest - timedelta(days=index, minutes=index % 60),
+            total_score=60 + index % 40,
+            wrinkle_score=55 + index % 45,
+            acne_score=None if index % 7 == 0 else 70 + index % 30,
+            atopy_score=80 - index % 20,
+            original_image_url=f"{image_dir}/original.jpg",
+            wrinkle_image_url=f"{image_dir}/wrinkle.jpg",
+            acne_image_url=f"{image_dir}/acne.jpg",
+            atopy_image_url=f"{image_dir}/atopy.jpg",
+        ))
+    return rows
+
+
+def detail_source() -> SimpleNamespace:
+    row = list_rows(1)[0]
+    return SimpleNamespace(
+        **row._asdict(),
+        wrinkle_description=DESCRIPTION,
+        acne_description=DESCRIPTION,
+        atopy_description=DESCRIPTION,
+        recent_scores=[80, 75, 72],
+        recent_wrinkle_scores=[70, 68, 66],
+        recent_acne_scores=[90, 88, 85],
+        recent_atopy_scores=[81, 80, 79],
+    )
+
+
+def fastapi_default(adapter: TypeAdapter, value) -> bytes:
+    # What FastAPI does with a returned value: validate against response_model, dump in JSON mode, json.dumps
+    validated = adapter.validate_python(value, from_attributes=True)
+    return JSONResponse(adapter.dump_python(validated, mode="json", by_alias=True)).body
+
+
+def run(items: int, repeat: int) -> dict[str, dict]:
+    rows = list_rows(items)
+    payload = {"items": rows, "next_cursor": "bmV4dA", "total_count": None}
+    list_adapter = TypeAdapter(DiagnosisList)
+
+    source = detail_source()
+    recent_scores = {key: getattr(source, key) for key in (
+        "recent_scores", "recent_wrinkle_scores", "recent_acne_scores", "recent_atopy_scores"
+    )}
+    detail_adapter = TypeAdapter(DiagnosisDetail)
+
+    body = dump_diagnosis_list(rows, "bmV4dA", None)
+    if json.loads(body) != json.loads(fastapi_default(list_adapter, payload)):
+        raise SystemExit("dump_diagnosis_list output differs from DiagnosisList")
+    detail_body = dump_diagnosis_detail(source, recent_scores)
+    if json.loads(detail_body) != json.loads(fastapi_default(detail_adapter, DiagnosisDetail.model_validate(source))):
+        raise SystemExit("dump_diagnosis_detail output differs from DiagnosisDetail")
+
+    results = {
+        f"results_{items}_fastapi_default": measure(lambda: fastapi_default(list_adapter, payload), repeat),
+        f"results_{items}_model_dump_json": measure(
+            lambda: DiagnosisList.model_validate(payload).model_dump_json(by_alias=True), repeat
+        ),
+        f"results_{items}_type_adapter": measure(lambda: dump_diagnosis_list(rows, "bmV4dA", None), repeat),
+        "detail_fastapi_default": measure(
+            lambda: fastapi_default(detail_adapter, DiagnosisDetail.model_validate(source).model_copy(update=recent_scores)),
+            repeat * 10
+        ),
+        "detail_type_adapter": measure(lambda: dump_diagnosis_detail(source, recent_scores), repeat * 10),
+    }
+    results[f"results_{items}_type_adapter"]["bytes"] = len(body)
+
+    encodings = ["gzip"] + (["br"] if responses.brotli is not None else [])
+    for encoding in encodings:
+        results[f"results_{items}_{encoding}"] = measure(lambda: responses.compress(body, encoding), repeat) | {
+            "bytes": len(responses.compress(body, encoding))
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark diagnosis response serialization.")
+    parser.add_argument("--items", type=int, default=365, help="items in the /results page")
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = run(args.items, args.repeat)
+    print_results("Diagnosis response serialization", results)
+    if args.output:
+        write_results(args.output, "serialization_benchmark", results, vars(args))
+
+
+if __name__ == "__main__":
+    main()
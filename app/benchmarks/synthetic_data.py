@@ -0,0 +1,280 @@
+"""
+Synthetic users, diagnoses and reviews at production table sizes.
+
+Generates data shaped like real usage and bulk-inserts it with multi-row
+INSERTs, bypassing the ORM unit of work:
+
+- Sign-ups grow linearly over the --days window, so recent accounts are more common.
+- Diagnoses per user are heavy-tailed (Pareto): most users scan a few times and a few scan daily.
+- Each user's scans cluster after sign-up and thin out later, at morning and evening peak hours.
+- Reviews come from a fraction of users, after one of their scans, and skew towards 4-5 stars.
+- One heavy user scans every day of the window, a stable target for benchmarks.
+
+Summary rows (diagnosis_summaries) are written to match, as the app would have built them.
+
+    python -m app.benchmarks.synthetic_data --users 100000 --diagnoses 5000000 --reviews 200000
+
+Every user's password is SYNTHETIC_PASSWORD. The target database must be
+disposable and is seeded only once; the query, round trip and CRUD benchmarks
+in app.benchmarks reuse the data.
+"""
+import argparse
+import math
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.db.migrations import upgrade_database
+from app.models.diagnosis import Diagnosis
+from app.models.diagnosis_summary import DiagnosisSummary, RECENT_SCORES_SIZE
+from app.models.review import Review
+from app.models.user import User
+from app.services.user_service import get_password_hash
+
+HEAVY_USER_EMAIL = "synthetic-heavy@example.com"
+SYNTHETIC_PASSWORD = "synthetic1234"
+BATCH_SIZE = 5000
+
+DESCRIPTIONS = [
+    "피부에 주름의 흔적이 보입니다. 사전에 피부를 충분히 보습해 주고, 관리하는 것이 좋습니다. " * 3,
+    "여드름이 약간 보입니다. 자극이 적은 클렌저로 세안하고 유분이 적은 보습제를 사용하세요. " * 2,
+    "피부 상태가 양호합니다. 지금처럼 자외선 차단제를 꾸준히 사용해 주세요. " * 4,
+]
+COMMENTS = [None, "좋아요", "진단이 정확해요. 매일 사용하고 있습니다.", "결과가 너무 늦게 나와요", "피부 관리에 도움이 됩니다!"]
+RATING_WEIGHTS = [0.05, 0.05, 0.15, 0.35, 0.40]
+# Share of scans per hour of day: peaks before work and before bed
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 8, 9, 6, 4, 4, 5, 4, 3, 3, 4, 5, 6, 8, 10, 11, 9, 4]
+
+# Values of the diagnoses benchmarks write through the crud functions (plus user_id)
+NEW_DIAGNOSIS = {
+    "original_image_url": "/static/bench/original.jpg",
+    "total_score": 80,
+    "wrinkle_score": 80,
+    "wrinkle_image_url": "/static/bench/wrinkle.jpg",
+    "wrinkle_description": "benchmark",
+    "acne_score": 80,
+    "acne_image_url": "/static/bench/acne.jpg",
+    "acne_description": "benchmark",
+    "atopy_score": 80,
+    "atopy_image_url": "/static/bench/atopy.jpg",
+    "atopy_description": "benchmark",
+}
+
+
+class SyntheticData:
+    """
+    Counts of the rows generate() inserted and the id of the heavy user.
+    """
+
+    def __init__(self, heavy_user_id: str):
+        self.heavy_user_id = heavy_user_id
+        self.users = 0
+        self.diagnoses = 0
+        self.reviews = 0
+
+
+class _BatchInserter:
+    """
+    Buffers rows per model and sends each full buffer as one multi-row INSERT, committing per batch.
+    """
+
+    def __init__(self, db: Session, batch_size: int = BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+        self.rows: dict[type, list[dict]] = {}
+
+    def add(self, model: type, row: dict) -> None:
+        rows = self.rows.setdefault(model, [])
+        rows.append(row)
+        if len(rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        # Parents first: users before the rows that reference them
+        for model in (User, Diagnosis, DiagnosisSummary, Review):
+            if self.rows.get(model):
+                self.db.execute(insert(model), self.rows[model])
+                self.rows[model] = []
+        self.db.commit()
+
+
+def _diagnosis_row(rng: random.Random, user_id: str, created_at: datetime) -> dict:
+    scores = [min(100, max(0, int(rng.gauss(75, 12)))) for _ in range(3)]
+    image_dir = f"/static/{user_id}/{uuid.uuid4().hex}"
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "created_at": created_at,
+        "total_score": sum(scores) // 3,
+        "original_image_url": f"{image_dir}/original.jpg",
+        "model_version": "synthetic",
+        "wrinkle_score": scores[0],
+        "wrinkle_image_url": f"{image_dir}/wrinkle.jpg",
+        "wrinkle_description": rng.choice(DESCRIPTIONS),
+        "acne_score": scores[1],
+        "acne_image_url": f"{image_dir}/acne.jpg",
+        "acne_description": rng.choice(DESCRIPTIONS),
+        "atopy_score": scores[2],
+        "atopy_image_url": f"{image_dir}/atopy.jpg",
+        "atopy_description": rng.choice(DESCRIPTIONS),
+    }
+
+
+def _summary_row(user_id: str, rows: list[dict]) -> dict:
+    recent = sorted(rows, key=lambda row: row["created_at"], reverse=True)[:RECENT_SCORES_SIZE]
+    return {
+        "user_id": user_id,
+        "latest_diagnosis_id": recent[0]["id"],
+        "latest_created_at": recent[0]["created_at"],
+        "latest_total_score": recent[0]["total_score"],
+        "previous_diagnosis_id": recent[1]["id"] if len(recent) > 1 else None,
+        "previous_total_score": recent[1]["total_score"] if len(recent) > 1 else None,
+        "recent_total_scores": [row["total_score"] for row in recent],
+        "recent_wrinkle_scores": [row["wrinkle_score"] for row in recent],
+        "recent_acne_scores": [row["acne_score"] for row in recent],
+        "recent_atopy_scores": [row["atopy_score"] for row in recent],
+    }
+
+
+def _scan_time(rng: random.Random, signup: datetime, now: datetime) -> datetime:
+    # Engagement fades after sign-up: offsets are skewed towards the start of the account's life
+    active_days = max(0, (now - signup).days)
+    day = signup.date() + timedelta(days=int(active_days * rng.betavariate(1, 2)))
+    hour = rng.choices(range(24), HOUR_WEIGHTS)[0]
+    created_at = datetime.combine(day, datetime.min.time()) + timedelta(hours=hour, seconds=rng.randrange(3600))
+    return min(created_at, now)
+
+
+def _diagnosis_counts(rng: random.Random, users: int, diagnoses: int, days: int) -> list[int]:
+    weights = [rng.paretovariate(1.5) for _ in range(users)]
+    scale = diagnoses / sum(weights)
+    # Nobody scans more than twice a day on average
+    counts = [min(int(weight * scale), 2 * days) for weight in weights]
+    # Hand out what rounding down lost, one scan each to random users
+    for index in rng.sample(range(users), min(users, diagnoses - sum(counts))):
+        counts[index] += 1
+    return counts
+
+
+def generate(
+    db: Session,
+    users: int,
+    diagnoses: int,
+    reviews: int,
+    days: int = 3 * 365,
+    seed: int = 0,
+    progress: bool = False
+) -> SyntheticData:
+    """
+    Inserts `users` users (including the heavy user), about `diagnoses` diagnoses and about `reviews`
+    reviews spread over the last `days` days. The same seed generates the same scores and times.
+    """
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    start = now - timedelta(days=days)
+    hashed_password = get_password_hash(SYNTHETIC_PASSWORD)
+    inserter = _BatchInserter(db)
+
+    heavy_user_id = str(uuid.uuid4())
+    data = SyntheticData(heavy_user_id)
+    heavy_rows = [
+        _diagnosis_row(rng, heavy_user_id, start + timedelta(days=day, hours=rng.choices(range(24), HOUR_WEIGHTS)[0]))
+        for day in range(days)
+    ]
+
+    other_users = max(0, users - 1)
+    counts = _diagnosis_counts(rng, other_users, max(0, diagnoses - len(heavy_rows)), days) if other_users else []
+    reviews_per_user = reviews / max(1, users)
+    started = time.perf_counter()
+
+    for index in range(-1, other_users):
+        if index < 0:
+            user_id, email, username, signup, rows = heavy_user_id, HEAVY_USER_EMAIL, "synthetic_heavy", start, heavy_rows
+        else:
+            user_id = str(uuid.uuid4())
+            email, username = f"synthetic-{index}@example.com", f"synthetic_{index}"
+            # Linear growth in sign-ups: the density of sign-up times rises towards now
+            signup = start + timedelta(seconds=int(days * 86400 * math.sqrt(rng.random())))
+            rows = [_diagnosis_row(rng, user_id, _scan_time(rng, signup, now)) for _ in range(counts[index])]
+
+        inserter.add(User, {"id": user_id, "email": email, "username": username, "hashed_password": hashed_password})
+        for row in rows:
+            inserter.add(Diagnosis, row)
+        if rows:
+            inserter.add(DiagnosisSummary, _summary_row(user_id, rows))
+
+            # Reviews come from a third of the users who scanned, so reviewers write three times the average
+            if rng.random() < 1 / 3:
+                for _ in range(round(rng.expovariate(1 / (3 * reviews_per_user))) if reviews_per_user else 0):
+                    after = rng.choice(rows)["created_at"]
+                    inserter.add(Review, {
+                        "id": str(uuid.uuid4()),
+                        "user_id": user_id,
+                        "created_at": min(now, after + timedelta(minutes=rng.randint(1, 60 * 24 * 7))),
+                        "rating": rng.choices(range(1, 6), RATING_WEIGHTS)[0],
+                        "comment": rng.choice(COMMENTS),
+                    })
+                    data.reviews += 1
+
+        data.users += 1
+        data.diagnoses += len(rows)
+        if progress and data.users % 10_000 == 0:
+            elapsed = time.perf_counter() - started
+            print(f"  {data.users} users, {data.diagnoses} diagnoses, {data.reviews} reviews ({elapsed:.0f} s)")
+
+    inserter.flush()
+    return data
+
+
+def find_heavy_user(db: Session) -> str | None:
+    return db.execute(select(User.id).where(User.email == HEAVY_USER_EMAIL)).scalar()
+
+
+def find_or_generate(db: Session, users: int, diagnoses: int, reviews: int) -> str:
+    """
+    Returns the heavy user's id, generating the data set first if the database has none.
+    """
+    heavy_user_id = find_heavy_user(db)
+    if heavy_user_id is None:
+        print(f"Generating {users} users, {diagnoses} diagnoses and {reviews} reviews...")
+        heavy_user_id = generate(db, users, diagnoses, reviews, progress=True).heavy_user_id
+    return heavy_user_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-insert synthetic users, diagnoses and reviews.")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--diagnoses", type=int, default=1_000_000)
+    parser.add_argument("--reviews", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=3 * 365, help="history window")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    upgrade_database(args.database_url)
+    engine = create_engine(args.database_url)
+    BenchSession = sessionmaker(bind=engine, autoflush=False)
+
+    with BenchSession() as db:
+        if find_heavy_user(db) is not None:
+            parser.error("synthetic data already exists in this database")
+
+        print(f"Generating {args.users} users, {args.diagnoses} diagnoses and {args.reviews} reviews...")
+        started = time.perf_counter()
+        data = generate(db, args.users, args.diagnoses, args.reviews, args.days, args.seed, progress=True)
+
+    elapsed = time.perf_counter() - started
+    rows = data.users + data.diagnoses + data.reviews
+    print(
+        f"Inserted {data.users} users, {data.diagnoses} diagnoses and {data.reviews} reviews "
+        f"in {elapsed:.0f} s ({rows / elapsed:.0f} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import hashlib
+import json
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from app.core.config import settings
+
+
+class CacheBackend:
+    """
+    Interface shared by the in-process cache and shared cache backends.
+    A MemoryCache can stand in for a shared backend in tests and local runs.
+    """
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """
+    Thread-safe in-process cache with LRU eviction and per-entry expiry.
+    With `maxbytes`, entries are also evicted once their total size exceeds it;
+    bytes and str values count their length, other values sys.getsizeof.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, maxbytes: int | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self._entries: OrderedDict[str, tuple[float, Any, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        size = len(key) + (len(value) if isinstance(value, (bytes, str)) else sys.getsizeof(value))
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (expires_at, value, size)
+            self._bytes += size
+            while len(self._entries) > self.maxsize or (self.maxbytes is not None and self._bytes > self.maxbytes):
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache shared between processes and hosts, stored in Redis under a namespace prefix.
+    Values must be JSON serializable or bytes.
+    """
+
+    def __init__(self, url: str, namespace: str, ttl: float = 60.0):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package to be installed")
+
+        self._client = redis.Redis.from_url(url)
+        self.prefix = f"{namespace}:"
+        self.ttl = ttl
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raw = self._client.get(self.prefix + key)
+        if raw is None:
+            return default
+        # Values are tagged so bytes do not need to go through JSON
+        if raw[:2] == b"b:":
+            return raw[2:]
+        return json.loads(raw[2:])
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        if isinstance(value, bytes):
+            raw = b"b:" + value
+        else:
+            raw = b"j:" + json.dumps(value).encode()
+        self._client.set(self.prefix + key, raw, px=int((self.ttl if ttl is None else ttl) * 1000))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self.prefix + key)
+
+    def delete_prefix(self, prefix: str) -> None:
+        keys = list(self._client.scan_iter(match=f"{self.prefix}{prefix}*", count=500))
+        if keys:
+            self._client.delete(*keys)
+
+    def clear(self) -> None:
+        self.delete_prefix("")
+
+
+class TieredCache(CacheBackend):
+    """
+    Bounded in-process cache in front of an optional shared backend.
+    Local entries live for at most `local_ttl` seconds, which bounds how long an
+    invalidation made by another process can go unnoticed.
+    """
+
+    def __init__(self, local: MemoryCache, shared: CacheBackend | None = None, local_ttl: float | None = None):
+        self.local = local
+        self.shared = shared
+        self.local_ttl = local_ttl
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return default if value is None else value
+
+        value = self.shared.get(key)
+        if value is None:
+            return default
+        self.local.set(key, value, ttl=self.local_ttl)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        if self.shared is not None:
+            self.shared.set(key, value, ttl=ttl)
+            ttl = self.local_ttl if ttl is None or self.local_ttl is None else min(ttl, self.local_ttl)
+        self.local.set(key, value, ttl=ttl)
+
+    def delete(self, key: str) -> None:
+        if self.shared is not None:
+            self.shared.delete(key)
+        self.local.delete(key)
+
+    def delete_prefix(self, prefix: str) -> None:
+        if self.shared is not None:
+            self.shared.delete_prefix(prefix)
+        self.local.delete_prefix(prefix)
+
+    def clear(self) -> None:
+        if self.shared is not None:
+            self.shared.clear()
+        self.local.clear()
+
+
+def get_cache(namespace: str, maxsize: int, ttl: float, maxbytes: int | None = None) -> TieredCache:
+    """
+    Creates a cache for one namespace using the backend selected by settings.CACHE_BACKEND.
+    """
+    shared = None
+    if settings.CACHE_BACKEND == "redis":
+        shared = RedisCache(settings.CACHE_URL, namespace, ttl=ttl)
+    elif settings.CACHE_BACKEND != "memory":
+        raise ValueError(f"Unknown cache backend: {settings.CACHE_BACKEND}")
+
+    return TieredCache(
+        local=MemoryCache(maxsize=maxsize, ttl=ttl, maxbytes=maxbytes),
+        shared=shared,
+        local_ttl=settings.CACHE_LOCAL_TTL_SECONDS
+    )
+
+
+class ResponseCache:
+    """
+    Serialized responses per user, endpoint and query parameters.
+    Every key contains the user's current generation, so invalidate_user() drops all of a user's
+    entries at once by starting a new generation. Entries of old generations are never read again
+    and age out of the LRU, and a response built from data read before the invalidation is stored
+    under the old generation, so it is never served afterwards.
+    """
+
+    def __init__(self, cache: TieredCache, enabled: bool = True):
+        self.cache = cache
+        self.enabled = enabled
+        # Generations decide which entries and ETags are current, so they are read from the shared
+        # backend on every request; a local copy would hide another process's invalidation
+        self.generations = cache.shared if cache.shared is not None else cache.local
+
+    def _generation(self, user_id: str) -> str:
+        key = f"generation:{user_id}"
+        generation = self.generations.get(key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            self.generations.set(key, generation)
+        return generation
+
+    def key(self, user_id: str, endpoint: str) -> str:
+        """
+        The cache key of a response in the user's current generation. `endpoint` identifies the
+        endpoint and its parameters, including anything the response depends on, such as today's date.
+        """
+        return f"response:{user_id}:{self._generation(user_id)}:{endpoint}"
+
+    @staticmethod
+    def etag(key: str) -> str:
+        # A key only ever maps to one body, so the key identifies the representation
+        return 'W/"' + hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + '"'
+
+    def get(self, key: str) -> bytes | None:
+        return self.cache.get(key)
+
+    def set(self, key: str, body: bytes) -> None:
+        self.cache.set(key, body)
+
+    def invalidate_user(self, user_id: str) -> None:
+        self.generations.set(f"generation:{user_id}", uuid.uuid4().hex)
+
+
+def _response_cache_enabled() -> bool:
+    if settings.RESPONSE_CACHE_ENABLED is not None:
+        return settings.RESPONSE_CACHE_ENABLED
+    if settings.CACHE_BACKEND != "memory":
+        return True
+    # Per-process generations are only current when this process serves every request and saves every diagnosis
+    single_process = settings.WEB_CONCURRENCY == 1
+    saves_here = settings.DIAGNOSIS_EXECUTION == "inline" or settings.JOB_BROKER == "memory"
+    return single_process and saves_here
+
+
+# Optional total counts of paginated lists, invalidated by the crud functions that write them
+count_cache = get_cache("counts", maxsize=10_000, ttl=settings.COUNT_CACHE_TTL_SECONDS)
+
+# Users resolved from access tokens, invalidated by the crud functions that update or delete them
+user_cache = get_cache("users", maxsize=settings.AUTH_CACHE_MAXSIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+# Serialized history responses (app.core.responses), invalidated when a user's diagnoses change or the account is deleted
+response_cache = ResponseCache(
+    get_cache(
+        "responses",
+        maxsize=100_000,
+        ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+        maxbytes=settings.RESPONSE_CACHE_MAX_MB * 1024 * 1024
+    ),
+    enabled=_response_cache_enabled()
+)
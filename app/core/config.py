@@ -13,6 +13,12 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Operator access: the X-Admin-Token header for /api/v1/admin and forced profiling; disabled while empty
+    ADMIN_TOKEN: str = ""
+
+    # API processes: read by uvicorn as its --workers default and set by app.server from --workers
+    WEB_CONCURRENCY: int = 1
+
     # Static files configuration
     STATIC_DIR: ClassVar[Path] = Path("static")
     STATIC_URL_PREFIX: str = "/static"
@@ -21,8 +27,100 @@ class Settings(BaseSettings):
     DUMMY_DIR: ClassVar[Path] = Path("app/dummy")
     DUMMY_URL_PREFIX: str = "/dummy"
 
+    # Upload limits, checked before an image is decoded
+    UPLOAD_MAX_BYTES: int = 20 * 1024 * 1024  # whole request body, enforced while it is received
+    UPLOAD_MAX_PIXELS: int = 50_000_000
+
+    # Compression of diagnosis JSON responses, negotiated with Accept-Encoding
+    RESPONSE_COMPRESSION_MIN_BYTES: int = 1024  # smaller responses are sent as is; 0 disables compression
+    RESPONSE_GZIP_LEVEL: int = 6
+    RESPONSE_BROTLI_QUALITY: int = 4  # brotli is offered only when the brotli package is installed
+
+    # Cache configuration
+    CACHE_BACKEND: str = "memory"  # "memory" (per process) | "redis" (shared, requires the redis package)
+    CACHE_URL: str = "redis://localhost:6379/0"
+    CACHE_LOCAL_TTL_SECONDS: int = 5  # in-process copies of shared entries
+    COUNT_CACHE_TTL_SECONDS: int = 300
+    # Without a shared backend, other workers may use a stale user for up to this long
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAXSIZE: int = 10_000
+    # Serialized history responses per user. Unset: on with a shared backend, or with the memory backend
+    # while one API process serves requests and saves diagnoses (WEB_CONCURRENCY=1, inline or memory broker);
+    # otherwise other processes could serve a response that misses the newest diagnosis
+    RESPONSE_CACHE_ENABLED: bool | None = None
+    RESPONSE_CACHE_TTL_SECONDS: int = 60
+    RESPONSE_CACHE_MAX_MB: int = 64  # in-process entries, per worker
+
+    # Diagnosis write-behind: group concurrent inserts into one commit
+    DIAGNOSIS_WRITE_BEHIND: bool = False
+    DIAGNOSIS_WRITE_BATCH_SIZE: int = 32
+    DIAGNOSIS_WRITE_INTERVAL_MS: int = 20
+
+    # Diagnosis execution
+    # "inline": the API process runs the models | "queue": app.worker processes run them
+    DIAGNOSIS_EXECUTION: str = "inline"
+    JOB_BROKER: str = "database"  # "database" | "memory" (single process, runs an in-process worker)
+    JOB_SPOOL_DIR: ClassVar[Path] = Path("spool")  # uploads waiting for a worker, shared with the workers
+    JOB_POLL_INTERVAL_MS: int = 200
+    JOB_TIMEOUT_SECONDS: int = 300
+    # Workers renew their job's lease every third of this; a job whose worker died is claimed again once it expires
+    JOB_LEASE_SECONDS: int = 30
+    JOB_MAX_ATTEMPTS: int = 2  # claims of one job before it fails instead of being retried
+    JOB_RETENTION_HOURS: int = 24  # finished jobs are deleted after this; 0 keeps them
+
+    # Logging: written to stdout by a background thread; records are dropped while its queue is full
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: dict[str, str] = {}  # per logger, e.g. {"app.services.diagnosis_service": "DEBUG", "sqlalchemy.engine": "INFO"}
+    LOG_FORMAT: str = "json"  # "json" | "text"
+    LOG_QUEUE_SIZE: int = 10_000
+
+    # Prometheus metrics, per process. /metrics on the API requires the X-Admin-Token header; the plain
+    # scrape ports below need none, so keep them off the public network. 0 disables a port
+    METRICS_PORT: int = 0  # API; worker i of app.server listens on METRICS_PORT + i
+    WORKER_METRICS_PORT: int = 9101  # app.worker
+
+    # Request tracing: one JSON line per finished span, written by a background thread
+    TRACE_EXPORTER: str = "none"  # "file" | "stdout" | "none"
+    TRACE_SAMPLE_RATE: float = 1.0  # fraction of new traces exported; an incoming traceparent's sampled flag is followed
+    TRACE_QUEUE_SIZE: int = 10_000  # spans are dropped while the queue is full
+    TRACE_FILE: ClassVar[Path] = Path("traces") / "spans.jsonl"
+    TRACE_FILE_MAX_MB: int = 100  # rotated to spans.jsonl.1 beyond this; 0 never rotates
+    TRACE_FILE_BACKUPS: int = 3
+
+    # Sampling profiler, saving speedscope profiles (https://www.speedscope.app) of selected requests
+    # Requests with a valid X-Admin-Token header are always profiled and kept
+    PROFILING_SAMPLE_RATE: float = 0.0  # fraction of requests under PROFILING_PATH_PREFIXES to profile
+    PROFILING_PATH_PREFIXES: list[str] = ["/api/v1/diagnoses"]
+    PROFILING_SLOW_REQUEST_MS: int = 0  # when set, sampled profiles are only kept for slower requests
+    PROFILING_INTERVAL_MS: int = 5
+    PROFILING_DIR: ClassVar[Path] = Path("profiles")
+    PROFILING_MAX_FILES: int = 100  # oldest profiles are deleted beyond this
+
+    # Memory: per-diagnosis peak RSS and worker recycling
+    MEMORY_SAMPLE_INTERVAL_MS: int = 50
+    # RSS includes the model pages a prefork worker shares with the master
+    MEMORY_MAX_RSS_MB: int = 0  # recycle a worker above this RSS; 0 disables
+    MEMORY_MAX_REQUESTS: int = 0  # recycle a worker after this many requests (jobs in app.worker); 0 disables
+    MEMORY_MAX_REQUESTS_JITTER: int = 0  # up to this many extra requests per worker, so workers do not recycle together
+
     # AI configuration
     AI_DEVICE: str = "cpu"  # "cpu" | gpu index ("-1", "0", "1", ...) | "cuda"
+    # Replace the weight files (or point a symlink at a new directory) to roll out new models
+    MODEL_WEIGHTS_DIR: Path = Path(__file__).resolve().parents[1] / "services" / "weights"
+    MODEL_RELOAD_POLL_SECONDS: int = 10  # 0 disables hot reload
+    # "fixed": IMG_SIZE square around the face, padded with black | "roi": face box plus margin, inferred at its own size
+    INFERENCE_CROP_MODE: str = "fixed"
+    INFERENCE_ROI_MARGIN: float = 0.25  # of the face box width/height, on each side
+    # Segmentation input sizes per model, highest first; lower tiers are used while diagnoses queue up
+    INFERENCE_RESOLUTION_TIERS: dict[str, list[int]] = {
+        "wrinkle": [1024, 832, 640],
+        "acne": [1024, 832, 640],
+        "atopy": [1024, 832, 640],
+    }
+    INFERENCE_QUEUE_WAIT_TARGET_MS: int = 2000
+    INFERENCE_RESOLUTION_COOLDOWN_SECONDS: int = 30
+    FACE_DETECTION_MAX_SIZE: int = 640  # long side of the downscaled copy used for face detection
+    FACE_DETECTION_HAAR: bool = False  # try the OpenCV haar cascade first, YOLO only if it finds no face
     OLLAMA_HOST: str = "http://localhost:11434"
 
     # Email configuration
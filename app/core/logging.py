@@ -0,0 +1,173 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterator
+
+from app.core import metrics, tracing
+from app.core.config import settings
+
+# Per request or job: a dict shared by every thread and task the work runs in, so values bound
+# later (e.g. the user id, by the auth dependency) show up on all of its records
+_log_context: ContextVar[dict | None] = ContextVar("log_context", default=None)
+
+dropped_records = metrics.counter("log_records_dropped_total", "Log records dropped because the log queue was full.")
+
+# Attributes every LogRecord has; anything else was passed in `extra` and is written as a field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+@contextmanager
+def log_context(**values) -> Iterator[dict]:
+    """
+    Adds `values` to every record logged inside the block, on top of the enclosing context's values.
+    """
+    parent = _log_context.get()
+    token = _log_context.set({**(parent or {}), **values})
+    try:
+        yield _log_context.get()
+    finally:
+        _log_context.reset(token)
+
+
+def bind_log_context(**values) -> None:
+    """
+    Adds `values` to the current request's or job's context, including records logged after this call
+    by other threads of the same request. Does nothing outside a log_context block.
+    """
+    context = _log_context.get()
+    if context is not None:
+        context.update(values)
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread. The caller only copies the record and its context;
+    formatting and I/O happen on the writer thread. When the queue is full the record is dropped.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        # Arguments may be mutated after the call returns, so the message is rendered now
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+
+        record.context = dict(_log_context.get() or {})
+        span = tracing.current_span()
+        if span is not None:
+            record.context["trace_id"] = span.trace_id
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_records.inc()
+
+
+class BlockingStopQueueListener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Waits for room in a full queue, so stop() always ends the thread
+        self.queue.put(self._sentinel)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: time, level, logger, message, the request/job context and any `extra` fields.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+        entry.update(getattr(record, "context", None) or {})
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key != "context":
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(process)d %(levelname)s %(name)s %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        context = getattr(record, "context", None)
+        if context:
+            line += " " + " ".join(f"{key}={value}" for key, value in context.items())
+        return line
+
+
+_queue_handler: ContextQueueHandler | None = None
+_listener: QueueListener | None = None
+
+
+def _start_listener() -> None:
+    global _listener
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _queue_handler.queue = log_queue
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+    _listener = BlockingStopQueueListener(log_queue, stream_handler, respect_handler_level=False)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """
+    Writes the records still queued and stops the writer thread. Runs at exit; processes that
+    leave with os._exit must call it themselves.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging(level: str | None = None) -> None:
+    """
+    Routes all logging through a bounded queue to a writer thread that prints to stdout.
+    Levels come from LOG_LEVEL (or `level`) for the root logger and LOG_LEVELS per logger.
+    Safe to call more than once; only the first call configures anything.
+    """
+    global _queue_handler
+    if _queue_handler is not None:
+        return
+
+    _queue_handler = ContextQueueHandler(None)
+    _start_listener()
+    atexit.register(stop_logging)
+    # The writer thread does not survive fork; prefork workers start their own
+    os.register_at_fork(after_in_child=_start_listener)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel((level or settings.LOG_LEVEL).upper())
+
+    # uvicorn's loggers write to the console synchronously; send them through the queue too
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    for name, logger_level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(logger_level.upper())
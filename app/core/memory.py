@@ -0,0 +1,228 @@
+import logging
+import os
+import random
+import signal
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Iterator
+
+import psutil
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+process_rss = metrics.gauge("process_resident_memory_bytes", "Resident set size of this process.")
+
+_process: psutil.Process | None = None
+
+
+def current_rss() -> int:
+    global _process
+    # Prefork workers import this module in the master; look the process up again after a fork
+    if _process is None or _process.pid != os.getpid():
+        _process = psutil.Process()
+    return _process.memory_info().rss
+
+
+class RssUsage:
+    """
+    RSS at the start of a tracked block and the highest RSS sampled while it ran.
+    """
+
+    def __init__(self, start: int):
+        self.start = start
+        self.peak = start
+
+    @property
+    def growth(self) -> int:
+        return self.peak - self.start
+
+
+class RssSampler:
+    """
+    Samples the process RSS from a background thread while any tracked block is running.
+    RSS is per process: blocks running at the same time see each other's allocations, so
+    per-request peaks are exact only while one diagnosis runs at a time.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._active: dict[int, RssUsage] = {}
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self) -> Iterator[RssUsage]:
+        usage = RssUsage(current_rss())
+        with self._lock:
+            self._active[id(usage)] = usage
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+                self._thread.start()
+        try:
+            yield usage
+        finally:
+            rss = current_rss()
+            with self._lock:
+                self._active.pop(id(usage), None)
+                usage.peak = max(usage.peak, rss)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            rss = current_rss()
+            with self._lock:
+                # Stops when nothing is tracked; the next track() starts a new thread
+                if not self._active:
+                    self._thread = None
+                    return
+                for usage in self._active.values():
+                    usage.peak = max(usage.peak, rss)
+
+
+rss_sampler = RssSampler(settings.MEMORY_SAMPLE_INTERVAL_MS / 1000)
+
+
+class TracemallocSnapshots:
+    """
+    Tracemalloc snapshots of this process, taken and compared on demand (/api/v1/admin/memory).
+    Tracing slows down every allocation, so it only runs between start() and stop().
+    Keeps the newest `max_snapshots`.
+    """
+
+    def __init__(self, max_snapshots: int = 10):
+        self.max_snapshots = max_snapshots
+        self._snapshots: dict[int, tuple[datetime, tracemalloc.Snapshot]] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def start(self, frames: int) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        with self._lock:
+            self._snapshots.clear()
+
+    def take(self) -> dict:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running")
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+        taken_at = datetime.now()
+
+        with self._lock:
+            snapshot_id = self._next_id
+            self._next_id += 1
+            self._snapshots[snapshot_id] = (taken_at, snapshot)
+            for old_id in sorted(self._snapshots)[:-self.max_snapshots]:
+                del self._snapshots[old_id]
+
+        return {
+            "id": snapshot_id,
+            "taken_at": taken_at,
+            "traced_current": traced_current,
+            "traced_peak": traced_peak,
+        }
+
+    def diff(self, old_id: int, new_id: int, key_type: str = "lineno", limit: int = 20) -> list[dict]:
+        """
+        The allocation sites whose size changed most between two snapshots. Raises KeyError for an unknown id.
+        """
+        with self._lock:
+            old = self._snapshots[old_id][1]
+            new = self._snapshots[new_id][1]
+
+        return [
+            {
+                "location": str(stat.traceback),
+                "size": stat.size,
+                "size_diff": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+            for stat in new.compare_to(old, key_type)[:limit]
+        ]
+
+    def ids(self) -> list[int]:
+        with self._lock:
+            return sorted(self._snapshots)
+
+
+tracemalloc_snapshots = TracemallocSnapshots()
+
+
+class MemoryGovernor:
+    """
+    Recycles a worker process once its RSS exceeds `max_rss` bytes or it has served `max_requests`
+    requests (0 disables either limit). `recycle` is called once, with the reason.
+    """
+
+    def __init__(self, max_rss: int, max_requests: int, recycle: Callable[[str], None], max_requests_jitter: int = 0):
+        self.max_rss = max_rss
+        self.max_requests = max_requests + random.randint(0, max_requests_jitter) if max_requests else 0
+        self.recycle = recycle
+        self.requests = 0
+        self.recycling = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_rss or self.max_requests)
+
+    def request_finished(self) -> None:
+        rss = current_rss()
+        process_rss.set(rss)
+
+        with self._lock:
+            self.requests += 1
+            if self.recycling:
+                return
+            if self.max_rss and rss > self.max_rss:
+                reason = f"RSS {rss / MB:.0f} MB over {self.max_rss / MB:.0f} MB"
+            elif self.max_requests and self.requests >= self.max_requests:
+                reason = f"served {self.requests} requests"
+            else:
+                return
+            self.recycling = True
+
+        logger.warning("Recycling worker %s: %s", os.getpid(), reason)
+        self.recycle(reason)
+
+
+def terminate_gracefully(reason: str) -> None:
+    """
+    Sends this process SIGTERM: uvicorn stops accepting connections, finishes the requests in
+    flight and runs the lifespan shutdown, which flushes the write-behind queue. The prefork
+    server (app.server) then starts a replacement; under plain uvicorn the container restarts.
+    """
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+def get_memory_governor(recycle: Callable[[str], None] = terminate_gracefully) -> MemoryGovernor:
+    """
+    Creates a memory governor with the MEMORY_MAX_* settings.
+    """
+    return MemoryGovernor(
+        max_rss=settings.MEMORY_MAX_RSS_MB * MB,
+        max_requests=settings.MEMORY_MAX_REQUESTS,
+        recycle=recycle,
+        max_requests_jitter=settings.MEMORY_MAX_REQUESTS_JITTER
+    )
+
+
+# Governor of the API worker; app.worker creates its own
+memory_governor = get_memory_governor()
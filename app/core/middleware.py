@@ -0,0 +1,172 @@
+import asyncio
+import time
+import uuid
+
+from fastapi import HTTPException, status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import profiling, tracing
+from app.core.memory import MemoryGovernor
+from app.core.config import settings
+from app.core.logging import log_context
+
+
+class BodySizeLimitMiddleware:
+    """
+    Rejects request bodies larger than max_bytes with 413 while they are being received,
+    so an oversized upload is never fully read or spooled.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"detail": "업로드 파일이 너무 큽니다."}
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                # Chunked bodies have no Content-Length; FastAPI re-raises HTTPExceptions from body parsing
+                if received > self.max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="업로드 파일이 너무 큽니다."
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+class TracingMiddleware:
+    """
+    Runs each HTTP request in a root span, continuing the caller's trace if it sent a traceparent header.
+    The response's traceparent header identifies the trace, so a slow request can be looked up later.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1") or None
+
+        with tracing.span(f"{scope['method']} {scope['path']}", traceparent) as request_span:
+
+            async def traced_send(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute("http.status_code", message["status"])
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"traceparent", request_span.traceparent.encode("latin-1"))
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, traced_send)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests selected by app.core.profiling.should_profile and saves the profiles
+    to PROFILING_DIR. Sampled profiles of requests faster than PROFILING_SLOW_REQUEST_MS are dropped.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        admin_token = headers.get(b"x-admin-token", b"").decode("latin-1") or None
+        selected, forced = profiling.should_profile(scope["path"], admin_token)
+        profiler = profiling.try_start_profiler() if selected else None
+        if profiler is None:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = tracing.current_traceparent()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            profiling.finish_profiler(profiler)
+
+            if forced or elapsed_ms >= settings.PROFILING_SLOW_REQUEST_MS:
+                label = f"{scope['method']} {scope['path']} {elapsed_ms:.0f}ms"
+                if traceparent:
+                    # Trace id, to find the request's spans
+                    label += f" {traceparent.split('-')[1]}"
+                profile = profiler.to_speedscope(label)
+                await asyncio.to_thread(profiling.profile_store.save, profile, label)
+
+
+class MemoryGovernorMiddleware:
+    """
+    Reports every finished HTTP request to the memory governor, which may recycle the worker.
+    """
+
+    def __init__(self, app: ASGIApp, governor: MemoryGovernor):
+        self.app = app
+        self.governor = governor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.governor.request_finished()
+
+
+class RequestContextMiddleware:
+    """
+    Tags every log record of a request with its request id: the caller's X-Request-ID header,
+    or a new id, which is returned in the response's X-Request-ID header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        with log_context(request_id=request_id):
+            await self.app(scope, receive, send_with_request_id)
@@ -0,0 +1,154 @@
+import json
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app.core.config import settings
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+# Sampling sees every thread of the process, so only one request is profiled at a time
+_profiling = threading.Lock()
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of all threads every `interval` seconds from a background thread.
+    Threads serving other requests at the same time are sampled too; each thread is a separate
+    profile in the output, and idle threads show up as waiting in threading/selectors.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.frames: list[dict] = []
+        self._frame_index: dict[tuple, int] = {}
+        # Per thread: stacks as frame indexes (outermost first) and the time each one represents
+        self.samples: dict[int, tuple[list[list[int]], list[float]]] = {}
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._start
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            # Weight by the real time since the last sample; the sampler waits for the GIL like everyone else
+            elapsed, last = now - last, now
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self._record(thread_id, frame, elapsed)
+
+    def _record(self, thread_id: int, frame, elapsed: float) -> None:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno)
+            index = self._frame_index.get(key)
+            if index is None:
+                index = self._frame_index[key] = len(self.frames)
+                self.frames.append({"name": key[0], "file": key[1], "line": key[2]})
+            stack.append(index)
+            frame = frame.f_back
+        stack.reverse()
+
+        stacks, weights = self.samples.setdefault(thread_id, ([], []))
+        stacks.append(stack)
+        weights.append(elapsed)
+
+    def to_speedscope(self, name: str) -> dict:
+        """
+        The samples in speedscope's file format (https://www.speedscope.app), one profile per thread.
+        """
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        profiles = []
+        for thread_id, (stacks, weights) in self.samples.items():
+            profiles.append({
+                "type": "sampled",
+                "name": names.get(thread_id, f"thread {thread_id}"),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": stacks,
+                "weights": weights,
+            })
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "app.core.profiling",
+            "shared": {"frames": self.frames},
+            "profiles": profiles,
+        }
+
+
+class ProfileStore:
+    """
+    Directory of saved profiles that keeps only the newest `max_files`.
+    """
+
+    def __init__(self, directory: Path, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def save(self, profile: dict, label: str) -> Path:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_")[:80]
+        path = self.directory / f"{datetime.now():%Y%m%d-%H%M%S-%f}-{slug}.speedscope.json"
+
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(profile), encoding="utf-8")
+
+            saved = sorted(self.directory.glob("*.speedscope.json"))
+            for old in saved[:max(0, len(saved) - self.max_files)]:
+                old.unlink(missing_ok=True)
+        return path
+
+
+profile_store = ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_FILES)
+
+
+def should_profile(path: str, admin_token: str | None) -> tuple[bool, bool]:
+    """
+    Decides whether to profile a request. Returns (profile, forced); a forced profile is kept
+    regardless of PROFILING_SLOW_REQUEST_MS.
+    """
+    if settings.ADMIN_TOKEN and admin_token and secrets.compare_digest(admin_token, settings.ADMIN_TOKEN):
+        return True, True
+    if not any(path.startswith(prefix) for prefix in settings.PROFILING_PATH_PREFIXES):
+        return False, False
+    return random.random() < settings.PROFILING_SAMPLE_RATE, False
+
+
+def try_start_profiler() -> SamplingProfiler | None:
+    """
+    Starts a profiler, or returns None if another request is already being profiled.
+    Pass the profiler to finish_profiler when the request is done.
+    """
+    if not _profiling.acquire(blocking=False):
+        return None
+    profiler = SamplingProfiler(settings.PROFILING_INTERVAL_MS / 1000)
+    profiler.start()
+    return profiler
+
+
+def finish_profiler(profiler: SamplingProfiler) -> None:
+    try:
+        profiler.stop()
+    finally:
+        _profiling.release()
@@ -0,0 +1,118 @@
+import gzip
+from datetime import date
+from urllib.parse import urlencode
+
+from fastapi import Request, Response, status
+
+from app.core.cache import response_cache
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _accepted_encodings(accept_encoding: str) -> dict[str, float]:
+    """
+    Parses an Accept-Encoding header into {coding: q}, e.g. "br;q=1.0, gzip;q=0.8, *;q=0.1".
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                q = float(value)
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip()] = q
+    return accepted
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """
+    Picks "br" or "gzip" for a request's Accept-Encoding header, preferring the higher q and then brotli.
+    Returns None when the client accepts neither.
+    """
+    if not accept_encoding:
+        return None
+    accepted = _accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+
+    offered = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for coding in offered:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.RESPONSE_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.RESPONSE_GZIP_LEVEL, mtime=0)
+
+
+def json_bytes_response(body: bytes, request: Request, status_code: int = 200) -> Response:
+    """
+    Sends already serialized JSON, compressed with the client's preferred encoding once it reaches
+    RESPONSE_COMPRESSION_MIN_BYTES. Returning a Response skips FastAPI's response_model validation
+    and encoding; the response_model still documents the endpoint.
+    """
+    headers = {"Vary": "Accept-Encoding"}
+    min_bytes = settings.RESPONSE_COMPRESSION_MIN_BYTES
+    if min_bytes and len(body) >= min_bytes:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if encoding is not None:
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+def _add_validators(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    # Per-user content: no shared caches, and clients revalidate before reusing it
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def cached_json_response(request: Request, user_id: str) -> tuple[str | None, Response | None]:
+    """
+    Looks the request up in the response cache. Returns (key, response): a 304 when the client's
+    If-None-Match is current, the cached body, or no response on a miss. Pass the key to
+    store_json_response with the freshly built body. The key is None while the cache is disabled.
+    """
+    if not response_cache.enabled:
+        return None, None
+
+    # Endpoints default their date ranges to today, so the date is part of every key
+    query = urlencode(sorted(request.query_params.multi_items()))
+    key = response_cache.key(user_id, f"{date.today()}:{request.url.path}?{query}")
+    etag = response_cache.etag(key)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return key, Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+        )
+
+    body = response_cache.get(key)
+    if body is None:
+        return key, None
+    return key, _add_validators(json_bytes_response(body, request), etag)
+
+
+def store_json_response(request: Request, key: str | None, body: bytes) -> Response:
+    """
+    Caches a body built after a cached_json_response miss and sends it with its ETag.
+    """
+    if key is None:
+        return json_bytes_response(body, request)
+    response_cache.set(key, body)
+    return _add_validators(json_bytes_response(body, request), response_cache.etag(key))
@@ -0,0 +1,354 @@
+import atexit
+import json
+import os
+import queue
+import random
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterator, TextIO
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core import metrics
+from app.core.config import settings
+
+dropped_spans = metrics.counter("trace_spans_dropped_total", "Finished spans dropped because the trace queue was full.")
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    One timed operation of a trace. Spans started while another span is current become its children.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: str | None = None,
+        attributes: dict | None = None,
+        sampled: bool = True
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        # Decided once per trace; spans of unsampled traces are timed but never exported
+        self.sampled = sampled
+        self.attributes = dict(attributes or {})
+        self.error: str | None = None
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration: float | None = None
+
+    @property
+    def traceparent(self) -> str:
+        """
+        W3C trace context header value that makes this span the parent of the receiver's spans.
+        """
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def end(self, error: BaseException | None = None) -> None:
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._start
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if self.sampled:
+            span_exporter.export(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "attributes": self.attributes,
+            "error": self.error,
+            "pid": os.getpid(),
+        }
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str, bool] | None:
+    """
+    Returns the (trace id, parent span id, sampled flag) of a W3C traceparent header,
+    or None if it is missing or malformed.
+    """
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def current_traceparent() -> str | None:
+    span = _current_span.get()
+    return span.traceparent if span is not None else None
+
+
+def start_span(name: str, traceparent: str | None = None, **attributes) -> Span:
+    """
+    Starts a span without making it current; call span.end() when the operation finishes.
+    The parent is the current span, or the remote span in `traceparent`; without either it starts a new trace,
+    sampled with probability TRACE_SAMPLE_RATE. Spans follow their parent's sampling decision.
+    """
+    parent = _current_span.get()
+    if parent is not None and traceparent is None:
+        return Span(name, parent.trace_id, parent.span_id, attributes, parent.sampled)
+
+    remote = parse_traceparent(traceparent)
+    if remote is not None:
+        return Span(name, remote[0], remote[1], attributes, remote[2])
+    sampled = random.random() < settings.TRACE_SAMPLE_RATE
+    return Span(name, secrets.token_hex(16), None, attributes, sampled)
+
+
+@contextmanager
+def span(name: str, traceparent: str | None = None, **attributes) -> Iterator[Span]:
+    """
+    Runs the block in a new current span. Context variables follow asyncio tasks and
+    asyncio.to_thread, so spans started there are children of this one.
+    """
+    current = start_span(name, traceparent, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+class SpanExporter:
+    """
+    Receives every finished span.
+    """
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+    def after_fork(self) -> None:
+        """
+        Runs in a forked child. Locks held by the parent's writer thread at fork time stay held there.
+        """
+        if hasattr(self, "_lock"):
+            self._lock = threading.Lock()
+
+
+class NoopSpanExporter(SpanExporter):
+    def export(self, span: Span) -> None:
+        pass
+
+
+class StreamSpanExporter(SpanExporter):
+    """
+    Writes finished spans as JSON lines to a text stream.
+    """
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Appends finished spans as JSON lines to a file; find a slow request's spans by its trace_id.
+    Every process appends to the same file, one line per write. Once the file reaches `max_bytes`
+    it is renamed to <name>.1 (older copies shift up to <name>.<backups>) and a new file is started;
+    a process that finds the file was rotated by another one reopens it.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 0, backups: int = 1):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _open(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _rotate(self) -> None:
+        for index in range(self.backups - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{index}")
+            if older.exists():
+                older.replace(self.path.with_name(f"{self.path.name}.{index + 1}"))
+        if self.backups > 0:
+            self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink(missing_ok=True)
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            try:
+                current = os.stat(self.path)
+            except FileNotFoundError:
+                current = None
+            if self._file is None or current is None or current.st_ino != os.fstat(self._file.fileno()).st_ino:
+                self._open()
+                current = os.stat(self.path)
+
+            if self.max_bytes and current.st_size + len(line) > self.max_bytes and current.st_size > 0:
+                self._rotate()
+                self._open()
+
+            self._file.write(line)
+            self._file.flush()
+
+
+class QueuedSpanExporter(SpanExporter):
+    """
+    Hands finished spans to a writer thread, so requests never wait for the exporter's I/O.
+    Spans are dropped while the bounded queue is full.
+    """
+
+    def __init__(self, exporter: SpanExporter, maxsize: int):
+        self.exporter = exporter
+        self.maxsize = maxsize
+        self._start()
+        atexit.register(self.stop)
+        # The writer thread does not survive fork; prefork workers start their own
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self) -> None:
+        self.exporter.after_fork()
+        self._start()
+
+    def _start(self) -> None:
+        self._queue: queue.Queue[Span | None] = queue.Queue(maxsize=self.maxsize)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            span = self._queue.get()
+            if span is None:
+                return
+            try:
+                self.exporter.export(span)
+            except Exception as e:
+                print(f"Span export failed: {e}", file=sys.stderr)
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            dropped_spans.inc()
+
+    def stop(self) -> None:
+        """
+        Writes the spans still queued and stops the writer thread.
+        """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+def get_span_exporter() -> SpanExporter:
+    """
+    Creates the span exporter selected by settings.TRACE_EXPORTER, writing from a background queue.
+    """
+    if settings.TRACE_EXPORTER == "file":
+        exporter = FileSpanExporter(
+            settings.TRACE_FILE,
+            max_bytes=settings.TRACE_FILE_MAX_MB * 1024 * 1024,
+            backups=settings.TRACE_FILE_BACKUPS
+        )
+    elif settings.TRACE_EXPORTER == "stdout":
+        exporter = StreamSpanExporter(sys.stdout)
+    elif settings.TRACE_EXPORTER == "none":
+        return NoopSpanExporter()
+    else:
+        raise ValueError(f"Unknown trace exporter: {settings.TRACE_EXPORTER}")
+    return QueuedSpanExporter(exporter, maxsize=settings.TRACE_QUEUE_SIZE)
+
+
+span_exporter = get_span_exporter()
+
+
+def set_span_exporter(exporter: SpanExporter) -> None:
+    global span_exporter
+    span_exporter = exporter
+
+
+class TracingTransport(httpx.BaseTransport):
+    """
+    httpx transport that records a span per request and sends its traceparent header.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport | None = None):
+        self._transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with span(f"HTTP {request.method}", **{"http.url": str(request.url)}) as current:
+            request.headers["traceparent"] = current.traceparent
+            response = self._transport.handle_request(request)
+            current.set_attribute("http.status_code", response.status_code)
+            return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Records a span for every statement the engine executes inside a traced operation.
+    Statements outside any span (migrations, scripts) are not traced.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current_span.get() is None:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+        context._trace_span = start_span(f"SQL {operation}", **{"db.statement": statement[:500]})
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statement_span = getattr(context, "_trace_span", None)
+        if statement_span is not None:
+            statement_span.set_attribute("db.rowcount", cursor.rowcount)
+            statement_span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        statement_span = getattr(exception_context.execution_context, "_trace_span", None)
+        if statement_span is not None:
+            statement_span.end(exception_context.original_exception)
@@ -1,8 +1,32 @@
+import uuid
 from datetime import date, datetime, time
+from functools import lru_cache
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, and_, bindparam, func, or_, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session, aliased
 
+from app.core.cache import count_cache, response_cache
 from app.models.diagnosis import Diagnosis
+from app.models.diagnosis_summary import DiagnosisSummary, RECENT_SCORES_SIZE
+
+# Columns needed to build score lists
+SCORE_COLUMNS = (
+    Diagnosis.id,
+    Diagnosis.created_at,
+    Diagnosis.total_score,
+    Diagnosis.wrinkle_score,
+    Diagnosis.acne_score,
+    Diagnosis.atopy_score,
+)
+
+# Every column except the Text description blobs
+LIST_COLUMNS = SCORE_COLUMNS + (
+    Diagnosis.original_image_url,
+    Diagnosis.wrinkle_image_url,
+    Diagnosis.acne_image_url,
+    Diagnosis.atopy_image_url,
+)
 
 
 def create_diagnosis(
@@ -20,83 +44,416 @@ def create_diagnosis(
     acne_description: str = None,
     atopy_score: int = None,
     atopy_image_url: str = None,
-    atopy_description: str = None
+    atopy_description: str = None,
+    model_version: str = None,
+    inference_resolution: str = None
 ) -> Diagnosis:
     """
     Saves a new diagnosis result to the database.
+    The id and created_at are generated client-side, so the row is not read back after the commit.
     """
-    db_obj = Diagnosis(
-        user_id=user_id,
-        original_image_url=original_image_url,
-        created_at=created_at,
-        total_score=total_score,
-        wrinkle_score=wrinkle_score,
-        wrinkle_image_url=wrinkle_image_url,
-        wrinkle_description=wrinkle_description,
-        acne_score=acne_score,
-        acne_image_url=acne_image_url,
-        acne_description=acne_description,
-        atopy_score=atopy_score,
-        atopy_image_url=atopy_image_url,
-        atopy_description=atopy_description
-    )
-    
-    db.add(db_obj)
+    return create_diagnoses(db, [{
+        "user_id": user_id,
+        "original_image_url": original_image_url,
+        "created_at": created_at,
+        "total_score": total_score,
+        "wrinkle_score": wrinkle_score,
+        "wrinkle_image_url": wrinkle_image_url,
+        "wrinkle_description": wrinkle_description,
+        "acne_score": acne_score,
+        "acne_image_url": acne_image_url,
+        "acne_description": acne_description,
+        "atopy_score": atopy_score,
+        "atopy_image_url": atopy_image_url,
+        "atopy_description": atopy_description,
+        "model_version": model_version,
+        "inference_resolution": inference_resolution,
+    }])[0]
+
+
+def create_diagnoses(db: Session, diagnoses: list[dict]) -> list[Diagnosis]:
+    """
+    Saves several diagnosis results in one transaction and returns them in the given order.
+    Each dict holds the keyword arguments of create_diagnosis (plus an optional id).
+    The rows are sent as one multi-row INSERT and the users' summary rows are updated before the commit.
+    """
+    try:
+        return _create_diagnoses(db, diagnoses)
+    except (IntegrityError, OperationalError):
+        # A user without a summary row has nothing to lock: a concurrent first diagnosis or summary build
+        # inserted the row first (duplicate key or deadlock). Retry once, locking the row it committed.
+        db.rollback()
+        return _create_diagnoses(db, diagnoses)
+
+
+def _create_diagnoses(db: Session, diagnoses: list[dict]) -> list[Diagnosis]:
+    db_objs = [
+        Diagnosis(**{
+            **values,
+            "id": values.get("id") or str(uuid.uuid4()),
+            "created_at": values.get("created_at") or datetime.now(),
+        })
+        for values in diagnoses
+    ]
+
+    db.add_all(db_objs)
+    db.flush()
+
+    # Oldest first per user, the order their summary rings are pushed in
+    by_user: dict[str, list[Diagnosis]] = {}
+    for db_obj in sorted(db_objs, key=lambda obj: obj.created_at):
+        by_user.setdefault(db_obj.user_id, []).append(db_obj)
+
+    user_ids = set(by_user)
+    summaries = {
+        summary.user_id: summary
+        for summary in db.query(DiagnosisSummary).filter(
+            DiagnosisSummary.user_id.in_(user_ids)
+        ).with_for_update()
+    }
+
+    for user_id, user_objs in by_user.items():
+        summary = summaries.get(user_id)
+
+        if _needs_rebuild(summary, user_objs[0]):
+            # The rebuild reads every row of the batch flushed above, so none of them is pushed again
+            summary = rebuild_diagnosis_summary(db, user_id, summary)
+            for db_obj in user_objs:
+                if db_obj.id == summary.latest_diagnosis_id:
+                    recent_scores = recent_scores_from_summary(summary)
+                else:
+                    recent_scores = recent_scores_from_rows(get_recent_diagnoses_from_id_by_user(
+                        db, user_id, db_obj.id, limit=RECENT_SCORES_SIZE
+                    ))
+                _set_recent_scores(db_obj, recent_scores)
+            continue
+
+        for db_obj in user_objs:
+            summary = update_diagnosis_summary(db, db_obj, summary)
+            _set_recent_scores(db_obj, recent_scores_from_summary(summary))
+
     db.commit()
-    db.refresh(db_obj)
-    return db_obj
+    for user_id in user_ids:
+        count_cache.delete_prefix(f"diagnoses:{user_id}:")
+        response_cache.invalidate_user(user_id)
+    return db_objs
+
+
+def _set_recent_scores(diagnosis: Diagnosis, recent_scores: dict[str, list[int]]) -> None:
+    # Recent score lists for DiagnosisDetail, so the caller does not query them again
+    for key, value in recent_scores.items():
+        setattr(diagnosis, key, value)
+
+
+def _needs_rebuild(summary: DiagnosisSummary | None, diagnosis: Diagnosis) -> bool:
+    # Missing (older account or first diagnosis) or out-of-order insert: recompute from the diagnoses table
+    return summary is None or (
+        summary.latest_created_at is not None and diagnosis.created_at < summary.latest_created_at
+    )
+
+
+def _push_recent(scores: list, score: int | None) -> list:
+    # Assign a new list so the JSON column is marked as changed
+    return ([score] + list(scores or []))[:RECENT_SCORES_SIZE]
+
+
+def update_diagnosis_summary(
+    db: Session, 
+    diagnosis: Diagnosis, 
+    summary: DiagnosisSummary | None = None
+) -> DiagnosisSummary:
+    """
+    Pushes a newly flushed diagnosis into its user's summary row.
+    Must run in the same transaction as the diagnosis insert.
+    Pass the summary row if it is already locked; otherwise it is read with FOR UPDATE.
+    """
+    if summary is None:
+        summary = db.get(DiagnosisSummary, diagnosis.user_id, with_for_update=True)
+
+    if _needs_rebuild(summary, diagnosis):
+        return rebuild_diagnosis_summary(db, diagnosis.user_id, summary)
+
+    summary.previous_diagnosis_id = summary.latest_diagnosis_id
+    summary.previous_total_score = summary.latest_total_score
+
+    summary.latest_diagnosis_id = diagnosis.id
+    summary.latest_created_at = diagnosis.created_at
+    summary.latest_total_score = diagnosis.total_score
+
+    summary.recent_total_scores = _push_recent(summary.recent_total_scores, diagnosis.total_score)
+    summary.recent_wrinkle_scores = _push_recent(summary.recent_wrinkle_scores, diagnosis.wrinkle_score)
+    summary.recent_acne_scores = _push_recent(summary.recent_acne_scores, diagnosis.acne_score)
+    summary.recent_atopy_scores = _push_recent(summary.recent_atopy_scores, diagnosis.atopy_score)
+    return summary
+
+
+def rebuild_diagnosis_summary(
+    db: Session, 
+    user_id: str, 
+    summary: DiagnosisSummary | None = None
+) -> DiagnosisSummary:
+    """
+    Recomputes a user's summary row from their most recent diagnoses. Does not commit.
+    """
+    recent = get_recent_diagnoses_by_user(db, user_id=user_id, limit=RECENT_SCORES_SIZE)
+
+    if summary is None:
+        summary = DiagnosisSummary(user_id=user_id)
+        db.add(summary)
+
+    latest = recent[0] if recent else None
+    previous = recent[1] if len(recent) > 1 else None
+
+    summary.latest_diagnosis_id = latest.id if latest else None
+    summary.latest_created_at = latest.created_at if latest else None
+    summary.latest_total_score = latest.total_score if latest else None
+    summary.previous_diagnosis_id = previous.id if previous else None
+    summary.previous_total_score = previous.total_score if previous else None
+
+    summary.recent_total_scores = [row.total_score for row in recent]
+    summary.recent_wrinkle_scores = [row.wrinkle_score for row in recent]
+    summary.recent_acne_scores = [row.acne_score for row in recent]
+    summary.recent_atopy_scores = [row.atopy_score for row in recent]
+    return summary
+
+
+def get_diagnosis_summary(db: Session, user_id: str) -> DiagnosisSummary:
+    """
+    Gets a user's summary row by primary key, building it on first access.
+    """
+    summary = db.get(DiagnosisSummary, user_id)
+    if summary is not None:
+        return summary
+
+    try:
+        summary = rebuild_diagnosis_summary(db, user_id)
+        db.commit()
+    except IntegrityError:
+        # A concurrent request created the row first
+        db.rollback()
+        summary = db.get(DiagnosisSummary, user_id)
+    return summary
+
+
+def recent_scores_from_summary(summary: DiagnosisSummary) -> dict[str, list[int]]:
+    """
+    Builds the DiagnosisDetail recent score lists from a summary row.
+    """
+    return {
+        "recent_scores": list(summary.recent_total_scores),
+        "recent_wrinkle_scores": [score for score in summary.recent_wrinkle_scores if score is not None],
+        "recent_acne_scores": [score for score in summary.recent_acne_scores if score is not None],
+        "recent_atopy_scores": [score for score in summary.recent_atopy_scores if score is not None],
+    }
+
+
+def recent_scores_from_rows(rows: list[Row]) -> dict[str, list[int]]:
+    """
+    Builds the DiagnosisDetail recent score lists from score rows, newest first.
+    """
+    return {
+        "recent_scores": [row.total_score for row in rows],
+        "recent_wrinkle_scores": [row.wrinkle_score for row in rows if row.wrinkle_score is not None],
+        "recent_acne_scores": [row.acne_score for row in rows if row.acne_score is not None],
+        "recent_atopy_scores": [row.atopy_score for row in rows if row.atopy_score is not None],
+    }
 
 
 def get_diagnoses_by_user(
     db: Session, 
     user_id: str, 
     start_date: date, 
-    end_date: date
-) -> list[Diagnosis]:
+    end_date: date,
+    limit: int | None = None,
+    after: tuple[datetime, str] | None = None
+) -> list[Row]:
     """
     Gets diagnoses for a specific user within a date range, ordered by most recent.
+    Description columns are not loaded.
+    With `after` (created_at, id) of the last seen row, continues from that keyset position.
     """
     start_datetime = datetime.combine(start_date, time.min)
     end_datetime = datetime.combine(end_date, time.max)
     
-    return db.query(Diagnosis).filter(
+    query = db.query(*LIST_COLUMNS).filter(
+        Diagnosis.user_id == user_id,
+        Diagnosis.created_at >= start_datetime,
+        Diagnosis.created_at <= end_datetime
+    )
+
+    if after is not None:
+        after_created_at, after_id = after
+        query = query.filter(or_(
+            Diagnosis.created_at < after_created_at,
+            and_(Diagnosis.created_at == after_created_at, Diagnosis.id < after_id)
+        ))
+
+    query = query.order_by(Diagnosis.created_at.desc(), Diagnosis.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+def count_diagnoses_by_user(db: Session, user_id: str, start_date: date, end_date: date) -> int:
+    """
+    Counts a user's diagnoses within a date range. The result is cached until the user's next diagnosis.
+    """
+    cache_key = f"diagnoses:{user_id}:{start_date}:{end_date}"
+    count = count_cache.get(cache_key)
+    if count is None:
+        count = db.query(func.count(Diagnosis.id)).filter(
+            Diagnosis.user_id == user_id,
+            Diagnosis.created_at >= datetime.combine(start_date, time.min),
+            Diagnosis.created_at <= datetime.combine(end_date, time.max)
+        ).scalar()
+        count_cache.set(cache_key, count)
+    return count
+
+
+def get_diagnosis_scores_by_user(
+    db: Session, 
+    user_id: str, 
+    start_date: date, 
+    end_date: date
+) -> list[Row]:
+    """
+    Gets only the score columns of a user's diagnoses within a date range, ordered by most recent.
+    """
+    start_datetime = datetime.combine(start_date, time.min)
+    end_datetime = datetime.combine(end_date, time.max)
+
+    return db.query(*SCORE_COLUMNS).filter(
         Diagnosis.user_id == user_id,
         Diagnosis.created_at >= start_datetime,
         Diagnosis.created_at <= end_datetime
     ).order_by(Diagnosis.created_at.desc()).all()
 
 
-def get_recent_diagnosis_by_user(db: Session, user_id: str, kth: int = 1) -> Diagnosis | None:
+def _bucket_expression(db: Session, granularity: str):
     """
-    Gets the most recent diagnosis record for a specific user.
+    SQL expression for the first day of the day/week/month bucket of created_at.
+    Weeks start on Monday.
     """
-    return db.query(Diagnosis).filter(
+    created_at = Diagnosis.created_at
+    is_sqlite = db.get_bind().dialect.name == "sqlite"
+
+    if granularity == "day":
+        return func.date(created_at)
+    if granularity == "week":
+        if is_sqlite:
+            return func.date(created_at, "weekday 0", "-6 days")
+        return func.subdate(func.date(created_at), func.weekday(created_at))
+    if granularity == "month":
+        if is_sqlite:
+            return func.date(created_at, "start of month")
+        return func.date_format(created_at, "%Y-%m-01")
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def get_diagnosis_trend_by_user(
+    db: Session, 
+    user_id: str, 
+    start_date: date, 
+    end_date: date,
+    granularity: str = "day"
+) -> list[Row]:
+    """
+    Aggregates a user's diagnoses into day/week/month buckets, oldest first.
+    Each row has the bucket start, the diagnosis count and min/avg/max of every score.
+    """
+    start_datetime = datetime.combine(start_date, time.min)
+    end_datetime = datetime.combine(end_date, time.max)
+    bucket = _bucket_expression(db, granularity).label("bucket")
+
+    aggregates = []
+    for name in ("total", "wrinkle", "acne", "atopy"):
+        column = getattr(Diagnosis, f"{name}_score")
+        aggregates += [
+            func.min(column).label(f"{name}_min"),
+            func.avg(column).label(f"{name}_avg"),
+            func.max(column).label(f"{name}_max"),
+        ]
+
+    return db.query(bucket, func.count(Diagnosis.id).label("count"), *aggregates).filter(
+        Diagnosis.user_id == user_id,
+        Diagnosis.created_at >= start_datetime,
+        Diagnosis.created_at <= end_datetime
+    ).group_by(bucket).order_by(bucket).all()
+
+
+def get_recent_diagnosis_by_user(db: Session, user_id: str, kth: int = 1) -> Row | None:
+    """
+    Gets the scores of the kth most recent diagnosis record for a specific user.
+    """
+    return db.query(*SCORE_COLUMNS).filter(
         Diagnosis.user_id == user_id
     ).order_by(Diagnosis.created_at.desc()).offset(kth - 1).limit(1).first()
 
 
-def get_recent_diagnoses_by_user(db: Session, user_id: str, limit: int = 3) -> list[Diagnosis]:
+def get_recent_diagnoses_by_user(db: Session, user_id: str, limit: int = 3) -> list[Row]:
     """
-    Gets the most recent diagnosis records for a specific user.
+    Gets the scores of the most recent diagnosis records for a specific user.
     """
-    return db.query(Diagnosis).filter(
+    return db.query(*SCORE_COLUMNS).filter(
         Diagnosis.user_id == user_id
     ).order_by(Diagnosis.created_at.desc()).limit(limit).all()
 
-def get_recent_diagnoses_from_id_by_user(db: Session, user_id: str, diagnosis_id: str, limit: int = 3) -> list[Diagnosis]:
+def get_recent_diagnoses_from_id_by_user(db: Session, user_id: str, diagnosis_id: str, limit: int = 3) -> list[Row]:
     """
-    Gets the most recent diagnosis records for a specific user starting from a specific diagnosis ID.
+    Gets the scores of the most recent diagnosis records for a specific user starting from a specific diagnosis ID.
     """
     subquery = db.query(Diagnosis.created_at).filter(
         Diagnosis.id == diagnosis_id,
         Diagnosis.user_id == user_id
-    ).subquery()
+    ).scalar_subquery()
 
-    return db.query(Diagnosis).filter(
+    return db.query(*SCORE_COLUMNS).filter(
         Diagnosis.user_id == user_id,
-        Diagnosis.created_at <= subquery.c.created_at
+        Diagnosis.created_at <= subquery
     ).order_by(Diagnosis.created_at.desc()).limit(limit).all()
 
+@lru_cache
+def _diagnosis_with_recent_scores_statement(limit: int):
+    # Built once per limit: constructing the aliased subqueries costs more than running them
+    target = aliased(Diagnosis, name="target")
+    diagnosis_id = bindparam("diagnosis_id")
+    owner_id = select(target.user_id).where(target.id == diagnosis_id).scalar_subquery()
+    target_created_at = select(target.created_at).where(target.id == diagnosis_id).scalar_subquery()
+
+    # Keyset window ending at the target: an index range scan on (user_id, created_at) that stops after `limit` rows
+    recent = select(*SCORE_COLUMNS).where(
+        Diagnosis.user_id == owner_id,
+        Diagnosis.created_at <= target_created_at,
+        or_(Diagnosis.created_at < target_created_at, Diagnosis.id <= diagnosis_id)
+    ).order_by(Diagnosis.created_at.desc(), Diagnosis.id.desc()).limit(limit).subquery("recent")
+
+    # Only the requested row joins the full entity; the others carry scores only
+    return select(
+        Diagnosis,
+        recent.c.total_score,
+        recent.c.wrinkle_score,
+        recent.c.acne_score,
+        recent.c.atopy_score
+    ).select_from(recent).outerjoin(
+        Diagnosis,
+        and_(Diagnosis.id == recent.c.id, recent.c.id == diagnosis_id)
+    ).order_by(recent.c.created_at.desc(), recent.c.id.desc())
+
+
+def get_diagnosis_with_recent_scores(
+    db: Session, 
+    diagnosis_id: str, 
+    limit: int = 3
+) -> tuple[Diagnosis | None, list[Row]]:
+    """
+    Gets a diagnosis and the scores of its owner's `limit` most recent diagnoses up to and including it,
+    newest first, in a single statement.
+    """
+    rows = db.execute(_diagnosis_with_recent_scores_statement(limit), {"diagnosis_id": diagnosis_id}).all()
+    diagnosis = next((row.Diagnosis for row in rows if row.Diagnosis is not None), None)
+    return diagnosis, rows
+
+
 def get_diagnosis_by_id(db: Session, diagnosis_id: str) -> Diagnosis | None:
     """
     Gets a specific diagnosis by its ID.
@@ -1,5 +1,7 @@
 from datetime import datetime
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
+from app.core.cache import count_cache
 from app.models.review import Review
 
 
@@ -23,12 +25,43 @@ def create_review(
     
     db.add(db_obj)
     db.commit()
+    count_cache.delete(f"reviews:{user_id}")
     db.refresh(db_obj)
     return db_obj
 
 
-def get_reviews_by_user(db: Session, user_id: str) -> list[Review]:
+def get_reviews_by_user(
+    db: Session, 
+    user_id: str, 
+    limit: int | None = None, 
+    after: tuple[datetime, str] | None = None
+) -> list[Review]:
     """
     Gets reviews for a specific user, ordered by most recent.
+    With `after` (created_at, id) of the last seen review, continues from that keyset position.
     """
-    return db.query(Review).filter(Review.user_id == user_id).order_by(Review.created_at.desc()).all()
\ No newline at end of file
+    query = db.query(Review).filter(Review.user_id == user_id)
+
+    if after is not None:
+        after_created_at, after_id = after
+        query = query.filter(or_(
+            Review.created_at < after_created_at,
+            and_(Review.created_at == after_created_at, Review.id < after_id)
+        ))
+
+    query = query.order_by(Review.created_at.desc(), Review.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+def count_reviews_by_user(db: Session, user_id: str) -> int:
+    """
+    Counts reviews for a specific user. The result is cached until the user's next review.
+    """
+    cache_key = f"reviews:{user_id}"
+    count = count_cache.get(cache_key)
+    if count is None:
+        count = db.query(func.count(Review.id)).filter(Review.user_id == user_id).scalar()
+        count_cache.set(cache_key, count)
+    return count
\ No newline at end of file
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 
+from app.core.cache import count_cache, response_cache, user_cache
 from app.models.user import User
 
 
@@ -35,6 +36,7 @@ def update_username(db: Session, user: User, new_username: str) -> User:
     user.username = new_username
     db.add(user)
     db.commit()
+    user_cache.delete(user.id)
     db.refresh(user)
     return user
 
@@ -45,6 +47,7 @@ def update_password(db: Session, user: User, new_hashed_password: str) -> User:
     user.hashed_password = new_hashed_password
     db.add(user)
     db.commit()
+    user_cache.delete(user.id)
     db.refresh(user)
     return user
 
@@ -52,5 +55,9 @@ def delete_user(db: Session, user: User) -> None:
     """
     Deletes a user from the database.
     """
+    user_id = user.id
     db.delete(user)
-    db.commit()
\ No newline at end of file
+    db.commit()
+    user_cache.delete(user_id)
+    count_cache.delete_prefix(f"diagnoses:{user_id}:")
+    response_cache.invalidate_user(user_id)
\ No newline at end of file
@@ -0,0 +1,22 @@
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+
+# alembic.ini lives at the project root, next to the app package
+ALEMBIC_INI_PATH = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+def upgrade_database(database_url: str | None = None, revision: str = "head") -> None:
+    """
+    Applies all pending Alembic migrations.
+    Uses settings.DATABASE_URL unless another database URL is given.
+    """
+    config = Config(str(ALEMBIC_INI_PATH))
+    config.attributes["configure_logger"] = False
+
+    if database_url is not None:
+        # ConfigParser interpolation treats '%' as special
+        config.set_main_option("sqlalchemy.url", database_url.replace("%", "%%"))
+
+    command.upgrade(config, revision)
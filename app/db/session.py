@@ -1,12 +1,15 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from app.core import tracing
 from app.core.config import settings
 
 # DB connection pool
 engine = create_engine(settings.DATABASE_URL)
+tracing.instrument_engine(engine)
 
 # Create a new session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay loaded after commit, so returning a just-written row does not re-select it
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 def get_db():
     """
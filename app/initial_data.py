@@ -1,9 +1,11 @@
 import logging
 from sqlalchemy.orm import Session
 from app.db.session import get_db, engine, SessionLocal
-from app.models.base import Base    
+from app.db.migrations import upgrade_database
 from app.models.user import User             
 from app.models.diagnosis import Diagnosis
+from app.models.diagnosis_job import DiagnosisJob
+from app.models.diagnosis_summary import DiagnosisSummary
 from app.models.review import Review
 from app.services.user_service import get_password_hash 
 
@@ -21,8 +23,8 @@ IMG_ACNE = "/dummy/dummy_acne.jpg"
 IMG_ATOPY = "/dummy/dummy_atopy.jpg"
 
 def init_db(session: Session) -> None:
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
+    # Create or upgrade all tables
+    upgrade_database()
 
     # Check if the default user exists
     user = session.query(User).filter(User.email == DEFAULT_USER_EMAIL).first()
@@ -1,29 +1,57 @@
+import threading
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
+from app.core import metrics
 from app.core.config import settings
-from app.api.v1 import diagnoses, users, reviews
+from app.api.v1 import admin, diagnoses, users, reviews
 from app.core.exceptions import validation_exception_handler
-from app.db.session import engine
-from app.models.base import Base
+from app.core.memory import memory_governor
+from app.core.logging import setup_logging
+from app.core.middleware import (
+    BodySizeLimitMiddleware, MemoryGovernorMiddleware, ProfilingMiddleware, RequestContextMiddleware, TracingMiddleware
+)
+from app.services.auth_service import require_admin
+from app.services.diagnosis_writer import diagnosis_writer
+
+# Import all models to ensure their relationships can be resolved
+from app.models import user, diagnosis, diagnosis_job, diagnosis_summary, review
 
-# Import all models to ensure they are registered in the metadata
-from app.models import user, diagnosis, review
+# JSON logs written by a background thread (LOG_* settings)
+setup_logging()
 
 '''
-Create all database tables.
+Database tables are managed by Alembic migrations (app/alembic).
 - The database specified in DATABASE_URL must exist.
-- All database models MUST BE IMPORTED before this line to ensure they are registered in the metadata.
-- CREATE TABLE IF NOT EXISTS is not used, so existing tables are not affected.
+- Run `python -m app.initial_data` (done by entrypoint.sh) or `alembic upgrade head` before starting the server.
 '''
-Base.metadata.create_all(bind=engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.METRICS_PORT:
+        # No-op in app.server workers, which already listen on METRICS_PORT + their index
+        metrics.start_http_server(settings.METRICS_PORT)
+
+    worker_stop = threading.Event()
+    if settings.DIAGNOSIS_EXECUTION == "queue" and settings.JOB_BROKER == "memory":
+        # The in-memory queue is only visible to this process, so run the worker here (loads the AI models)
+        from app.worker import start_in_process_worker
+        start_in_process_worker(worker_stop)
+
+    yield
+
+    worker_stop.set()
+    # Commit diagnoses still waiting in the write-behind queue
+    diagnosis_writer.stop(timeout=10)
 
 # Initialize FastAPI application
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # CORS middleware configuration
 origins = [
@@ -37,6 +65,22 @@ app.add_middleware(
     allow_headers=["*"],          
 )
 
+# Reject oversized uploads before they are read
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=settings.UPLOAD_MAX_BYTES)
+
+# Recycle this worker after MEMORY_MAX_RSS_MB or MEMORY_MAX_REQUESTS
+if memory_governor.enabled:
+    app.add_middleware(MemoryGovernorMiddleware, governor=memory_governor)
+
+# Sampling profiler for selected requests (off unless configured)
+app.add_middleware(ProfilingMiddleware)
+
+# Request id on every log record of the request
+app.add_middleware(RequestContextMiddleware)
+
+# Root span per request; added last so it also times the other middleware
+app.add_middleware(TracingMiddleware)
+
 # static files configuration
 static_dir_path = str(settings.STATIC_DIR.resolve())
 
@@ -63,8 +107,15 @@ app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
 app.include_router(diagnoses.router, prefix="/api/v1/diagnoses", tags=["diagnoses"])
 app.include_router(reviews.router, prefix="/api/v1/reviews", tags=["reviews"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
 
 # Health check endpoint
 @app.get("/")
 def read_root():
-    return {"message": "Welcome to the API"}
\ No newline at end of file
+    return {"message": "Welcome to the API"}
+
+
+# Prometheus scrape endpoint of the worker that serves the request; scrape METRICS_PORT for every worker
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_admin)])
+def read_metrics():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
@@ -1,11 +1,15 @@
 import uuid
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 
 class Diagnosis(Base):
     __tablename__ = "diagnoses"
+    __table_args__ = (
+        # History queries filter on user_id and order by created_at
+        Index("ix_diagnoses_user_id_created_at", "user_id", "created_at"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
 
@@ -16,6 +20,11 @@ class Diagnosis(Base):
     total_score = Column(Integer, nullable=False)
     original_image_url = Column(String(512), nullable=False)
 
+    # Version of the AI models that produced this diagnosis (see ModelRegistry)
+    model_version = Column(String(255))
+    # Segmentation input size per model, e.g. "wrinkle=1024;acne=1024;atopy=832" (see ResolutionController)
+    inference_resolution = Column(String(64))
+
     # wrinkle
     wrinkle_score = Column(Integer)
     wrinkle_image_url = Column(String(512))
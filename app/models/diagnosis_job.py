@@ -0,0 +1,45 @@
+import uuid
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.models.base import Base
+
+# Job states, in order
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+class DiagnosisJob(Base):
+    """
+    Uploaded image waiting for, or processed by, an inference worker (app.worker).
+    """
+    __tablename__ = "diagnosis_jobs"
+    __table_args__ = (
+        # Workers claim the oldest queued job (or running job with an expired lease)
+        Index("ix_diagnosis_jobs_status_created_at", "status", "created_at"),
+    )
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    user = relationship("User", back_populates="diagnosis_jobs")
+
+    status = Column(String(16), nullable=False, default=JOB_QUEUED)
+    upload_path = Column(String(512), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    worker_id = Column(String(255))
+    # Renewed by the worker while it runs the job; an expired lease lets another worker claim it again
+    heartbeat_at = Column(DateTime(timezone=True))
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    # W3C traceparent of the request that queued the job, continued by the worker
+    traceparent = Column(String(55))
+
+    # Set when done
+    diagnosis_id = Column(String(36))
+
+    # Set when failed: the HTTP error the API returns to the waiting client
+    error_status = Column(Integer)
+    error_detail = Column(Text)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON
+from sqlalchemy.orm import relationship
+from app.models.base import Base
+
+# Number of diagnoses kept in the recent score rings
+RECENT_SCORES_SIZE = 3
+
+class DiagnosisSummary(Base):
+    """
+    Per-user dashboard data, updated in the same transaction as each new diagnosis.
+    """
+    __tablename__ = "diagnosis_summaries"
+
+    user_id = Column(String(36), ForeignKey("users.id"), primary_key=True)
+    user = relationship("User", back_populates="diagnosis_summary")
+
+    latest_diagnosis_id = Column(String(36))
+    latest_created_at = Column(DateTime(timezone=True))
+    latest_total_score = Column(Integer)
+
+    previous_diagnosis_id = Column(String(36))
+    previous_total_score = Column(Integer)
+
+    # Newest first, at most RECENT_SCORES_SIZE items. Condition scores may contain nulls.
+    recent_total_scores = Column(JSON, nullable=False, default=list)
+    recent_wrinkle_scores = Column(JSON, nullable=False, default=list)
+    recent_acne_scores = Column(JSON, nullable=False, default=list)
+    recent_atopy_scores = Column(JSON, nullable=False, default=list)
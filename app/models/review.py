@@ -1,11 +1,15 @@
 import uuid
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # Review lists filter on user_id and page by created_at
+        Index("ix_reviews_user_id_created_at", "user_id", "created_at"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
 
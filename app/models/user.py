@@ -13,4 +13,8 @@ class User(Base):
     hashed_password = Column(String(255))
 
     diagnoses = relationship("Diagnosis", back_populates="user")
-    reviews = relationship("Review", back_populates="user")
\ No newline at end of file
+    reviews = relationship("Review", back_populates="user")
+    diagnosis_summary = relationship(
+        "DiagnosisSummary", back_populates="user", uselist=False, cascade="all, delete-orphan"
+    )
+    diagnosis_jobs = relationship("DiagnosisJob", back_populates="user", cascade="all, delete-orphan")
\ No newline at end of file
@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+
+class MemoryStatus(BaseModel):
+    pid: int
+    rss: int
+    tracemalloc_running: bool
+    traced_current: Optional[int] = None
+    traced_peak: Optional[int] = None
+    snapshot_ids: list[int]
+    requests_served: int
+    max_rss: int
+    max_requests: int
+
+
+class TracemallocSnapshot(BaseModel):
+    id: int
+    pid: int
+    taken_at: datetime
+    traced_current: int
+    traced_peak: int
+
+
+class TracemallocStat(BaseModel):
+    location: str
+    size: int
+    size_diff: int
+    count: int
+    count_diff: int
+
+
+class TracemallocDiff(BaseModel):
+    pid: int
+    old_id: int
+    new_id: int
+    stats: list[TracemallocStat]
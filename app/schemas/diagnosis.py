@@ -1,8 +1,10 @@
 import uuid
-from datetime import datetime
+from datetime import date, datetime
+from typing import Any
 from fastapi import UploadFile
-from pydantic import BaseModel, HttpUrl, ConfigDict, Field, computed_field
+from pydantic import BaseModel, HttpUrl, ConfigDict, Field, TypeAdapter, computed_field
 from pydantic.alias_generators import to_camel
+from typing_extensions import TypedDict
 
 class DiagnosisDetailItem(BaseModel):
     model_config = ConfigDict(
@@ -30,17 +32,18 @@ class BaseDiagnosisResponse(BaseModel):
     original_image_url: str
     created_at: datetime
 
+    # Descriptions default to None because list queries do not load them
     wrinkle_score: int | None = Field(exclude=True)
     wrinkle_image_url: str | None = Field(exclude=True)
-    wrinkle_description: str | None = Field(exclude=True)
+    wrinkle_description: str | None = Field(None, exclude=True)
     
     acne_score: int | None = Field(exclude=True)
     acne_image_url: str | None = Field(exclude=True)
-    acne_description: str | None = Field(exclude=True)
+    acne_description: str | None = Field(None, exclude=True)
     
     atopy_score: int | None = Field(exclude=True)
     atopy_image_url: str | None = Field(exclude=True)
-    atopy_description: str | None = Field(exclude=True)
+    atopy_description: str | None = Field(None, exclude=True)
 
 class DiagnosisHistory(BaseModel):
     model_config = ConfigDict(
@@ -126,4 +129,140 @@ class DiagnosisSimple(BaseDiagnosisResponse):
         return DiagnosisScoreItem(score=self.atopy_score)
 
 class DiagnosisList(BaseModel):
-    items: list[DiagnosisSimple]
\ No newline at end of file
+    """
+    A page of /diagnoses/results. Like every diagnosis response its keys are camelCase, and /reviews
+    pages use the same keys: the cursor to pass back as `cursor` is `nextCursor` (and the count `totalCount`).
+    """
+    model_config = ConfigDict(
+        alias_generator=to_camel,
+        populate_by_name=True
+    )
+
+    items: list[DiagnosisSimple]
+    next_cursor: str | None = None
+    total_count: int | None = None
+
+class ScoreStats(BaseModel):
+    min: int | None = None
+    avg: float | None = None
+    max: int | None = None
+
+class DiagnosisTrendBucket(BaseModel):
+    model_config = ConfigDict(
+        alias_generator=to_camel,
+        populate_by_name=True
+    )
+
+    start_date: date
+    count: int
+    total: ScoreStats
+    wrinkle: ScoreStats
+    acne: ScoreStats
+    atopy: ScoreStats
+
+class DiagnosisTrend(BaseModel):
+    model_config = ConfigDict(
+        alias_generator=to_camel,
+        populate_by_name=True
+    )
+
+    granularity: str
+    start_date: date
+    end_date: date
+    buckets: list[DiagnosisTrendBucket]
+
+
+# JSON fast path for the diagnosis endpoints. The TypedDicts mirror the by-alias output of
+# DiagnosisList and DiagnosisDetail, so rows are turned into plain dicts and serialized in one
+# pydantic-core call, without validating models or building the nested computed fields.
+
+class DiagnosisScoreJson(TypedDict):
+    score: int
+
+class DiagnosisSimpleJson(TypedDict):
+    id: str
+    totalScore: int
+    originalImageUrl: str
+    createdAt: datetime
+    wrinkle: DiagnosisScoreJson | None
+    acne: DiagnosisScoreJson | None
+    atopy: DiagnosisScoreJson | None
+
+class DiagnosisListJson(TypedDict):
+    items: list[DiagnosisSimpleJson]
+    nextCursor: str | None
+    totalCount: int | None
+
+class DiagnosisDetailItemJson(TypedDict):
+    score: int
+    imageUrl: str
+    description: str | None
+    recentScores: list[int]
+
+class DiagnosisDetailJson(TypedDict):
+    id: str
+    totalScore: int
+    originalImageUrl: str
+    createdAt: datetime
+    recentScores: list[int]
+    wrinkle: DiagnosisDetailItemJson | None
+    acne: DiagnosisDetailItemJson | None
+    atopy: DiagnosisDetailItemJson | None
+
+diagnosis_list_adapter = TypeAdapter(DiagnosisListJson)
+diagnosis_detail_adapter = TypeAdapter(DiagnosisDetailJson)
+
+
+def dump_diagnosis_list(rows: list[Any], next_cursor: str | None = None, total_count: int | None = None) -> bytes:
+    """
+    Serializes list rows (LIST_COLUMNS rows or Diagnosis objects) to the JSON of a DiagnosisList.
+    """
+    items = [
+        {
+            "id": str(row.id),
+            "totalScore": row.total_score,
+            "originalImageUrl": row.original_image_url,
+            "createdAt": row.created_at,
+            "wrinkle": None if row.wrinkle_score is None else {"score": row.wrinkle_score},
+            "acne": None if row.acne_score is None else {"score": row.acne_score},
+            "atopy": None if row.atopy_score is None else {"score": row.atopy_score},
+        }
+        for row in rows
+    ]
+    return diagnosis_list_adapter.dump_json({"items": items, "nextCursor": next_cursor, "totalCount": total_count})
+
+
+def _detail_item(score: int | None, image_url: str | None, description: str | None, recent: list[int]) -> dict | None:
+    if score is None:
+        return None
+    return {"score": score, "imageUrl": image_url or "", "description": description, "recentScores": recent}
+
+
+def dump_diagnosis_detail(diagnosis: Any, recent_scores: dict[str, list[int]] | None = None) -> bytes:
+    """
+    Serializes a Diagnosis to the JSON of a DiagnosisDetail. The recent score lists come from
+    `recent_scores` (see recent_scores_from_rows) or else from the object's own attributes.
+    """
+    recent = recent_scores or {
+        key: getattr(diagnosis, key, [])
+        for key in ("recent_scores", "recent_wrinkle_scores", "recent_acne_scores", "recent_atopy_scores")
+    }
+    return diagnosis_detail_adapter.dump_json({
+        "id": str(diagnosis.id),
+        "totalScore": diagnosis.total_score,
+        "originalImageUrl": diagnosis.original_image_url,
+        "createdAt": diagnosis.created_at,
+        "recentScores": recent["recent_scores"],
+        "wrinkle": _detail_item(
+            diagnosis.wrinkle_score, diagnosis.wrinkle_image_url,
+            diagnosis.wrinkle_description, recent["recent_wrinkle_scores"]
+        ),
+        "acne": _detail_item(
+            diagnosis.acne_score, diagnosis.acne_image_url,
+            diagnosis.acne_description, recent["recent_acne_scores"]
+        ),
+        "atopy": _detail_item(
+            diagnosis.atopy_score, diagnosis.atopy_image_url,
+            diagnosis.atopy_description, recent["recent_atopy_scores"]
+        ),
+    })
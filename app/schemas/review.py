@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from pydantic.alias_generators import to_camel
 
 
 class ReviewCreate(BaseModel):
@@ -21,5 +22,16 @@ class ReviewResponse(BaseModel):
 
 
 class ReviewList(BaseModel):
+    """
+    A page of /reviews. The page keys are camelCase like /diagnoses/results, so clients share
+    one pagination code path: pass `nextCursor` back as `cursor` (the count is `totalCount`).
+    The reviews themselves keep their snake_case keys.
+    """
+    model_config = ConfigDict(
+        alias_generator=to_camel,
+        populate_by_name=True
+    )
+
     reviews: list[ReviewResponse]
-    total_count: int
\ No newline at end of file
+    total_count: Optional[int] = None
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+Multi-worker launcher that loads the AI models once and forks the workers.
+
+With `uvicorn --workers N` every worker imports the app and loads its own
+copy of the YOLO models, so memory grows with the worker count. Here the
+master process imports the app, prepares the models and forks N workers
+that share the model memory copy-on-write. The master keeps the listening
+socket and replaces workers that exit.
+
+    python -m app.server --workers 4
+    python -m app.server --host 0.0.0.0 --port 8000 --workers 4 --threads-per-worker 2
+
+Metrics are kept per worker. With METRICS_PORT set, worker i serves its
+own metrics on METRICS_PORT + i (a replacement worker takes over the port
+of the one it replaces); add every port as a Prometheus target and sum
+across them, e.g. `sum without (instance) (rate(diagnosis_errors_total[5m]))`.
+/metrics on the API port only shows the worker that answered.
+
+Linux/macOS only (requires os.fork). Run the migrations (python -m app.initial_data) first.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+from app.core.config import settings
+from app.core.logging import setup_logging, stop_logging
+
+logger = logging.getLogger(__name__)
+
+# A worker that dies sooner than this after starting is not restarted in a tight loop
+MIN_WORKER_LIFETIME_SECONDS = 5
+
+
+class PreforkServer:
+    """
+    Master process: owns the socket, forks the workers and restarts them when they exit.
+    """
+
+    def __init__(self, app, sock: socket.socket, workers: int, threads_per_worker: int, uvicorn_options: dict):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.uvicorn_options = uvicorn_options
+        # pid -> (worker index, start time)
+        self.children: dict[int, tuple[int, float]] = {}
+        self.stopping = False
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        for index in range(self.workers):
+            self._spawn(index)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+
+            child = self.children.pop(pid, None)
+            if child is None or self.stopping:
+                continue
+            index, started_at = child
+
+            exit_code = os.waitstatus_to_exitcode(status)
+            # Exit code 0 is a worker recycled by its memory governor
+            log = logger.info if exit_code == 0 else logger.warning
+            log("Worker %s exited with code %s", pid, exit_code)
+            if time.monotonic() - started_at < MIN_WORKER_LIFETIME_SECONDS:
+                time.sleep(MIN_WORKER_LIFETIME_SECONDS)
+            if not self.stopping:
+                self._spawn(index)
+
+        self.sock.close()
+
+    def _spawn(self, index: int) -> None:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = (index, time.monotonic())
+            logger.info("Started worker %s", pid)
+            return
+
+        # Child
+        exit_code = 0
+        try:
+            self._run_worker(index)
+        except BaseException:
+            logger.exception("Worker %s crashed", os.getpid())
+            exit_code = 1
+        finally:
+            # os._exit skips atexit handlers; write the queued log records first
+            stop_logging()
+            os._exit(exit_code)
+
+    def _run_worker(self, index: int) -> None:
+        import torch
+        import uvicorn
+
+        from app.core import metrics
+
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+        # Objects frozen by the master stay out of collection, so the collector does not write to their pages
+        gc.enable()
+        torch.set_num_threads(self.threads_per_worker)
+
+        if settings.METRICS_PORT:
+            metrics.start_http_server(settings.METRICS_PORT + index)
+
+        config = uvicorn.Config(self.app, **self.uvicorn_options)
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def _handle_stop(self, signum, frame) -> None:
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with N workers sharing one copy of the AI models.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", 2)))
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        default=0,
+        help="torch intra-op threads per worker (default: CPU count / workers)"
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        parser.error("the prefork server requires os.fork; use uvicorn on this platform")
+
+    setup_logging(level=args.log_level)
+    threads_per_worker = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+
+    # Before the app is imported below: process-local caches are only enabled for a single worker
+    settings.WEB_CONCURRENCY = args.workers
+
+    # Nothing allocated while loading needs collecting, and skipped collections keep pages clean
+    gc.disable()
+
+    import torch
+
+    # Keep the master single-threaded so no OpenMP pool exists when the workers are forked
+    torch.set_num_threads(1)
+
+    from app.main import app
+    from app.services import diagnosis_service
+
+    diagnosis_service.prepare_models_for_fork()
+
+    # Move everything loaded so far to the permanent generation before forking
+    gc.collect()
+    gc.freeze()
+
+    sock = _bind(args.host, args.port)
+    logger.info("Listening on %s:%s with %s workers", args.host, args.port, args.workers)
+
+    PreforkServer(
+        app,
+        sock,
+        workers=args.workers,
+        threads_per_worker=threads_per_worker,
+        # Keep the app's logging setup; uvicorn would otherwise install its own console handlers
+        uvicorn_options={"log_level": args.log_level, "log_config": None},
+    ).run()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
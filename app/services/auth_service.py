@@ -1,16 +1,24 @@
+import hashlib
+import secrets
+import time
 from datetime import datetime, timedelta
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jwt import ExpiredSignatureError, InvalidSignatureError, PyJWTError, decode, encode
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 
+from app.core.cache import MemoryCache, user_cache
 from app.core.config import settings
+from app.core.logging import bind_log_context
 from app.db.session import get_db
 from app.models.user import User
 
 security = HTTPBearer()
 
+# Verified access token claims, keyed by token hash. Only valid tokens are cached.
+_claims_cache = MemoryCache(maxsize=settings.AUTH_CACHE_MAXSIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
 
 def create_access_token(data: dict) -> str:
     """
@@ -47,30 +55,66 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"}
     )
     token = credentials.credentials
+    user_id = _verify_access_token(token, credentials_exception)
+    bind_log_context(user_id=user_id)
 
-    try:
-        payload = decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        
-    except ExpiredSignatureError:
-        # Custom detail for expired token
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail={"type": "token_expired", "msg": "Token has expired"},
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    except (InvalidSignatureError, PyJWTError):
-        raise credentials_exception
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        # Rebuild the user without a query and attach it to this request's session
+        user = User(**cached)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
 
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise credentials_exception
-        
+
+    # The password hash is left out; it is loaded on access if ever needed
+    user_cache.set(user_id, {"id": user.id, "email": user.email, "username": user.username})
     return user
 
 
+def _verify_access_token(token: str, credentials_exception: HTTPException) -> str:
+    """
+    Verifies an access token and returns the user ID (sub).
+    Verified claims are cached until the token expires.
+    """
+    token_key = hashlib.sha256(token.encode()).hexdigest()
+    claims = _claims_cache.get(token_key)
+
+    if claims is None:
+        try:
+            payload = decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except ExpiredSignatureError:
+            raise _token_expired_exception()
+        except (InvalidSignatureError, PyJWTError):
+            raise credentials_exception
+
+        if payload.get("sub") is None:
+            raise credentials_exception
+
+        claims = {"sub": payload["sub"], "exp": payload.get("exp")}
+        ttl = settings.AUTH_CACHE_TTL_SECONDS
+        if claims["exp"] is not None:
+            ttl = min(ttl, claims["exp"] - time.time())
+        if ttl > 0:
+            _claims_cache.set(token_key, claims, ttl=ttl)
+
+    if claims["exp"] is not None and claims["exp"] <= time.time():
+        raise _token_expired_exception()
+
+    return claims["sub"]
+
+
+def _token_expired_exception() -> HTTPException:
+    # Custom detail for expired token
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail={"type": "token_expired", "msg": "Token has expired"},
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
 def verify_refresh_token(token: str, credentials_exception: HTTPException) -> str:
     """
     Verifies a refresh token and returns the user ID (sub).
@@ -82,4 +126,16 @@ def verify_refresh_token(token: str, credentials_exception: HTTPException) -> st
             raise credentials_exception
         return user_id
     except PyJWTError:
-        raise credentials_exception
\ No newline at end of file
+        raise credentials_exception
+
+
+def require_admin(x_admin_token: str | None = Header(None)) -> None:
+    """
+    A FastAPI dependency for operator endpoints: requires an X-Admin-Token header matching ADMIN_TOKEN.
+    Operator endpoints are disabled while ADMIN_TOKEN is empty.
+    """
+    if not settings.ADMIN_TOKEN or not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"type": "forbidden", "msg": "Admin token required"}
+        )
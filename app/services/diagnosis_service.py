@@ -4,52 +4,157 @@ import numpy as np
 import base64
 import uuid
 import io
+import logging
+import math
 import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
 from datetime import datetime
+from typing import BinaryIO
 
 import httpx
-from ultralytics import YOLO
 from fastapi import UploadFile, HTTPException
 from sqlalchemy.orm import Session
 from PIL import Image, ImageOps
 
+from app.core import metrics, tracing
+from app.core.memory import rss_sampler
 from app.core.config import settings
 from app.crud import crud_diagonsis
+from app.services.model_registry import ModelRegistry, ModelSet
+from app.services.resolution_controller import resolution_controller
+from app.services.upload_service import ingest_upload, validate_image
+from app.services.diagnosis_writer import diagnosis_writer
+
+logger = logging.getLogger(__name__)
 
 # Threshold for calculating wrinkle score 
 MAX_WRINKLE_RATIO_THRESHOLD = 0.1 
 
-# Relative path to the current file directory
-CURRENT_FILE_DIR = Path(__file__).resolve().parent
+# Largest downsampling stride of the YOLOv8 models; inference sizes must be multiples of it
+MODEL_STRIDE = 32
+
+# Optional fast face-detection pass before the YOLO face model
+HAAR_CASCADE_PATH = str(Path(__file__).resolve().parent / "weights" / "haarcascade_frontalface_default.xml")
+_haar_local = threading.local()
+
+# Pre-load AI models; the registry swaps in new weights without a restart
+model_registry = ModelRegistry(settings.MODEL_WEIGHTS_DIR, poll_interval=settings.MODEL_RELOAD_POLL_SECONDS)
+model_registry.reload()
+
+# Pipeline metrics, served at /metrics
+stage_latency = metrics.histogram(
+    "diagnosis_stage_seconds", "Time spent in each stage of the diagnosis pipeline.", ("stage",)
+)
+diagnosis_latency = metrics.histogram(
+    "diagnosis_duration_seconds", "End-to-end diagnosis latency, from reading the upload to the saved row."
+)
+diagnosis_errors = metrics.counter(
+    "diagnosis_errors_total", "Failed diagnoses and degraded LLM calls by error type.", ("type",)
+)
+# Stage durations of the current diagnosis in ms, shared with the threads it runs in
+_stage_timings: ContextVar[dict | None] = ContextVar("stage_timings", default=None)
+diagnoses_in_flight = metrics.gauge("diagnosis_in_flight", "Diagnoses currently in the pipeline.")
+executor_queue_depth = metrics.gauge(
+    "diagnosis_executor_queue_depth", "Diagnoses waiting for a worker thread to start their pipeline."
+)
+diagnosis_rss_growth = metrics.histogram(
+    "diagnosis_peak_rss_growth_bytes",
+    "Peak process RSS during a diagnosis, minus the RSS when it started.",
+    buckets=tuple(2 ** power * 1024 * 1024 for power in range(2, 13))  # 4 MB to 4 GB
+)
+
+
+def prepare_models_for_fork() -> None:
+    """
+    Puts the loaded models in the state inference needs, before worker processes are forked.
+    Fused, in eval mode and with gradients off, predict() never writes to the weights, so
+    workers keep sharing the master's pages. On CPU the weights are also moved to shared
+    memory, so they stay shared even if other objects on the same pages are written.
+    Versions loaded later by a worker's hot reload are private to that worker.
+    Uses reload() rather than `current`, so the master starts no watcher thread;
+    each worker starts its own on first use.
+    """
+    for model in model_registry.reload().all():
+        model.fuse()
+        model.model.eval()
+        model.model.requires_grad_(False)
+        if settings.AI_DEVICE == "cpu":
+            model.model.share_memory()
 
-# Pre-load AI models
-FACE_MODEL_PATH = f"{CURRENT_FILE_DIR}/weights/yolov8n-face-lindevs.pt"
-WRINKLE_WEIGHT_PATH = f"{CURRENT_FILE_DIR}/weights/wrinkle.pt"
-ACNE_WEIGHT_PATH = f"{CURRENT_FILE_DIR}/weights/acne.pt"
-ATOPY_WEIGHT_PATH = f"{CURRENT_FILE_DIR}/weights/atopy.pt"
 
-for path in [FACE_MODEL_PATH, WRINKLE_WEIGHT_PATH, ACNE_WEIGHT_PATH, ATOPY_WEIGHT_PATH]:
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Weight file not found: {path}")
+@contextmanager
+def _stage(name: str):
+    """
+    Times a pipeline stage in the stage histogram, in a trace span of the same name and in the
+    diagnosis's log record. Stages that run more than once add up.
+    """
+    start = time.perf_counter()
+    try:
+        with tracing.span(name):
+            yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_latency.observe(elapsed, stage=name)
+        timings = _stage_timings.get()
+        if timings is not None:
+            timings[name] = round(timings.get(name, 0.0) + elapsed * 1000, 1)
+
+
+@contextmanager
+def _track_diagnosis():
+    """
+    Counts a diagnosis as in flight, times it end to end, records its peak RSS growth
+    and its error type if it fails, and logs one record with its stage timings.
+    """
+    timings = {}
+    timings_token = _stage_timings.set(timings)
+    start = time.perf_counter()
+    error = None
+    with tracing.span("diagnosis") as diagnosis_span, diagnoses_in_flight.track_inprogress():
+        try:
+            with rss_sampler.track() as usage:
+                yield
+        except HTTPException as e:
+            error = f"http_{e.status_code}"
+            raise
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            _stage_timings.reset(timings_token)
+            duration = time.perf_counter() - start
+            diagnosis_latency.observe(duration)
+            diagnosis_rss_growth.observe(usage.growth)
+            diagnosis_span.set_attribute("memory.peak_rss_growth", usage.growth)
+            fields = {
+                "duration_ms": round(duration * 1000, 1),
+                "stage_ms": timings,
+                "peak_rss_growth": usage.growth,
+            }
+            if error is None:
+                logger.info("Diagnosis finished", extra=fields)
+            else:
+                diagnosis_errors.inc(type=error)
+                logger.warning("Diagnosis failed: %s", error, extra=fields | {"error": error})
 
-print("Loading AI models into memory...")
-FACE_MODEL = YOLO(FACE_MODEL_PATH)
-WRINKLE_MODEL = YOLO(WRINKLE_WEIGHT_PATH)
-ACNE_MODEL = YOLO(ACNE_WEIGHT_PATH)
-ATOPY_MODEL = YOLO(ATOPY_WEIGHT_PATH)
-print("All models loaded successfully.")
 
-def calculate_score(masks: np.ndarray) -> int:
+def calculate_score(masks: np.ndarray, region: tuple[int, int, int, int] | None = None) -> int:
     """
     Calculates a score (0-100) based on YOLO mask data.
     100 = No issue detected.
-    0 = Issue covers >= MAX_WRINKLE_RATIO_THRESHOLD of the image.
+    0 = Issue covers >= MAX_WRINKLE_RATIO_THRESHOLD of the image (or of `region`, an (x1, y1, x2, y2) box).
     """
     if masks is None or masks.size == 0:
         return 100  # No masks detected, perfect score
 
     combined_mask = np.any(masks, axis=0)
+    if region is not None:
+        x1, y1, x2, y2 = region
+        combined_mask = combined_mask[y1:y2, x1:x2]
     white_pixels = np.sum(combined_mask)
     total_pixels = combined_mask.shape[0] * combined_mask.shape[1]
 
@@ -62,57 +167,67 @@ def calculate_score(masks: np.ndarray) -> int:
     return int(np.clip(score, 0, 100))
 
 
+def render_overlay(image: np.ndarray, masks: np.ndarray | None) -> np.ndarray:
+    """
+    Blends the masks in white over a BGR image and returns the BGR overlay.
+    """
+    img_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    combined_mask_viz = np.zeros_like(img_rgb, dtype=np.uint8)
+
+    if masks is not None:
+        for mask in masks:
+            color = (255, 255, 255) # Use white for all masks
+            combined_mask_viz[mask.astype(bool)] = color
+
+    overlay = cv2.addWeighted(img_rgb, 0.6, combined_mask_viz, 0.4, 0)
+    return cv2.cvtColor(overlay, cv2.COLOR_RGB2BGR)
+
+
 def _run_yolo_segmentation(
     img_path: str,
     output_dir: str,
-    weight_path: str,
+    models: ModelSet,
     analysis_type: str,
     img_size: int = settings.IMG_SIZE,
-    device: str = settings.AI_DEVICE
+    device: str = settings.AI_DEVICE,
+    face_region: tuple[int, int, int, int] | None = None
 ) -> tuple[str | None, int]:
     """
     Returns the overlay image path and the calculated score.
+    With a face_region (ROI mode), the image is inferred at its own size and scored over that region only.
     """
-    if not os.path.exists(weight_path):
-        raise FileNotFoundError(f"Weight not found: {weight_path}")
-    
-    if analysis_type == "wrinkle":
-        model = WRINKLE_MODEL
-    elif analysis_type == "acne":
-        model = ACNE_MODEL
-    elif analysis_type == "atopy":
-        model = ATOPY_MODEL
-    else:
+    model = models.segmentation.get(analysis_type)
+    if model is None:
         raise ValueError(f"Unknown analysis type: {analysis_type}")
     
-    results = model.predict(source=img_path, conf=0.25, imgsz=img_size, device=device, save=False, show=False)
+    predict_options = {}
+    if face_region is not None:
+        # ROI crops are not square: letterbox only to the stride
+        predict_options["rect"] = True
+    if face_region is not None or img_size != settings.IMG_SIZE:
+        # Return masks at image size rather than tensor size
+        predict_options["retina_masks"] = True
 
-    result = results[0]
+    with _stage(f"segmentation_{analysis_type}"):
+        results = model.predict(source=img_path, conf=0.25, imgsz=img_size, device=device, save=False, show=False, **predict_options)
 
-    img_rgb = cv2.cvtColor(result.orig_img, cv2.COLOR_BGR2RGB)
-    combined_mask_viz = np.zeros_like(img_rgb, dtype=np.uint8)
+    result = results[0]
 
+    masks = None
     if result.masks is None:
-        print(f"No {analysis_type} masks found. Creating black overlay.")
+        logger.debug("No %s masks found. Creating black overlay.", analysis_type)
         score = 100
     else:
-        print(f"Found {len(result.masks)} {analysis_type} masks.")
+        logger.debug("Found %s %s masks.", len(result.masks), analysis_type)
         masks = result.masks.data.cpu().numpy()
-        
-        for mask in masks:
-            color = (255, 255, 255) # Use white for all masks
-            combined_mask_viz[mask.astype(bool)] = color
-
-        score = calculate_score(masks)
+        score = calculate_score(masks, face_region)
 
-    overlay = cv2.addWeighted(img_rgb, 0.6, combined_mask_viz, 0.4, 0)
-    
     os.makedirs(output_dir, exist_ok=True)
     filename = f"{analysis_type}_{os.path.basename(img_path)}"
     output_path = os.path.join(output_dir, filename)
     
-    overlay_bgr = cv2.cvtColor(overlay, cv2.COLOR_RGB2BGR)
-    cv2.imwrite(output_path, overlay_bgr)
+    with _stage("overlay_encode"):
+        cv2.imwrite(output_path, render_overlay(result.orig_img, masks))
     
     return output_path, score
 
@@ -158,8 +273,9 @@ def run_skin_analysis(
     }
 
     try:
-        with httpx.Client() as client:
-            response_en = client.post(ollama_api_url, json=payload_en, timeout=60.0)
+        with httpx.Client(transport=tracing.TracingTransport()) as client:
+            with _stage("llm_advice"):
+                response_en = client.post(ollama_api_url, json=payload_en, timeout=60.0)
             response_en.raise_for_status() 
             
             english_advice = response_en.json()["message"]["content"].strip()
@@ -182,19 +298,23 @@ def run_skin_analysis(
                 ],
             }
             
-            response_ko = client.post(ollama_api_url, json=payload_ko, timeout=30.0)
+            with _stage("llm_translate"):
+                response_ko = client.post(ollama_api_url, json=payload_ko, timeout=30.0)
             response_ko.raise_for_status()
             
             return response_ko.json()["message"]["content"].strip()
     
     except httpx.HTTPStatusError as e:
-        print(f"Ollama API request failed with status {e.response.status_code}: {e.response.text}")
+        diagnosis_errors.inc(type="ollama_http")
+        logger.warning("Ollama API request failed with status %s: %s", e.response.status_code, e.response.text)
         return f"피부 LLM 분석 중 API 오류가 발생했습니다."
     except httpx.RequestError as e:
-        print(f"Error connecting to Ollama service at {e.request.url!r}: {e}")
+        diagnosis_errors.inc(type="ollama_connection")
+        logger.warning("Error connecting to Ollama service at %r: %s", e.request.url, e)
         return f"피부 LLM 분석 중 오류가 발생했습니다."
     except Exception as e:
-        print(f"An unexpected error occurred during skin analysis: {e}")
+        diagnosis_errors.inc(type="ollama")
+        logger.exception("An unexpected error occurred during skin analysis: %s", e)
         return f"피부 LLM 분석 중 오류가 발생했습니다."
 
 
@@ -216,38 +336,93 @@ def resize_and_save_image(
         
     resized_image.save(save_path, format="JPEG", quality=95)
 
-def _run_sync_processing(
-    db: Session, 
-    contents: bytes, 
-    user_id: str
-):
+def _decode_image(source: BinaryIO, min_short_side: int | None = None) -> tuple[Image.Image, float]:
     """
-    Handles all heavy, synchronous processing (IO, CPU, AI models).
-    Designed to be run in a separate thread via asyncio.to_thread.
+    Decodes an upload, read from the start of `source`, to an RGB image with its EXIF orientation applied.
+    With min_short_side, JPEGs are decoded by libjpeg at the smallest 1/2, 1/4 or 1/8 scale whose
+    short side is still at least min_short_side. Other formats are always decoded exactly.
+    Returns the image and its scale relative to the full-size image.
     """
-    # Bytes -> PIL Image -> CV2 Image to run face detection with OpenCV
-    try:
-        pil_image = Image.open(io.BytesIO(contents))
-        pil_image_rgb = pil_image.convert('RGB')
-    except Exception as e:
-        print(f"Image decoding failed: {e}")
-        raise HTTPException(status_code=400, detail="이미지 파일을 처리할 수 없습니다.")
+    source.seek(0)
+    image = Image.open(source)
+    full_width = image.width
 
-    # Face detection
-    results = FACE_MODEL.predict(
-        source=pil_image_rgb, 
+    if min_short_side and image.format == "JPEG" and min(image.size) > min_short_side:
+        ratio = min_short_side / min(image.size)
+        image.draft("RGB", (math.ceil(image.width * ratio), math.ceil(image.height * ratio)))
+
+    scale = image.width / full_width
+    image = ImageOps.exif_transpose(image)
+    return image.convert("RGB"), scale
+
+
+def _detect_face(models: ModelSet, image: Image.Image) -> tuple[int, int, int, int] | None:
+    """
+    Returns the (x1, y1, x2, y2) box of the first detected face in image coordinates, or None.
+    Detection runs on a copy whose long side is at most FACE_DETECTION_MAX_SIZE; the YOLO face
+    model letterboxes to 640 anyway, so a larger copy only costs conversion time.
+    """
+    scale = min(1.0, settings.FACE_DETECTION_MAX_SIZE / max(image.size))
+    small_image = image
+    if scale < 1.0:
+        small_image = image.resize(
+            (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+            Image.Resampling.BILINEAR,
+            reducing_gap=2.0
+        )
+
+    box = _detect_face_haar(small_image) if settings.FACE_DETECTION_HAAR else None
+    if box is None:
+        box = _detect_face_yolo(models, small_image)
+    if box is None:
+        return None
+
+    # Map back to full resolution
+    scale_x = image.width / small_image.width
+    scale_y = image.height / small_image.height
+    (x1, y1, x2, y2) = box
+    return (
+        max(0, int(x1 * scale_x)),
+        max(0, int(y1 * scale_y)),
+        min(image.width, int(round(x2 * scale_x))),
+        min(image.height, int(round(y2 * scale_y))),
+    )
+
+
+def _detect_face_yolo(models: ModelSet, image: Image.Image) -> tuple[int, int, int, int] | None:
+    results = models.face.predict(
+        source=image, 
         device=settings.AI_DEVICE, 
         conf=0.5, # 신뢰도 50% 이상만 '얼굴'로 인정
         verbose=False
     )
-
-    # No faces detected
     if len(results[0].boxes) == 0:
-        raise HTTPException(status_code=400, detail="얼굴을 찾을 수 없습니다. 정면 사진을 업로드해주세요.")
+        return None
+    return tuple(map(int, results[0].boxes[0].xyxy[0].cpu().numpy()))
 
-    # Crop to the first detected face
-    box = results[0].boxes[0]
-    (x1, y1, x2, y2) = map(int, box.xyxy[0].cpu().numpy())
+
+def _detect_face_haar(image: Image.Image) -> tuple[int, int, int, int] | None:
+    # CascadeClassifier instances are not shared between threads
+    classifier = getattr(_haar_local, "classifier", None)
+    if classifier is None:
+        classifier = _haar_local.classifier = cv2.CascadeClassifier(HAAR_CASCADE_PATH)
+
+    gray = cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2GRAY)
+    min_face = max(24, min(gray.shape) // 8)
+    faces = classifier.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(min_face, min_face))
+    if len(faces) == 0:
+        return None
+
+    # Largest face
+    (x, y, w, h) = max(faces, key=lambda face: face[2] * face[3])
+    return (int(x), int(y), int(x + w), int(y + h))
+
+
+def _crop_face_fixed(image: Image.Image, face_box: tuple[int, int, int, int]) -> Image.Image:
+    """
+    Crops an IMG_SIZE square centered on the face, on a black canvas where it leaves the image.
+    """
+    (x1, y1, x2, y2) = face_box
 
     # Center of the face box
     center_x = (x1 + x2) // 2
@@ -261,7 +436,7 @@ def _run_sync_processing(
     right = center_x + half_size
     bottom = center_y + half_size
 
-    cropped_pil_image = pil_image_rgb.crop((left, top, right, bottom))
+    cropped_pil_image = image.crop((left, top, right, bottom))
 
     # Center the cropped image on a black canvas if it's smaller than crop_size
     if cropped_pil_image.width != crop_size or cropped_pil_image.height != crop_size:
@@ -269,9 +444,114 @@ def _run_sync_processing(
         paste_x = (crop_size - cropped_pil_image.width) // 2
         paste_y = (crop_size - cropped_pil_image.height) // 2
         final_image.paste(cropped_pil_image, (paste_x, paste_y))
-        resized_image = final_image
+        return final_image
+
+    return cropped_pil_image
+
+
+def _crop_face_roi(
+    image: Image.Image, 
+    face_box: tuple[int, int, int, int]
+) -> tuple[Image.Image, tuple[int, int, int, int]]:
+    """
+    Crops the face box plus INFERENCE_ROI_MARGIN on each side, clamped to the image, and
+    downscales it so the long side is at most IMG_SIZE. Never pads or upscales.
+    Returns the crop and the face box in crop coordinates.
+    """
+    (x1, y1, x2, y2) = face_box
+    margin_x = int((x2 - x1) * settings.INFERENCE_ROI_MARGIN)
+    margin_y = int((y2 - y1) * settings.INFERENCE_ROI_MARGIN)
+
+    left = max(0, x1 - margin_x)
+    top = max(0, y1 - margin_y)
+    right = min(image.width, x2 + margin_x)
+    bottom = min(image.height, y2 + margin_y)
+    roi_image = image.crop((left, top, right, bottom))
+
+    scale = min(1.0, settings.IMG_SIZE / max(roi_image.size))
+    if scale < 1.0:
+        roi_image = roi_image.resize(
+            (max(1, round(roi_image.width * scale)), max(1, round(roi_image.height * scale))),
+            Image.Resampling.LANCZOS
+        )
+
+    face_region = (
+        int((max(x1, left) - left) * scale),
+        int((max(y1, top) - top) * scale),
+        int((min(x2, right) - left) * scale),
+        int((min(y2, bottom) - top) * scale),
+    )
+    return roi_image, face_region
+
+
+def _stride_align(size: int) -> int:
+    # Smallest multiple of the model stride that holds `size` pixels
+    return -(-size // MODEL_STRIDE) * MODEL_STRIDE
+
+
+def _run_sync_processing(
+    source: BinaryIO, 
+    user_id: str,
+    queued_at: float | None = None
+) -> dict:
+    """
+    Handles all heavy, synchronous processing (IO, CPU, AI models).
+    Designed to be run in a separate thread via asyncio.to_thread.
+    queued_at is the time.monotonic() at which the diagnosis started waiting for a thread or worker.
+    Returns the keyword arguments for crud_diagonsis.create_diagnosis.
+    """
+    if queued_at is not None:
+        queue_wait = time.monotonic() - queued_at
+        stage_latency.observe(queue_wait, stage="queue_wait")
+        resolution_controller.observe(queue_wait)
+
+    roi_mode = settings.INFERENCE_CROP_MODE == "roi"
+
+    # File -> PIL Image. ROI crops are downscaled to IMG_SIZE anyway, so large JPEGs can be decoded at a reduced scale;
+    # fixed crops are taken in source pixels and need the full image
+    try:
+        with _stage("decode"):
+            pil_image_rgb, decode_scale = _decode_image(source, min_short_side=settings.IMG_SIZE if roi_mode else None)
+    except Exception as e:
+        logger.info("Image decoding failed: %s", e)
+        raise HTTPException(status_code=400, detail="이미지 파일을 처리할 수 없습니다.")
+
+    # One model version for the whole diagnosis, even if new weights are published meanwhile
+    models = model_registry.current
+
+    # Face detection
+    with _stage("face_detection"):
+        face_box = _detect_face(models, pil_image_rgb)
+
+    # No faces detected
+    if face_box is None:
+        raise HTTPException(status_code=400, detail="얼굴을 찾을 수 없습니다. 정면 사진을 업로드해주세요.")
+
+    # A small face in a reduced decode may leave the ROI under IMG_SIZE: decode again at the scale it needs
+    if roi_mode and decode_scale < 1.0:
+        (x1, y1, x2, y2) = face_box
+        roi_long_side = max(x2 - x1, y2 - y1) * (1 + 2 * settings.INFERENCE_ROI_MARGIN)
+        if roi_long_side < settings.IMG_SIZE:
+            needed_short_side = math.ceil(min(pil_image_rgb.size) * settings.IMG_SIZE / roi_long_side)
+            with _stage("decode"):
+                redecoded_image, _ = _decode_image(source, min_short_side=needed_short_side)
+            factor = redecoded_image.width / pil_image_rgb.width
+            face_box = tuple(int(value * factor) for value in face_box)
+            pil_image_rgb = redecoded_image
+
+    # Crop to the first detected face
+    if roi_mode:
+        resized_image, face_region = _crop_face_roi(pil_image_rgb, face_box)
+        inference_size = _stride_align(max(resized_image.size))
     else:
-        resized_image = cropped_pil_image
+        resized_image, face_region = _crop_face_fixed(pil_image_rgb, face_box), None
+        inference_size = settings.IMG_SIZE
+
+    # Segmentation resolution per model, stepped down by the controller under load
+    resolutions = {
+        analysis_type: min(inference_size, _stride_align(resolution_controller.resolution(analysis_type)))
+        for analysis_type in models.segmentation
+    }
 
     # Create directories
     uid = str(uuid.uuid4())
@@ -280,7 +560,8 @@ def _run_sync_processing(
     original_image_url = f"{settings.STATIC_URL_PREFIX}/{user_id}/{filename}"
 
     original_save_path.parent.mkdir(parents=True, exist_ok=True)
-    resized_image.save(original_save_path, format="JPEG", quality=95)
+    with _stage("crop_encode"):
+        resized_image.save(original_save_path, format="JPEG", quality=95)
     original_save_path_str = str(original_save_path)
     
     analysis_data = {}
@@ -290,14 +571,15 @@ def _run_sync_processing(
 
     # Wrinkle Analysis
     wrinkle_dir = str(settings.STATIC_DIR / user_id / uid / "wrinkle")
-    wrinkle_weight = f"{CURRENT_FILE_DIR}/weights/wrinkle.pt"
     
     wrinkle_path, wrinkle_score = _run_yolo_segmentation(
         img_path=original_save_path_str,
         output_dir=wrinkle_dir,
-        weight_path=wrinkle_weight,
+        models=models,
         analysis_type="wrinkle",
-        device=settings.AI_DEVICE
+        img_size=resolutions["wrinkle"],
+        device=settings.AI_DEVICE,
+        face_region=face_region
     )
     wrinkle_url = f"{settings.STATIC_URL_PREFIX}/{user_id}/{uid}/wrinkle/{Path(wrinkle_path).name}" if wrinkle_path else original_image_url
 
@@ -309,14 +591,15 @@ def _run_sync_processing(
 
     # Acne Analysis
     acne_dir = str(settings.STATIC_DIR / user_id / uid / "acne")
-    acne_weight = f"{CURRENT_FILE_DIR}/weights/acne.pt"
     
     acne_path, acne_score = _run_yolo_segmentation(
         img_path=original_save_path_str,
         output_dir=acne_dir,
-        weight_path=acne_weight,
+        models=models,
         analysis_type="acne",
-        device=settings.AI_DEVICE
+        img_size=resolutions["acne"],
+        device=settings.AI_DEVICE,
+        face_region=face_region
     )
     acne_url = f"{settings.STATIC_URL_PREFIX}/{user_id}/{uid}/acne/{Path(acne_path).name}" if acne_path else original_image_url
     
@@ -328,14 +611,15 @@ def _run_sync_processing(
 
     # Atopy Analysis
     atopy_dir = str(settings.STATIC_DIR / user_id / uid / "atopy")
-    atopy_weight = f"{CURRENT_FILE_DIR}/weights/atopy.pt"
     
     atopy_path, atopy_score = _run_yolo_segmentation(
         img_path=original_save_path_str,
         output_dir=atopy_dir,
-        weight_path=atopy_weight,
+        models=models,
         analysis_type="atopy",
-        device=settings.AI_DEVICE
+        img_size=resolutions["atopy"],
+        device=settings.AI_DEVICE,
+        face_region=face_region
     )
     atopy_url = f"{settings.STATIC_URL_PREFIX}/{user_id}/{uid}/atopy/{Path(atopy_path).name}" if atopy_path else original_image_url
 
@@ -345,19 +629,46 @@ def _run_sync_processing(
         "atopy_description": description,
     })
 
-    # Calculate total score and save to DB
+    # Calculate total score
     total_score = (wrinkle_score + acne_score + atopy_score) // 3
     created_at = datetime.now()
     
-    db_diagnosis = crud_diagonsis.create_diagnosis(
-        db=db,
-        user_id=user_id,
-        original_image_url=original_image_url,
-        created_at=created_at,
-        total_score=total_score,
+    return {
+        "user_id": user_id,
+        "original_image_url": original_image_url,
+        "created_at": created_at,
+        "total_score": total_score,
+        "model_version": models.version,
+        "inference_resolution": ";".join(f"{name}={size}" for name, size in resolutions.items()),
         **analysis_data  # ❗️ Unpack all results
-    )
-    return db_diagnosis
+    }
+
+
+def run_diagnosis(
+    db: Session, 
+    source: BinaryIO, 
+    user_id: str,
+    queued_at: float | None = None
+):
+    """
+    Synchronous counterpart of process_diagnosis, used by the inference worker (app.worker).
+    The spool file is checked again before any pixels are decoded.
+    """
+    with _track_diagnosis():
+        with _stage("upload"):
+            validate_image(source)
+        diagnosis_values = _run_sync_processing(source, user_id, queued_at)
+
+        with _stage("db_commit"):
+            if settings.DIAGNOSIS_WRITE_BEHIND:
+                return diagnosis_writer.submit(diagnosis_values).result()
+            return crud_diagonsis.create_diagnosis(db, **diagnosis_values)
+
+
+def _run_queued_processing(source: BinaryIO, user_id: str, queued_at: float) -> dict:
+    # Runs on the executor thread: the diagnosis is no longer waiting for one
+    executor_queue_depth.dec()
+    return _run_sync_processing(source, user_id, queued_at)
 
 
 async def process_diagnosis(
@@ -367,15 +678,26 @@ async def process_diagnosis(
 ):
     """
     Main async service function called by the endpoint.
-    Reads file asynchronously, then runs all blocking 
-    processing in a separate thread.
+    Validates the upload from its header, then runs all blocking 
+    processing in a separate thread on the spooled file.
     """
-    # 1. (Async) Read file contents
-    contents = await file.read()
-    
-    # 2. (Sync in Thread) Run all blocking IO and AI tasks
-    db_diagnosis = await asyncio.to_thread(
-        _run_sync_processing, db, contents, user_id
-    )
-
-    return db_diagnosis
\ No newline at end of file
+    with _track_diagnosis():
+        # 1. (Async) Check size, format and pixel count without decoding or copying the file
+        with _stage("upload"):
+            source = await ingest_upload(file)
+        
+        # 2. (Sync in Thread) Run all blocking IO and AI tasks
+        executor_queue_depth.inc()
+        diagnosis_values = await asyncio.to_thread(
+            _run_queued_processing, source, user_id, time.monotonic()
+        )
+
+        # 3. Save to DB, either batched with other requests or in its own transaction
+        with _stage("db_commit"):
+            if settings.DIAGNOSIS_WRITE_BEHIND:
+                return await asyncio.wrap_future(diagnosis_writer.submit(diagnosis_values))
+
+            db_diagnosis = await asyncio.to_thread(
+                crud_diagonsis.create_diagnosis, db, **diagnosis_values
+            )
+        return db_diagnosis
@@ -0,0 +1,130 @@
+import logging
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import crud_diagonsis
+from app.db.session import SessionLocal
+from app.models.diagnosis import Diagnosis
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class DiagnosisBatchWriter:
+    """
+    Write-behind writer that groups diagnoses finished by concurrent requests into one transaction.
+
+    A batch is written when it reaches `batch_size` rows or `interval` seconds after its first row,
+    whichever comes first, so one commit (and one fsync on the database server) covers the whole batch.
+    Callers get a Future that resolves to the saved Diagnosis once its batch is committed.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: int = settings.DIAGNOSIS_WRITE_BATCH_SIZE,
+        interval: float = settings.DIAGNOSIS_WRITE_INTERVAL_MS / 1000
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, values: dict) -> Future:
+        """
+        Queues the keyword arguments of crud_diagonsis.create_diagnosis for the next batch.
+        The id and created_at are fixed here, so they reflect when the diagnosis finished, not when it was written.
+        """
+        values = {
+            **values,
+            "id": values.get("id") or str(uuid.uuid4()),
+            "created_at": values.get("created_at") or datetime.now(),
+        }
+        future = Future()
+        self._ensure_started()
+        self._queue.put((values, future))
+        return future
+
+    def stop(self, timeout: float | None = None) -> None:
+        """
+        Writes the queued diagnoses and stops the writer thread.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="diagnosis-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._write(batch)
+
+    def _write(self, batch: list[tuple[dict, Future]]) -> None:
+        batch = [(values, future) for values, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        try:
+            with self.session_factory() as db:
+                diagnoses: list[Diagnosis] = crud_diagonsis.create_diagnoses(db, [values for values, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # Retry one by one so a single bad row does not fail the whole batch
+            logger.warning("Diagnosis batch of %s failed, retrying individually: %s", len(batch), e)
+            for item in batch:
+                self._write_one(item)
+            return
+
+        for (_, future), diagnosis in zip(batch, diagnoses):
+            future.set_result(diagnosis)
+
+    def _write_one(self, item: tuple[dict, Future]) -> None:
+        values, future = item
+        try:
+            with self.session_factory() as db:
+                future.set_result(crud_diagonsis.create_diagnoses(db, [values])[0])
+        except Exception as e:
+            future.set_exception(e)
+
+
+diagnosis_writer = DiagnosisBatchWriter()
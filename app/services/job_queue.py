@@ -0,0 +1,332 @@
+import asyncio
+import threading
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core import tracing
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.diagnosis_job import DiagnosisJob, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING
+from app.services.upload_service import ingest_upload, spool_to
+
+
+class JobBroker:
+    """
+    Diagnosis job queue shared by the API processes and the inference workers (app.worker).
+    Jobs are returned as detached DiagnosisJob objects.
+    """
+
+    def enqueue(self, user_id: str, upload_path: str, traceparent: str | None = None) -> str:
+        raise NotImplementedError
+
+    def claim(self, worker_id: str) -> DiagnosisJob | None:
+        """
+        Marks the oldest queued job as running and returns it, or returns None if the queue is empty.
+        A running job whose lease expired (its worker died) is claimed again like a queued one.
+        """
+        raise NotImplementedError
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """
+        Renews the lease of a job the worker is running. Returns False if the job is no longer the worker's.
+        """
+        raise NotImplementedError
+
+    def complete(self, job_id: str, diagnosis_id: str) -> None:
+        raise NotImplementedError
+
+    def fail(self, job_id: str, error_status: int, error_detail: str) -> None:
+        raise NotImplementedError
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Fails a job nobody has claimed yet. Returns False if a worker already has it.
+        """
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> DiagnosisJob | None:
+        raise NotImplementedError
+
+    def purge(self, finished_before: datetime) -> int:
+        """
+        Deletes done and failed jobs that finished before the given time. Returns how many were deleted.
+        """
+        raise NotImplementedError
+
+
+class DatabaseJobBroker(JobBroker):
+    """
+    Queue stored in the diagnosis_jobs table.
+    Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never block on each other.
+    A claim is a lease of JOB_LEASE_SECONDS that the worker renews with heartbeat(); a job whose worker
+    died (OOM kill, recycle) is claimed again once the lease expires, up to JOB_MAX_ATTEMPTS claims.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+
+    def enqueue(self, user_id: str, upload_path: str, traceparent: str | None = None) -> str:
+        job = DiagnosisJob(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            status=JOB_QUEUED,
+            upload_path=upload_path,
+            traceparent=traceparent,
+            created_at=datetime.now(),
+            attempts=0
+        )
+        with self.session_factory() as db:
+            db.add(job)
+            db.commit()
+        return job.id
+
+    def claim(self, worker_id: str) -> DiagnosisJob | None:
+        now = datetime.now()
+        lease_expired_at = now - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+        with self.session_factory() as db:
+            while True:
+                job = db.execute(
+                    select(DiagnosisJob)
+                    .where(or_(
+                        DiagnosisJob.status == JOB_QUEUED,
+                        and_(
+                            DiagnosisJob.status == JOB_RUNNING,
+                            # Jobs claimed before leases existed have no heartbeat
+                            func.coalesce(DiagnosisJob.heartbeat_at, DiagnosisJob.started_at) < lease_expired_at
+                        )
+                    ))
+                    .order_by(DiagnosisJob.created_at)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                ).scalar_one_or_none()
+
+                if job is None:
+                    return None
+
+                if job.attempts >= settings.JOB_MAX_ATTEMPTS:
+                    # Every worker that took it died, e.g. the image makes them run out of memory
+                    job.status = JOB_FAILED
+                    job.finished_at = now
+                    job.error_status = status.HTTP_500_INTERNAL_SERVER_ERROR
+                    job.error_detail = "진단 처리 중 오류가 발생했습니다."
+                    db.commit()
+                    Path(job.upload_path).unlink(missing_ok=True)
+                    continue
+
+                job.status = JOB_RUNNING
+                job.started_at = now
+                job.heartbeat_at = now
+                job.worker_id = worker_id
+                job.attempts += 1
+                db.commit()
+                return job
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        with self.session_factory() as db:
+            result = db.execute(
+                update(DiagnosisJob)
+                .where(
+                    DiagnosisJob.id == job_id,
+                    DiagnosisJob.worker_id == worker_id,
+                    DiagnosisJob.status == JOB_RUNNING
+                )
+                .values(heartbeat_at=datetime.now())
+            )
+            db.commit()
+            return result.rowcount == 1
+
+    def complete(self, job_id: str, diagnosis_id: str) -> None:
+        self._finish(job_id, status=JOB_DONE, diagnosis_id=diagnosis_id)
+
+    def fail(self, job_id: str, error_status: int, error_detail: str) -> None:
+        self._finish(job_id, status=JOB_FAILED, error_status=error_status, error_detail=error_detail)
+
+    def cancel(self, job_id: str) -> bool:
+        return self._finish(
+            job_id,
+            only_if_queued=True,
+            status=JOB_FAILED,
+            error_status=status.HTTP_504_GATEWAY_TIMEOUT,
+            error_detail="cancelled before a worker picked it up"
+        )
+
+    def get(self, job_id: str) -> DiagnosisJob | None:
+        with self.session_factory() as db:
+            return db.get(DiagnosisJob, job_id)
+
+    def purge(self, finished_before: datetime) -> int:
+        with self.session_factory() as db:
+            result = db.execute(
+                delete(DiagnosisJob).where(
+                    DiagnosisJob.status.in_((JOB_DONE, JOB_FAILED)),
+                    DiagnosisJob.finished_at < finished_before
+                )
+            )
+            db.commit()
+            return result.rowcount
+
+    def _finish(self, job_id: str, only_if_queued: bool = False, **values) -> bool:
+        statement = update(DiagnosisJob).where(DiagnosisJob.id == job_id)
+        if only_if_queued:
+            statement = statement.where(DiagnosisJob.status == JOB_QUEUED)
+
+        with self.session_factory() as db:
+            result = db.execute(statement.values(finished_at=datetime.now(), **values))
+            db.commit()
+            return result.rowcount == 1
+
+
+class MemoryJobBroker(JobBroker):
+    """
+    In-process stand-in for the database queue, for tests and single-process local runs.
+    Jobs are lost on restart and are only visible to workers in the same process.
+    """
+
+    def __init__(self):
+        self._jobs: dict[str, DiagnosisJob] = {}
+        self._queued: deque[str] = deque()
+        self._lock = threading.Lock()
+
+    def enqueue(self, user_id: str, upload_path: str, traceparent: str | None = None) -> str:
+        job = DiagnosisJob(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            status=JOB_QUEUED,
+            upload_path=upload_path,
+            traceparent=traceparent,
+            created_at=datetime.now(),
+            attempts=0
+        )
+        with self._lock:
+            self._jobs[job.id] = job
+            self._queued.append(job.id)
+        return job.id
+
+    def claim(self, worker_id: str) -> DiagnosisJob | None:
+        with self._lock:
+            while self._queued:
+                job = self._jobs[self._queued.popleft()]
+                if job.status != JOB_QUEUED:
+                    continue
+                job.status = JOB_RUNNING
+                job.started_at = job.heartbeat_at = datetime.now()
+                job.worker_id = worker_id
+                job.attempts += 1
+                return job
+            return None
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        # Jobs die with the process that runs them, so leases never expire here
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.worker_id != worker_id or job.status != JOB_RUNNING:
+                return False
+            job.heartbeat_at = datetime.now()
+            return True
+
+    def complete(self, job_id: str, diagnosis_id: str) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.status, job.diagnosis_id, job.finished_at = JOB_DONE, diagnosis_id, datetime.now()
+
+    def fail(self, job_id: str, error_status: int, error_detail: str) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.status, job.finished_at = JOB_FAILED, datetime.now()
+            job.error_status, job.error_detail = error_status, error_detail
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JOB_QUEUED:
+                return False
+            job.status, job.finished_at = JOB_FAILED, datetime.now()
+            job.error_status = status.HTTP_504_GATEWAY_TIMEOUT
+            job.error_detail = "cancelled before a worker picked it up"
+            return True
+
+    def get(self, job_id: str) -> DiagnosisJob | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            # Finished jobs are read once by the waiting request
+            if job is not None and job.status in (JOB_DONE, JOB_FAILED):
+                del self._jobs[job_id]
+            return job
+
+    def purge(self, finished_before: datetime) -> int:
+        # Finished jobs nobody read, e.g. of requests that timed out
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.status in (JOB_DONE, JOB_FAILED) and job.finished_at < finished_before
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+            return len(expired)
+
+
+def get_job_broker() -> JobBroker:
+    """
+    Creates the job broker selected by settings.JOB_BROKER.
+    """
+    if settings.JOB_BROKER == "database":
+        return DatabaseJobBroker()
+    if settings.JOB_BROKER == "memory":
+        return MemoryJobBroker()
+    raise ValueError(f"Unknown job broker: {settings.JOB_BROKER}")
+
+
+job_broker = get_job_broker()
+
+
+async def spool_upload(file: UploadFile) -> Path:
+    """
+    Validates an uploaded image and copies it, in chunks, to the spool directory shared with the inference workers.
+    """
+    source = await ingest_upload(file)
+    path = settings.JOB_SPOOL_DIR / f"{uuid.uuid4()}.upload"
+    await asyncio.to_thread(spool_to, source, path)
+    return path
+
+
+async def run_diagnosis_job(file: UploadFile, user_id: str) -> str:
+    """
+    Hands an uploaded image to the inference workers and waits for the result.
+    Returns the id of the saved diagnosis, or raises the HTTPException the worker reported.
+    """
+    upload_path = await spool_upload(file)
+    job_id = await asyncio.to_thread(job_broker.enqueue, user_id, str(upload_path), tracing.current_traceparent())
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.JOB_TIMEOUT_SECONDS
+    while True:
+        await asyncio.sleep(settings.JOB_POLL_INTERVAL_MS / 1000)
+        job = await asyncio.to_thread(job_broker.get, job_id)
+
+        if job is not None and job.status == JOB_DONE:
+            # The worker saved the diagnosis in another process; without a shared cache only this one sees the invalidation
+            response_cache.invalidate_user(user_id)
+            return job.diagnosis_id
+        if job is not None and job.status == JOB_FAILED:
+            raise HTTPException(
+                status_code=job.error_status or status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=job.error_detail
+            )
+
+        if job is None or loop.time() >= deadline:
+            # Drop the job if no worker has started it, so nobody processes an abandoned upload
+            if await asyncio.to_thread(job_broker.cancel, job_id):
+                upload_path.unlink(missing_ok=True)
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="진단 요청 처리 시간이 초과되었습니다. 잠시 후 다시 시도해주세요."
+            )
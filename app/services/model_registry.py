@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from ultralytics import YOLO
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Weight file per model, relative to the weights directory
+WEIGHT_FILES = {
+    "face": "yolov8n-face-lindevs.pt",
+    "wrinkle": "wrinkle.pt",
+    "acne": "acne.pt",
+    "atopy": "atopy.pt",
+}
+
+
+class ModelSet:
+    """
+    One loaded version of all diagnosis models. Never modified after it is published.
+    """
+
+    def __init__(self, version: str, models: dict[str, YOLO]):
+        self.version = version
+        self.face = models["face"]
+        self.segmentation = {name: model for name, model in models.items() if name != "face"}
+
+    def all(self) -> list[YOLO]:
+        return [self.face, *self.segmentation.values()]
+
+
+def _fingerprint(weights_dir: Path) -> tuple:
+    # Changes whenever a weight file (or the directory a symlink points to) is replaced
+    resolved = weights_dir.resolve()
+    stats = []
+    for filename in WEIGHT_FILES.values():
+        stat = (resolved / filename).stat()
+        stats.append((filename, stat.st_mtime_ns, stat.st_size))
+    return (str(resolved), *stats)
+
+
+def weights_version(weights_dir: Path) -> str:
+    """
+    Version string of a weights directory: the contents of its VERSION file if present,
+    otherwise a short content hash of each weight file.
+    """
+    version_file = weights_dir / "VERSION"
+    if version_file.exists():
+        return version_file.read_text().strip()[:255]
+
+    parts = []
+    for name, filename in WEIGHT_FILES.items():
+        digest = hashlib.sha256()
+        with open(weights_dir / filename, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        parts.append(f"{name}={digest.hexdigest()[:12]}")
+    return ";".join(parts)
+
+
+class ModelRegistry:
+    """
+    Holds the current ModelSet and replaces it when the weights change, without a restart.
+
+    A request reads `current` once and uses that ModelSet until it finishes, so a swap
+    never mixes versions within one diagnosis and in-flight requests finish on the old
+    models. New versions are loaded and warmed up in the background before they are published.
+    """
+
+    def __init__(self, weights_dir: Path, poll_interval: float = 0):
+        self.weights_dir = weights_dir
+        self.poll_interval = poll_interval
+        self._current: ModelSet | None = None
+        self._fingerprint: tuple | None = None
+        self._reload_lock = threading.Lock()
+        self._watcher_pid: int | None = None
+        # A lock held by a reload in the parent at fork time would stay held in the child
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self) -> None:
+        self._reload_lock = threading.Lock()
+
+    @property
+    def current(self) -> ModelSet:
+        if self._current is None:
+            self.reload()
+        self._ensure_watching()
+        return self._current
+
+    def reload(self, warmup: bool = True) -> ModelSet:
+        """
+        Loads the weights directory and publishes it as the current version.
+        Returns the current ModelSet unchanged if the weights have not changed since the last load.
+        """
+        with self._reload_lock:
+            fingerprint = _fingerprint(self.weights_dir)
+            if self._current is not None and fingerprint == self._fingerprint:
+                return self._current
+
+            for filename in WEIGHT_FILES.values():
+                path = self.weights_dir / filename
+                if not path.exists():
+                    raise FileNotFoundError(f"Weight file not found: {path}")
+
+            version = weights_version(self.weights_dir)
+            logger.info("Loading AI models (%s)...", version)
+            model_set = ModelSet(version, {
+                name: YOLO(str(self.weights_dir / filename)) for name, filename in WEIGHT_FILES.items()
+            })
+            if warmup:
+                self._warmup(model_set)
+
+            # A single reference assignment: readers see either the old or the new set
+            self._current, self._fingerprint = model_set, fingerprint
+            logger.info("AI models %s loaded successfully.", version)
+            return model_set
+
+    def _warmup(self, model_set: ModelSet) -> None:
+        # The first predict() builds the predictor and fuses layers; do it before any request sees the models
+        blank = np.zeros((settings.IMG_SIZE, settings.IMG_SIZE, 3), dtype=np.uint8)
+        for model in model_set.all():
+            model.predict(source=blank, imgsz=settings.IMG_SIZE, device=settings.AI_DEVICE, verbose=False)
+
+    def _ensure_watching(self) -> None:
+        # Threads do not survive fork, so each (forked) process starts its own watcher on first use
+        if self.poll_interval <= 0 or self._watcher_pid == os.getpid():
+            return
+        with self._reload_lock:
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+            threading.Thread(target=self._watch, name="model-registry-watcher", daemon=True).start()
+
+    def _watch(self) -> None:
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                if _fingerprint(self.weights_dir) != self._fingerprint:
+                    self.reload()
+            except Exception as e:
+                # Keep serving the current version, e.g. while new weight files are still being copied
+                logger.warning("Model reload failed, keeping version %s: %s", self._current.version, e)
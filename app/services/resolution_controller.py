@@ -0,0 +1,69 @@
+import logging
+import threading
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResolutionController:
+    """
+    Chooses the segmentation resolution tier from how long diagnoses wait before they start.
+
+    Level 0 is the highest tier of every model. When the smoothed queue wait exceeds
+    `target` the level steps down one tier, and when it stays under half the target the
+    level steps back up; at most one step per `cooldown` seconds, so the pipeline has time
+    to drain before the next decision.
+    """
+
+    def __init__(
+        self,
+        tiers: dict[str, list[int]],
+        target: float,
+        cooldown: float,
+        smoothing: float = 0.3
+    ):
+        self.tiers = tiers
+        self.target = target
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+        self.max_level = max(len(sizes) for sizes in tiers.values()) - 1
+        self.level = 0
+        self.wait = 0.0
+        self._last_change = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, queue_wait: float) -> None:
+        """
+        Records how long one diagnosis waited before its pipeline started, in seconds.
+        """
+        with self._lock:
+            self.wait += self.smoothing * (queue_wait - self.wait)
+
+            now = time.monotonic()
+            if now - self._last_change < self.cooldown:
+                return
+
+            if self.wait > self.target and self.level < self.max_level:
+                self.level += 1
+                self._last_change = now
+                logger.warning("Queue wait %.2fs over target, inference resolution level %s", self.wait, self.level)
+            elif self.wait < self.target / 2 and self.level > 0:
+                self.level -= 1
+                self._last_change = now
+                logger.info("Queue wait %.2fs under target, inference resolution level %s", self.wait, self.level)
+
+    def resolution(self, analysis_type: str) -> int:
+        """
+        Inference size for a segmentation model at the current level.
+        """
+        sizes = self.tiers.get(analysis_type) or [settings.IMG_SIZE]
+        return sizes[min(self.level, len(sizes) - 1)]
+
+
+resolution_controller = ResolutionController(
+    tiers=settings.INFERENCE_RESOLUTION_TIERS,
+    target=settings.INFERENCE_QUEUE_WAIT_TARGET_MS / 1000,
+    cooldown=settings.INFERENCE_RESOLUTION_COOLDOWN_SECONDS
+)
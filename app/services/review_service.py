@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
@@ -32,8 +34,20 @@ def create_new_review(
     return new_review
 
 
-def get_reviews_by_user(db: Session, user_id: str) -> list[Review]:
+def get_reviews_by_user(
+    db: Session, 
+    user_id: str, 
+    limit: int | None = None, 
+    after: tuple[datetime, str] | None = None
+) -> list[Review]:
+    """
+    Gets a page of reviews from the database for a specific user, ordered by most recent.
+    """
+    return crud_review.get_reviews_by_user(db=db, user_id=user_id, limit=limit, after=after)
+
+
+def count_reviews_by_user(db: Session, user_id: str) -> int:
     """
-    Gets all reviews from the database for a specific user, ordered by most recent.
+    Gets the (cached) number of reviews for a specific user.
     """
-    return crud_review.get_reviews_by_user(db=db, user_id=user_id)
\ No newline at end of file
+    return crud_review.count_reviews_by_user(db=db, user_id=user_id)
\ No newline at end of file
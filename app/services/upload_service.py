@@ -0,0 +1,80 @@
+import asyncio
+import shutil
+from pathlib import Path
+from typing import BinaryIO
+
+from fastapi import HTTPException, UploadFile, status
+from PIL import Image
+
+from app.core.config import settings
+
+# Copy size when spooling uploads, so memory per upload stays bounded
+CHUNK_SIZE = 1024 * 1024
+
+# The decoder refuses anything larger, even if a caller skips validate_image
+Image.MAX_IMAGE_PIXELS = settings.UPLOAD_MAX_PIXELS
+
+
+def sniff_image_format(header: bytes) -> str | None:
+    """
+    Returns the image format identified by the file's magic bytes, or None if it is not an accepted format.
+    """
+    if header.startswith(b"\xff\xd8\xff"):
+        return "JPEG"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "PNG"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "WEBP"
+    return None
+
+
+def validate_image(source: BinaryIO) -> None:
+    """
+    Checks an upload's format and pixel count from its header, without decoding the pixels.
+    Raises HTTPException for anything the diagnosis pipeline should not decode.
+    """
+    source.seek(0)
+    image_format = sniff_image_format(source.read(16))
+    source.seek(0)
+    if image_format is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="이미지 파일을 처리할 수 없습니다.")
+
+    too_large = HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="이미지 해상도가 너무 큽니다.")
+    try:
+        # Only parses the header; pixels are decoded later by the pipeline
+        with Image.open(source, formats=[image_format]) as image:
+            width, height = image.size
+    except Image.DecompressionBombError:
+        raise too_large
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="이미지 파일을 처리할 수 없습니다.")
+    finally:
+        source.seek(0)
+
+    if width * height > settings.UPLOAD_MAX_PIXELS:
+        raise too_large
+
+
+async def ingest_upload(file: UploadFile) -> BinaryIO:
+    """
+    Validates an uploaded image and returns its file object, rewound, for the decoder.
+    The multipart parser already spooled it to a temporary file, so it is never copied into memory.
+    """
+    if file.size is not None and file.size > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="업로드 파일이 너무 큽니다."
+        )
+
+    await asyncio.to_thread(validate_image, file.file)
+    return file.file
+
+
+def spool_to(source: BinaryIO, path: Path) -> None:
+    """
+    Copies a file object to `path` in CHUNK_SIZE pieces.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    source.seek(0)
+    with open(path, "wb") as target:
+        shutil.copyfileobj(source, target, CHUNK_SIZE)
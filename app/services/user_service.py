@@ -1,3 +1,4 @@
+import logging
 import secrets
 import hashlib
 
@@ -9,6 +10,8 @@ from app.models.user import User
 from app.schemas.user import RegisterRequest
 from app.services import email_service
 
+logger = logging.getLogger(__name__)
+
 
 def get_password_hash(password: str) -> str:
     """
@@ -93,7 +96,7 @@ async def request_password_reset(db: Session, email: str) -> dict:
     
     if not user:
         # To prevent email enumeration, do not reveal that the email does not exist
-        print(f"Password reset attempt for non-existent email: {email}")
+        logger.info("Password reset attempt for non-existent email: %s", email)
         return {"message": "If an account with this email exists, a new password has been sent."}
         
     temp_password = secrets.token_urlsafe(10) # Create a temporary password
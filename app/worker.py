@@ -0,0 +1,204 @@
+"""
+Inference worker: runs the AI models for diagnosis jobs queued by the API.
+
+Use with DIAGNOSIS_EXECUTION=queue on the API processes. Workers and API
+processes must share the database, JOB_SPOOL_DIR and STATIC_DIR.
+
+    python -m app.worker
+    python -m app.worker --concurrency 2
+    python -m app.worker --metrics-port 9102
+
+The pipeline metrics (diagnosis_*) of its jobs are served for
+Prometheus on WORKER_METRICS_PORT (default 9101); give each worker on the
+same host its own --metrics-port.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi import HTTPException, status
+
+from app.core.logging import log_context, setup_logging
+
+# Before the imports below load the AI models, so their log records are written
+setup_logging()
+
+from app.core import metrics, tracing
+from app.core.memory import MemoryGovernor, get_memory_governor
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.diagnosis_job import DiagnosisJob
+from app.services import diagnosis_service
+from app.services.diagnosis_writer import diagnosis_writer
+from app.services.job_queue import JobBroker, job_broker
+
+# Import all models to ensure their relationships can be resolved
+from app.models import user, diagnosis, diagnosis_job, diagnosis_summary, review
+
+logger = logging.getLogger(__name__)
+
+# How often a worker deletes finished jobs older than JOB_RETENTION_HOURS
+PURGE_INTERVAL_SECONDS = 600
+
+
+@contextmanager
+def job_lease(broker: JobBroker, job: DiagnosisJob):
+    """
+    Renews the job's lease from a background thread while the block runs.
+    """
+    done = threading.Event()
+
+    def renew():
+        while not done.wait(settings.JOB_LEASE_SECONDS / 3):
+            try:
+                if not broker.heartbeat(job.id, job.worker_id):
+                    logger.warning("Lost the lease of diagnosis job %s", job.id)
+                    return
+            except Exception as e:
+                logger.warning("Could not renew the lease of diagnosis job %s: %s", job.id, e)
+
+    thread = threading.Thread(target=renew, name=f"job-lease-{job.id[:8]}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def purge_finished_jobs(broker: JobBroker) -> None:
+    """
+    Deletes finished jobs older than JOB_RETENTION_HOURS.
+    """
+    finished_before = datetime.now() - timedelta(hours=settings.JOB_RETENTION_HOURS)
+    try:
+        deleted = broker.purge(finished_before)
+    except Exception as e:
+        logger.warning("Could not delete finished diagnosis jobs: %s", e)
+        return
+    if deleted:
+        logger.info("Deleted %s finished diagnosis job(s).", deleted)
+
+
+def process_job(broker: JobBroker, job: DiagnosisJob) -> None:
+    """
+    Runs one claimed job, renewing its lease, and records its diagnosis id or error.
+    """
+    upload_path = Path(job.upload_path)
+    try:
+        # How long the job sat in the queue, on this process's monotonic clock
+        queued_at = time.monotonic() - (job.started_at - job.created_at).total_seconds()
+        # Continues the trace of the request that queued the job
+        with log_context(job_id=job.id, user_id=job.user_id), tracing.span("diagnosis_job", job.traceparent, **{"job.id": job.id}):
+            with job_lease(broker, job), open(upload_path, "rb") as source, SessionLocal() as db:
+                diagnosis = diagnosis_service.run_diagnosis(db, source, job.user_id, queued_at)
+            broker.complete(job.id, diagnosis.id)
+    except HTTPException as e:
+        broker.fail(job.id, e.status_code, e.detail)
+    except Exception as e:
+        logger.exception("Diagnosis job %s failed: %s", job.id, e)
+        broker.fail(job.id, status.HTTP_500_INTERNAL_SERVER_ERROR, "진단 처리 중 오류가 발생했습니다.")
+    finally:
+        upload_path.unlink(missing_ok=True)
+
+
+def run_worker(
+    broker: JobBroker,
+    worker_id: str,
+    stop_event: threading.Event,
+    governor: MemoryGovernor | None = None
+) -> None:
+    """
+    Claims and processes jobs until stop_event is set. A job in progress is always finished.
+    The governor, if any, is told about every finished job.
+    """
+    poll_interval = settings.JOB_POLL_INTERVAL_MS / 1000
+    next_purge = time.monotonic()
+    while not stop_event.is_set():
+        if settings.JOB_RETENTION_HOURS and time.monotonic() >= next_purge:
+            next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+            purge_finished_jobs(broker)
+
+        try:
+            job = broker.claim(worker_id)
+        except Exception as e:
+            # e.g. the database is not reachable or not migrated yet
+            logger.warning("Worker %s could not claim a job: %s", worker_id, e)
+            stop_event.wait(5)
+            continue
+
+        if job is None:
+            stop_event.wait(poll_interval)
+            continue
+
+        process_job(broker, job)
+        if governor is not None:
+            governor.request_finished()
+
+
+def start_in_process_worker(stop_event: threading.Event) -> threading.Thread:
+    """
+    Runs a worker thread inside the API process, for JOB_BROKER=memory.
+    """
+    thread = threading.Thread(
+        target=run_worker,
+        args=(job_broker, f"{socket.gethostname()}:{os.getpid()}:api", stop_event),
+        name="diagnosis-worker",
+        daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process queued diagnosis jobs.")
+    parser.add_argument("--concurrency", type=int, default=1, help="jobs processed at the same time")
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=settings.WORKER_METRICS_PORT,
+        help="port serving this worker's Prometheus metrics; 0 disables"
+    )
+    args = parser.parse_args()
+
+    if settings.JOB_BROKER == "memory":
+        parser.error("JOB_BROKER=memory only works inside the API process; use the database broker")
+
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+
+    # Past the memory limits, stop claiming jobs and exit once the running ones finish; the container restarts the worker
+    governor = get_memory_governor(recycle=lambda reason: stop_event.set())
+
+    threads = []
+    for index in range(args.concurrency):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+        thread = threading.Thread(
+            target=run_worker,
+            args=(job_broker, worker_id, stop_event, governor if governor.enabled else None),
+            name=f"diagnosis-worker-{index}"
+        )
+        thread.start()
+        threads.append(thread)
+
+    logger.info("Diagnosis worker started with %s thread(s).", args.concurrency)
+    while any(thread.is_alive() for thread in threads):
+        for thread in threads:
+            thread.join(timeout=1)
+    diagnosis_writer.stop(timeout=10)
+    logger.info("Diagnosis worker stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import os
+import uuid
+
+# Before the app is imported: app.db.session creates its engine from this
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Registers every model on Base.metadata
+import app.models.diagnosis  # noqa: F401
+import app.models.diagnosis_job  # noqa: F401
+import app.models.diagnosis_summary  # noqa: F401
+import app.models.review  # noqa: F401
+from app.models.base import Base
+from app.models.user import User
+
+
+@pytest.fixture
+def session_factory():
+    # One shared connection, so every session sees the same in-memory database
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    with session_factory() as session:
+        yield session
+
+
+@pytest.fixture
+def user(db) -> User:
+    suffix = uuid.uuid4().hex[:8]
+    user = User(email=f"test-{suffix}@example.com", username=f"test_{suffix}", hashed_password="")
+    db.add(user)
+    db.commit()
+    return user
@@ -0,0 +1,31 @@
+from app.core.cache import MemoryCache, ResponseCache, TieredCache
+
+
+def _process(shared: MemoryCache) -> ResponseCache:
+    # One API process: its own local tier in front of the shared backend
+    return ResponseCache(TieredCache(local=MemoryCache(), shared=shared, local_ttl=60))
+
+
+def test_invalidation_is_seen_by_other_processes_at_once():
+    shared = MemoryCache()
+    first, second = _process(shared), _process(shared)
+
+    key = second.key("user", "/results")
+    second.set(key, b"[]")
+    assert second.get(second.key("user", "/results")) == b"[]"
+
+    first.invalidate_user("user")
+
+    # The local copies of the old entry stay, but a new generation gives new keys and ETags
+    new_key = second.key("user", "/results")
+    assert new_key != key
+    assert second.etag(new_key) != second.etag(key)
+    assert second.get(new_key) is None
+
+
+def test_generations_are_per_user():
+    cache = ResponseCache(TieredCache(local=MemoryCache()))
+    key = cache.key("user", "/results")
+
+    cache.invalidate_user("other")
+    assert cache.key("user", "/results") == key
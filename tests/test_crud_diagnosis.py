@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.crud import crud_diagonsis
+from app.models.diagnosis_summary import DiagnosisSummary
+
+START = datetime(2026, 1, 1, 9, 0)
+
+
+def _values(user_id: str, score: int, created_at: datetime) -> dict:
+    return {
+        "user_id": user_id,
+        "original_image_url": f"/static/{user_id}/{score}/original.jpg",
+        "created_at": created_at,
+        "total_score": score,
+        "wrinkle_score": score,
+        "acne_score": score,
+        "atopy_score": score,
+    }
+
+
+def _summary(db, user_id: str) -> DiagnosisSummary:
+    db.expire_all()
+    return db.get(DiagnosisSummary, user_id)
+
+
+def test_batch_for_new_user_builds_summary_once(db, user):
+    diagnoses = crud_diagonsis.create_diagnoses(db, [
+        _values(user.id, score, START + timedelta(minutes=index))
+        for index, score in enumerate((10, 20, 30))
+    ])
+
+    summary = _summary(db, user.id)
+    assert summary.latest_diagnosis_id == diagnoses[2].id
+    assert summary.previous_diagnosis_id == diagnoses[1].id
+    assert summary.latest_total_score == 30
+    assert summary.previous_total_score == 20
+    assert summary.recent_total_scores == [30, 20, 10]
+    assert summary.recent_wrinkle_scores == [30, 20, 10]
+
+    # Each diagnosis carries the scores up to and including itself
+    assert [diagnosis.recent_scores for diagnosis in diagnoses] == [[10], [20, 10], [30, 20, 10]]
+
+
+def test_batch_after_existing_summary_pushes_in_order(db, user):
+    crud_diagonsis.create_diagnoses(db, [_values(user.id, 10, START)])
+    diagnoses = crud_diagonsis.create_diagnoses(db, [
+        _values(user.id, 30, START + timedelta(minutes=2)),
+        _values(user.id, 20, START + timedelta(minutes=1)),
+    ])
+
+    summary = _summary(db, user.id)
+    assert summary.latest_diagnosis_id == diagnoses[0].id
+    assert summary.previous_diagnosis_id == diagnoses[1].id
+    assert summary.recent_total_scores == [30, 20, 10]
+    assert diagnoses[1].recent_scores == [20, 10]
+    assert diagnoses[0].recent_scores == [30, 20, 10]
+
+
+def test_first_diagnosis_retries_when_summary_was_created_concurrently(db, user, monkeypatch):
+    rebuild = crud_diagonsis.rebuild_diagnosis_summary
+    calls = []
+
+    def racing_rebuild(db, user_id, summary=None):
+        if not calls:
+            # Another transaction inserts the summary row between the lookup and the commit
+            db.execute(insert(DiagnosisSummary).values(
+                user_id=user_id,
+                recent_total_scores=[],
+                recent_wrinkle_scores=[],
+                recent_acne_scores=[],
+                recent_atopy_scores=[],
+            ))
+        calls.append(user_id)
+        return rebuild(db, user_id, summary)
+
+    monkeypatch.setattr(crud_diagonsis, "rebuild_diagnosis_summary", racing_rebuild)
+    diagnoses = crud_diagonsis.create_diagnoses(db, [_values(user.id, 10, START)])
+
+    assert len(calls) == 2
+    assert db.get(crud_diagonsis.Diagnosis, diagnoses[0].id) is not None
+    summary = _summary(db, user.id)
+    assert summary.latest_diagnosis_id == diagnoses[0].id
+    assert summary.recent_total_scores == [10]
+
+
+def test_out_of_order_row_in_batch_rebuilds_without_duplicates(db, user):
+    crud_diagonsis.create_diagnoses(db, [
+        _values(user.id, 10, START),
+        _values(user.id, 30, START + timedelta(minutes=10)),
+    ])
+    # The first row is older than the summary's latest, the second is newer
+    diagnoses = crud_diagonsis.create_diagnoses(db, [
+        _values(user.id, 20, START + timedelta(minutes=5)),
+        _values(user.id, 40, START + timedelta(minutes=15)),
+    ])
+
+    summary = _summary(db, user.id)
+    assert summary.latest_diagnosis_id == diagnoses[1].id
+    assert summary.latest_total_score == 40
+    assert summary.previous_total_score == 30
+    assert summary.recent_total_scores == [40, 30, 20]
+    assert diagnoses[0].recent_scores == [20, 10]
+    assert diagnoses[1].recent_scores == [40, 30, 20]
+
+    # Later pushes continue from the rebuilt ring
+    crud_diagonsis.create_diagnoses(db, [_values(user.id, 50, START + timedelta(minutes=20))])
+    assert _summary(db, user.id).recent_total_scores == [50, 40, 30]
+
+
+def test_diagnosis_with_recent_scores_ends_at_the_diagnosis(db, user):
+    diagnoses = crud_diagonsis.create_diagnoses(db, [
+        _values(user.id, score, START + timedelta(minutes=index))
+        for index, score in enumerate((10, 20, 30, 40, 50))
+    ])
+
+    diagnosis, rows = crud_diagonsis.get_diagnosis_with_recent_scores(db, diagnoses[3].id)
+    assert diagnosis.id == diagnoses[3].id
+    assert [row.total_score for row in rows] == [40, 30, 20]
+
+    diagnosis, rows = crud_diagonsis.get_diagnosis_with_recent_scores(db, diagnoses[1].id)
+    assert diagnosis.id == diagnoses[1].id
+    assert [row.total_score for row in rows] == [20, 10]
+
+    assert crud_diagonsis.get_diagnosis_with_recent_scores(db, "missing") == (None, [])
+
+
+def test_diagnosis_with_recent_scores_breaks_created_at_ties_by_id(db, user):
+    diagnoses = crud_diagonsis.create_diagnoses(db, [
+        _values(user.id, 10, START),
+        {**_values(user.id, 20, START + timedelta(minutes=1)), "id": "00000000-0000-4000-8000-00000000000a"},
+        {**_values(user.id, 30, START + timedelta(minutes=1)), "id": "00000000-0000-4000-8000-00000000000b"},
+    ])
+
+    _, rows = crud_diagonsis.get_diagnosis_with_recent_scores(db, diagnoses[1].id)
+    assert [row.total_score for row in rows] == [20, 10]
+    _, rows = crud_diagonsis.get_diagnosis_with_recent_scores(db, diagnoses[2].id)
+    assert [row.total_score for row in rows] == [30, 20, 10]
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.models.diagnosis_job import DiagnosisJob, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING
+from app.services.job_queue import DatabaseJobBroker
+
+
+@pytest.fixture
+def broker(session_factory) -> DatabaseJobBroker:
+    return DatabaseJobBroker(session_factory)
+
+
+def _expire_lease(db, job_id: str) -> None:
+    # What a dead worker leaves behind: no heartbeat for longer than the lease
+    expired_at = datetime.now() - timedelta(seconds=settings.JOB_LEASE_SECONDS + 1)
+    db.execute(update(DiagnosisJob).where(DiagnosisJob.id == job_id).values(heartbeat_at=expired_at))
+    db.commit()
+
+
+def test_running_job_is_not_claimed_while_its_lease_is_renewed(broker, user):
+    job_id = broker.enqueue(user.id, "upload")
+    assert broker.claim("first").id == job_id
+
+    assert broker.heartbeat(job_id, "first")
+    assert broker.claim("second") is None
+
+
+def test_job_of_a_dead_worker_is_claimed_again(db, broker, user):
+    job_id = broker.enqueue(user.id, "upload")
+    broker.claim("first")
+    _expire_lease(db, job_id)
+
+    job = broker.claim("second")
+    assert job.id == job_id
+    assert job.worker_id == "second"
+    assert job.attempts == 2
+    # The first worker lost the job
+    assert not broker.heartbeat(job_id, "first")
+    assert broker.heartbeat(job_id, "second")
+
+
+def test_job_fails_after_max_attempts(db, broker, user, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 2)
+    upload = tmp_path / "job.upload"
+    upload.write_bytes(b"image")
+    job_id = broker.enqueue(user.id, str(upload))
+
+    for worker_id in ("first", "second"):
+        assert broker.claim(worker_id).id == job_id
+        _expire_lease(db, job_id)
+
+    assert broker.claim("third") is None
+    job = broker.get(job_id)
+    assert job.status == JOB_FAILED
+    assert job.error_status == 500
+    assert not upload.exists()
+
+
+def test_purge_deletes_only_old_finished_jobs(broker, user):
+    old_done, old_failed, recent_done, queued, running = (broker.enqueue(user.id, "upload") for _ in range(5))
+    for job_id in (old_done, recent_done):
+        broker.complete(job_id, "diagnosis")
+    broker.fail(old_failed, 422, "no face")
+
+    # Everything finished so far counts as old
+    finished_before = datetime.now() + timedelta(seconds=1)
+    with broker.session_factory() as db:
+        db.execute(
+            update(DiagnosisJob).where(DiagnosisJob.id == recent_done).values(finished_at=finished_before + timedelta(hours=1))
+        )
+        db.commit()
+    broker.claim("worker")
+
+    assert broker.purge(finished_before) == 2
+    assert broker.get(old_done) is None
+    assert broker.get(old_failed) is None
+    assert broker.get(recent_done).status == JOB_DONE
+    assert {broker.get(queued).status, broker.get(running).status} == {JOB_QUEUED, JOB_RUNNING}
@@ -0,0 +1,42 @@
+from app.core import tracing
+from app.core.config import settings
+
+REMOTE_TRACE = "0af7651916cd43dd8448eb211c80319c"
+REMOTE_SPAN = "b7ad6b7169203331"
+
+
+def test_file_exporter_rotates_at_max_bytes(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    exporter = tracing.QueuedSpanExporter(tracing.FileSpanExporter(path, max_bytes=1000, backups=2), maxsize=1000)
+    for index in range(40):
+        span = tracing.Span("request", REMOTE_TRACE, attributes={"index": index})
+        span.duration = 0.001
+        exporter.export(span)
+    exporter.stop()
+
+    assert sorted(file.name for file in tmp_path.iterdir()) == ["spans.jsonl", "spans.jsonl.1", "spans.jsonl.2"]
+    assert all(file.stat().st_size <= 1000 for file in tmp_path.iterdir())
+
+
+def test_queued_exporter_drops_spans_when_full():
+    exporter = tracing.QueuedSpanExporter(tracing.NoopSpanExporter(), maxsize=1)
+    # Without the writer thread nothing leaves the queue
+    exporter.stop()
+
+    dropped = tracing.dropped_spans._values.get((), 0)
+    for _ in range(3):
+        exporter.export(tracing.Span("request", REMOTE_TRACE))
+    assert tracing.dropped_spans._values.get((), 0) == dropped + 2
+
+
+def test_sampling_follows_the_parent(monkeypatch):
+    monkeypatch.setattr(settings, "TRACE_SAMPLE_RATE", 0.0)
+    assert not tracing.start_span("request").sampled
+
+    sampled = tracing.start_span("request", f"00-{REMOTE_TRACE}-{REMOTE_SPAN}-01")
+    assert sampled.sampled
+    assert sampled.traceparent.endswith("-01")
+    assert not tracing.start_span("request", f"00-{REMOTE_TRACE}-{REMOTE_SPAN}-00").sampled
+
+    with tracing.span("request", f"00-{REMOTE_TRACE}-{REMOTE_SPAN}-01"):
+        assert tracing.start_span("SQL SELECT").sampled